@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional
 import logging
 from ..models.requests import ScrapeRequest
-from ..models.responses import ScrapeResponse, TaskStatusResponse
-from ..services.queue_service import QueueService
+from ..models.responses import ScrapeResponse, TaskStatusResponse, BatchResponse, BatchStatusResponse
+from ..services.queue import QueueManager
+from ..services.batch_service import BatchService, json_items, ndjson_items
 from ..services.validation import validate_url
-from ..core.dependencies import get_queue_service
+from ..core.dependencies import get_queue_manager, get_batch_service
+from ..core.exceptions import QueueFullError
 
 router = APIRouter(prefix="/scrape", tags=["scraping"])
 logger = logging.getLogger(__name__)
@@ -13,16 +15,17 @@ logger = logging.getLogger(__name__)
 @router.post("/", response_model=ScrapeResponse, status_code=202)
 async def create_scrape_task(
     request: ScrapeRequest,
-    background_tasks: BackgroundTasks,
-    queue_service: QueueService = Depends(get_queue_service)
+    queue_manager: QueueManager = Depends(get_queue_manager)
 ):
     """
     Create a new scraping task
     
+    A URL that is already being scraped returns the running task, and a
+    recently scraped one a completed task marked ``cached``.
+    
     Args:
         request: Scraping request parameters
-        background_tasks: FastAPI background tasks
-        queue_service: Queue service instance
+        queue_manager: Shared task queue
     
     Returns:
         ScrapeResponse with task ID and initial status
@@ -31,48 +34,124 @@ async def create_scrape_task(
         # Validate URL format and accessibility
         await validate_url(request.url)
         
-        # Create task
-        task_id = await queue_service.create_task(
+        # Create and queue the task
+        task_id = await queue_manager.create_task(
             url=str(request.url),
             headers=request.headers,
             options=request.options
         )
         
-        # Add task to background processing
-        background_tasks.add_task(
-            queue_service.process_task,
-            task_id=task_id
-        )
-        
+        task = await queue_manager.get_task(task_id)
+        cached = bool(task and task.cached)
         return ScrapeResponse(
             task_id=task_id,
-            status="queued",
-            message="Task created successfully"
+            status=task.status.value if task else "queued",
+            message="Served from a recent result" if cached else "Task created successfully",
+            cached=cached
         )
         
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating scraping task: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create scraping task")
 
+@router.post("/batch", response_model=BatchResponse, status_code=202)
+async def create_batch(
+    request: Request,
+    batch_service: BatchService = Depends(get_batch_service)
+):
+    """
+    Create scraping tasks for many URLs at once
+    
+    The body is either a JSON array or, with Content-Type
+    application/x-ndjson, one item per line read as it streams in. Items
+    are URLs or ScrapeRequest objects; invalid items, URLs on
+    unreachable domains and items that do not fit in the task queue are
+    rejected individually.
+    
+    Args:
+        request: Raw request carrying the batch body
+        batch_service: Batch service instance
+    
+    Returns:
+        BatchResponse with batch ID and accepted/rejected counts
+    """
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            items = ndjson_items(request.stream())
+        else:
+            body = await request.json()
+            if not isinstance(body, list):
+                raise ValueError("Batch body must be a JSON array or NDJSON")
+            items = json_items(body)
+        
+        batch = await batch_service.create_batch(items)
+        
+        return BatchResponse(
+            batch_id=batch.batch_id,
+            accepted=batch.total,
+            rejected=batch.rejected,
+            errors=batch.errors,
+            message=f"Batch created with {batch.total} tasks"
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to create batch")
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch_status(
+    batch_id: str,
+    batch_service: BatchService = Depends(get_batch_service)
+):
+    """
+    Get aggregate progress of a batch
+    
+    Args:
+        batch_id: UUID of the batch to check
+        batch_service: Batch service instance
+    
+    Returns:
+        BatchStatusResponse with task counts per status
+    """
+    try:
+        progress = await batch_service.get_progress(batch_id)
+        if not progress:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Batch {batch_id} not found"
+            )
+        
+        return progress
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching batch status: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch batch status")
+
 @router.get("/{task_id}", response_model=TaskStatusResponse)
 async def get_task_status(
     task_id: str,
-    queue_service: QueueService = Depends(get_queue_service)
+    queue_manager: QueueManager = Depends(get_queue_manager)
 ):
     """
     Get the status and result of a scraping task
     
     Args:
         task_id: UUID of the task to check
-        queue_service: Queue service instance
+        queue_manager: Shared task queue
     
     Returns:
         TaskStatusResponse with current status and results if available
     """
     try:
-        task = await queue_service.get_task(task_id)
+        task = await queue_manager.get_task(task_id)
         if not task:
             raise HTTPException(
                 status_code=404,
@@ -1,30 +1,63 @@
-from typing import AsyncGenerator
+from typing import Optional
 from fastapi import Depends
 from .config import settings
-from ..services.queue_service import QueueService
 from ..services.scraper_service import ScraperService
 from ..services.config_service import ConfigService
 from ..services.storage_service import StorageService
+from ..services.batch_service import BatchService, DomainValidator
+from ..services.queue import QueueManager
 
-async def get_storage_service() -> AsyncGenerator[StorageService, None]:
-    service = StorageService(settings.STORAGE_TYPE, settings.REDIS_URL)
-    try:
-        yield service
-    finally:
-        await service.close()
+# One per process: memory storage must outlive the request that created a task or batch
+_storage_service: Optional[StorageService] = None
+
+async def get_storage_service() -> StorageService:
+    global _storage_service
+    if _storage_service is None:
+        _storage_service = StorageService(settings.STORAGE_TYPE, settings.REDIS_URL)
+    return _storage_service
+
+# One per process so its config cache (and startup preload) is shared by all requests
+_config_service: Optional[ConfigService] = None
 
 async def get_config_service(
     storage: StorageService = Depends(get_storage_service)
 ) -> ConfigService:
-    return ConfigService()
+    global _config_service
+    if _config_service is None:
+        _config_service = ConfigService()
+        # Awaited rather than run in __init__ so the preload never blocks the event loop
+        await _config_service.start()
+    return _config_service
+
+# One per process: the queue manager keeps the first one, and each builds its own crawler
+_scraper_service: Optional[ScraperService] = None
 
 async def get_scraper_service(
     config: ConfigService = Depends(get_config_service)
 ) -> ScraperService:
-    return ScraperService(config)
+    global _scraper_service
+    if _scraper_service is None:
+        _scraper_service = ScraperService(config)
+    return _scraper_service
 
-async def get_queue_service(
+# Shared so the worker pool bounds all queued work and domain probes are reused across batches
+_queue_manager: Optional[QueueManager] = None
+_domain_validator: Optional[DomainValidator] = None
+
+async def get_queue_manager(
     storage: StorageService = Depends(get_storage_service),
     scraper: ScraperService = Depends(get_scraper_service)
-) -> QueueService:
-    return QueueService(storage, scraper)
\ No newline at end of file
+) -> QueueManager:
+    global _queue_manager
+    if _queue_manager is None:
+        _queue_manager = QueueManager(storage, scraper)
+    return _queue_manager
+
+async def get_batch_service(
+    storage: StorageService = Depends(get_storage_service),
+    queue_manager: QueueManager = Depends(get_queue_manager)
+) -> BatchService:
+    global _domain_validator
+    if _domain_validator is None:
+        _domain_validator = DomainValidator()
+    return BatchService(storage, queue_manager, _domain_validator)
\ No newline at end of file
@@ -8,4 +8,12 @@ class ConfigGenerationError(ScrapingException):
 
 class ContentExtractionError(ScrapingException):
     """Raised when content extraction fails"""
+    pass
+
+class ContentRejectedError(ScrapingException):
+    """Raised when a response is aborted for its type or size"""
+    pass
+
+class QueueFullError(ScrapingException):
+    """Raised when a task is submitted to a full queue"""
     pass
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseSettings, HttpUrl
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
 class Settings(BaseSettings):
@@ -13,15 +13,68 @@ class Settings(BaseSettings):
     CRAWL4AI_API_KEY: str
     MAX_CONCURRENT_TASKS: int = 10
     TASK_TIMEOUT: int = 300
+    WORKER_MAX_TASKS: int = 200  # Tasks before a worker restarts itself as a leak guard; 0 = never
+    
+    # Fetch Settings
+    FETCH_CONCURRENCY: int = 200
+    FETCH_MAX_CONNECTIONS: int = 200
+    FETCH_MAX_CONNECTIONS_PER_HOST: int = 8
+    FETCH_KEEPALIVE_TIMEOUT: int = 30
+    FETCH_MAX_BYTES: int = 5 * 1024 * 1024
+    FETCH_ALLOWED_CONTENT_TYPES: List[str] = ["text/html", "application/xhtml+xml"]
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_DIR: Path = Path("cache/http")
+    HTTP_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    
+    # Headless Browser Settings
+    BROWSER_POOL_SIZE: int = 4
+    BROWSER_MAX_PAGES: int = 100
+    BROWSER_ACQUIRE_TIMEOUT: int = 60
+    HEADLESS_RENDER_MODE: str = "pool"  # Options: pool, contexts
+    CONTEXT_BROWSERS: int = 2
+    MAX_TABS_PER_BROWSER: int = 20
+    
+    # Fetch Mode Settings
+    DEFAULT_FETCH_MODE: str = "auto"  # Options: static, headless, auto
+    REQUIRED_FIELDS: List[str] = ["title", "content"]
+    FETCH_MODE_WINDOW: int = 20
+    FETCH_MODE_MIN_SAMPLES: int = 5
+    FETCH_MODE_STATIC_SUCCESS_THRESHOLD: float = 0.5
+    FETCH_MODE_PROBE_INTERVAL: int = 20
+    
+    # Parser Settings
+    PARSER_BACKEND: str = "lxml"  # Options: bs4, lxml, selectolax
+    EXTRACTION_WORKERS: Optional[int] = None  # Process pool size; None = CPU count, 0 = inline
+    INCREMENTAL_PARSE: bool = False  # Extract while downloading; stops once all fields match and media rules are done
+    STRUCTURED_DATA: bool = True  # Take fields from JSON-LD/OpenGraph before running selectors
+    INFERENCE_MIN_CONFIDENCE: float = 0.7  # Below this, new configs are generated by the LLM
     
     # Storage Settings
     CONFIG_DIR: Path = Path("configs")
+    CONFIG_STORE: str = "file"  # Options: file, sqlite, redis
+    CONFIG_DB_PATH: Optional[Path] = None  # SQLite store; defaults to CONFIG_DIR/configs.sqlite3
+    CONFIG_PRELOAD: bool = True  # Parse all stored configs into the cache at startup
     STORAGE_TYPE: str = "memory"  # Options: memory, redis, file
     REDIS_URL: Optional[str] = None
+    CONFIG_LEASE_TTL: int = 120  # Seconds one worker may hold a domain's config generation
+    CONFIG_GENERATION_WAIT: int = 180  # Seconds other workers wait before generating themselves
+    CONFIG_CACHE_SIZE: int = 10000  # Parsed domain configs kept in memory
+    CONFIG_CACHE_CHECK_INTERVAL: float = 1.0  # Seconds between config file mtime checks
+    CONFIG_UPDATES_CHANNEL: str = "config-updates"  # Redis pub/sub channel for config changes
     
     # Task Settings
     MAX_RETRIES: int = 3
     RETRY_DELAY: int = 60
+    RETRY_MAX_DELAY: int = 900  # Upper bound on one backoff delay, before jitter
+    BATCH_MAX_SIZE: int = 1000000  # URLs accepted in one batch submission
+    BATCH_CHUNK_SIZE: int = 500  # Batch items validated and written to storage together
+    VALIDATION_CONCURRENCY: int = 20  # Domain reachability probes running at once
+    VALIDATION_CACHE_TTL: int = 3600  # Seconds a domain's probe result is reused
+    VALIDATION_CACHE_SIZE: int = 100000  # Domains whose probe results are kept
+    RESULT_CACHE_TTL: int = 900  # Seconds a completed scrape is served to repeat submissions; 0 disables
+    RESULT_CACHE_SIZE: int = 10000  # Scrape results kept in memory
+    QUEUE_MAX_SIZE: int = 10000  # Tasks waiting in the in-process queue before submissions are rejected
+    DOMAIN_MAX_CONCURRENCY: int = 2  # Tasks for one domain running at once in the in-process queue
     
     # Proxy Settings
     USE_PROXIES: bool = False
@@ -26,4 +26,13 @@ class DomainConfig(BaseModel):
     proxy_config: Optional[Dict] = None
     retry_count: int = Field(default=3, ge=1, le=5)
     extraction_rules: Dict[str, ExtractionRule]
-    media_rules: MediaRules
\ No newline at end of file
+    media_rules: MediaRules
+    block_resources: List[str] = Field(default_factory=list)
+    wait_for: Optional[Dict] = None
+    fetch_mode: Optional[str] = None
+    required_fields: Optional[List[str]] = None
+    max_bytes: Optional[int] = None
+    parser: Optional[str] = None
+    incremental_parse: Optional[bool] = None
+    structured_data: Optional[bool] = None
+    confidence: Optional[Dict[str, float]] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 from enum import Enum
 
@@ -30,6 +30,15 @@ class DomainConfig:
     retry_count: int = 3
     extraction_rules: Dict[str, ExtractionRule]
     media_rules: MediaExtraction
+    block_resources: List[str] = field(default_factory=list)
+    wait_for: Optional[Dict] = None
+    fetch_mode: Optional[str] = None
+    required_fields: Optional[List[str]] = None
+    max_bytes: Optional[int] = None
+    parser: Optional[str] = None
+    incremental_parse: Optional[bool] = None
+    structured_data: Optional[bool] = None
+    confidence: Optional[Dict[str, float]] = None
     
     def to_dict(self) -> dict:
         return {
@@ -40,6 +49,15 @@ class DomainConfig:
             "user_agent": self.user_agent,
             "proxy_config": self.proxy_config,
             "retry_count": self.retry_count,
+            "block_resources": self.block_resources,
+            "wait_for": self.wait_for,
+            "fetch_mode": self.fetch_mode,
+            "required_fields": self.required_fields,
+            "max_bytes": self.max_bytes,
+            "parser": self.parser,
+            "incremental_parse": self.incremental_parse,
+            "structured_data": self.structured_data,
+            "confidence": self.confidence,
             "extraction_rules": {
                 k: {
                     "selector": v.selector,
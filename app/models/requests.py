@@ -1,10 +1,10 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 
 class ScrapeRequest(BaseModel):
     url: HttpUrl
     headers: Optional[Dict[str, str]] = None
-    options: Optional[Dict[str, any]] = Field(
+    options: Optional[Dict[str, Any]] = Field(
         default_factory=lambda: {
             "max_retries": 3,
             "timeout": 30,
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from .task import TaskStatus
 
@@ -7,6 +7,7 @@ class ScrapeResponse(BaseModel):
     task_id: str
     status: str = "queued"
     message: str
+    cached: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class ScrapingResult(BaseModel):
@@ -29,4 +30,24 @@ class TaskStatusResponse(BaseModel):
     result: Optional[ScrapingResult] = None
     error: Optional[str] = None
     retry_count: int = 0
-    schema_regenerated: bool = False
\ No newline at end of file
+    schema_regenerated: bool = False
+    cached: bool = False
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    accepted: int
+    rejected: int = 0
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
+    message: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    total: int
+    rejected: int = 0
+    queued: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+    done: bool = False
+    created_at: datetime
\ No newline at end of file
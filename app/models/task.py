@@ -1,5 +1,5 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
 
@@ -21,4 +21,13 @@ class TaskInfo(BaseModel):
     result: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
     retry_count: int = 0
-    schema_regenerated: bool = False
\ No newline at end of file
+    schema_regenerated: bool = False
+    batch_id: Optional[str] = None
+    cached: bool = False
+
+class BatchInfo(BaseModel):
+    batch_id: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    total: int = 0
+    rejected: int = 0
+    errors: List[Dict[str, Any]] = Field(default_factory=list)
\ No newline at end of file
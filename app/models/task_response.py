@@ -17,4 +17,5 @@ class TaskResponse(BaseModel):
     updated_at: datetime
     completed_at: Optional[datetime] = None
     result: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
\ No newline at end of file
+    error: Optional[str] = None
+    cached: bool = False
\ No newline at end of file
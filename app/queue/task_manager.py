@@ -2,10 +2,10 @@ import logging
 from typing import Dict, Optional
 from celery import Celery
 from datetime import datetime
-import asyncio
-from functools import wraps
 
 from ..core.config import Config
+from ..core.settings import settings
+from .worker_runtime import async_to_sync, worker_runtime
 from ..models.task import TaskResponse, TaskStatus
 from ..services.schema_generator import SchemaGenerator
 from ..services.content_scraper import ContentScraper
@@ -14,12 +14,8 @@ from crawl4ai import Crawler
 
 logger = logging.getLogger(__name__)
 
-def async_to_sync(f):
-    """Decorator to run async functions in celery tasks"""
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
-    return wrapper
+TASK_TIME_LIMIT = 3600  # 1 hour max
+TASK_SOFT_TIME_LIMIT = 1800  # 30 minutes soft limit
 
 celery_app = Celery('scraper', broker=Config.REDIS_URL)
 celery_app.conf.update(
@@ -29,10 +25,14 @@ celery_app.conf.update(
     timezone='UTC',
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=3600,  # 1 hour max
-    task_soft_time_limit=1800,  # 30 minutes soft limit
-    worker_max_tasks_per_child=200,
-    worker_prefetch_multiplier=1,  # One task at a time
+    task_time_limit=TASK_TIME_LIMIT,
+    task_soft_time_limit=TASK_SOFT_TIME_LIMIT,
+    worker_prefetch_multiplier=1,
+    # Threads share the worker's persistent event loop, which runs their tasks concurrently.
+    # The threads pool ignores the time limits above and worker_max_tasks_per_child;
+    # async_to_sync and the worker runtime (WORKER_MAX_TASKS) enforce them instead.
+    worker_pool='threads',
+    worker_concurrency=settings.MAX_CONCURRENT_TASKS,
     task_routes={
         'scraper.process_task': {'queue': 'scraping'}
     }
@@ -42,8 +42,11 @@ class TaskManager:
     def __init__(self):
         self.crawler = Crawler(api_key=Config.CRAWL4AI_API_KEY)
         self.schema_generator = SchemaGenerator(Config.RULES_DIR, self.crawler)
-        self.content_scraper = ContentScraper()
+        self.content_scraper = ContentScraper(config_cache=self.schema_generator.config_cache)
         self.tasks: Dict[str, TaskResponse] = {}
+        worker_runtime.on_shutdown(self.content_scraper.close)
+        # Warm the browser pool in the background so the first render skips the launch
+        worker_runtime.submit(self.content_scraper.start())
         
         # Initialize task cleanup
         self._setup_task_cleanup()
@@ -76,7 +79,7 @@ class TaskManager:
         )
     
     @celery_app.task(bind=True, max_retries=3)
-    @async_to_sync
+    @async_to_sync(timeout=TASK_SOFT_TIME_LIMIT, hard_timeout=TASK_TIME_LIMIT)
     async def process_task(self, task_id: str, url: str,
                           headers: Optional[Dict] = None,
                           timeout: int = 30) -> None:
@@ -0,0 +1,173 @@
+import asyncio
+import concurrent.futures
+import logging
+import os
+import signal
+import threading
+from functools import wraps
+from typing import Any, Awaitable, Callable, Coroutine, List, Optional
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from celery.signals import worker_process_shutdown, worker_shutdown
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class WorkerRuntime:
+    """
+    One long-lived event loop per worker process.
+
+    The loop runs in a background thread and Celery tasks submit their
+    coroutines to it, so aiohttp sessions, Redis clients, browser pools
+    and extraction pools created by one task are reused by the next.
+    With the threads pool (``--pool threads --concurrency N``) every
+    Celery thread blocks only on its own task's future while the loop
+    interleaves all of them; at most ``max_concurrency``
+    (MAX_CONCURRENT_TASKS) run at once. The loop is recreated in forked
+    children, and shutdown hooks run when the worker stops.
+
+    The threads pool enforces neither Celery time limits nor
+    ``worker_max_tasks_per_child``, so the runtime does. ``run`` cancels a
+    task at its soft limit; one still running at the hard limit has
+    wedged the loop, and the worker restarts. So does a worker that has
+    run ``max_tasks`` (WORKER_MAX_TASKS) tasks. A restart is a warm
+    shutdown: running tasks finish and the process supervisor starts a
+    fresh worker, as the prefork pool would replace a child.
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_tasks: Optional[int] = None):
+        self.max_concurrency = max_concurrency or settings.MAX_CONCURRENT_TASKS
+        self.max_tasks = settings.WORKER_MAX_TASKS if max_tasks is None else max_tasks
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._shutdown_hooks: List[Callable[[], Awaitable[Any]]] = []
+        self.in_flight = 0
+        self.tasks_run = 0
+        self._restarting = False
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop and self._pid == os.getpid() and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run_loop, args=(loop, ready),
+                                      name="worker-event-loop", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            logger.info(f"Started worker event loop in process {self._pid}")
+            return loop
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None,
+            hard_timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the worker loop and block until it finishes.
+        After ``timeout`` seconds the coroutine is cancelled, releasing its
+        concurrency slot, and SoftTimeLimitExceeded is raised. If it is
+        still running ``hard_timeout`` seconds after it started, the
+        worker restarts and TimeLimitExceeded is raised instead.
+        """
+        loop = self._ensure_loop()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("WorkerRuntime.run called from the worker loop itself; await instead")
+        finished = threading.Event()
+        future = asyncio.run_coroutine_threadsafe(self._limited(coro, finished), loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            if hard_timeout is not None and not finished.wait(max(hard_timeout - timeout, 0)):
+                # Cancellation never landed: the loop is blocked or the task ignores it
+                self.restart(f"a task outlived its {hard_timeout}s hard time limit")
+                raise TimeLimitExceeded(f"Task exceeded its {hard_timeout}s hard time limit")
+            raise SoftTimeLimitExceeded(f"Task exceeded its {timeout}s time limit")
+        except BaseException:
+            # Worker shutdown or an interrupt; stop the coroutine too
+            future.cancel()
+            raise
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine on the worker loop without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    async def _limited(self, coro: Coroutine, finished: threading.Event) -> Any:
+        try:
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    return await coro
+                finally:
+                    self.in_flight -= 1
+                    self.tasks_run += 1
+                    if self.max_tasks and self.tasks_run >= self.max_tasks:
+                        self.restart(f"it ran {self.tasks_run} tasks")
+        finally:
+            finished.set()
+
+    def restart(self, reason: str):
+        """Ask Celery for a warm shutdown so the supervisor starts a fresh worker"""
+        with self._lock:
+            if self._restarting:
+                return
+            self._restarting = True
+        logger.warning(f"Restarting worker process {os.getpid()}: {reason}")
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    def on_shutdown(self, hook: Callable[[], Awaitable[Any]]):
+        """Register an async cleanup to run before the loop stops"""
+        self._shutdown_hooks.append(hook)
+
+    def shutdown(self, timeout: float = 30):
+        """Run shutdown hooks and stop the loop"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            if loop is None or self._pid != os.getpid() or not thread.is_alive():
+                return
+            self._loop = None
+
+        async def close():
+            for hook in reversed(self._shutdown_hooks):
+                try:
+                    await hook()
+                except Exception as e:
+                    logger.error(f"Worker shutdown hook failed: {str(e)}")
+
+        try:
+            asyncio.run_coroutine_threadsafe(close(), loop).result(timeout)
+        except Exception as e:
+            logger.error(f"Worker loop shutdown incomplete: {str(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+        self._shutdown_hooks = []
+        logger.info("Stopped worker event loop")
+
+worker_runtime = WorkerRuntime()
+
+def async_to_sync(timeout: Optional[float] = None, hard_timeout: Optional[float] = None):
+    """
+    Decorator to run async Celery tasks on the worker's persistent event
+    loop, cancelling them after ``timeout`` seconds (the soft time limit)
+    and restarting the worker if one outlives ``hard_timeout``
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            return worker_runtime.run(f(*args, **kwargs), timeout, hard_timeout)
+        return wrapper
+    return decorator
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_runtime(**kwargs):
+    worker_runtime.shutdown()
@@ -2,12 +2,12 @@ import logging
 from typing import Dict, Optional, Any
 from celery import Celery
 from datetime import datetime, timedelta
-from functools import wraps
-import asyncio
 import uuid
 from crawl4ai import Crawler
 
 from ..core.config import Config
+from ..core.settings import settings
+from .queue.worker_runtime import async_to_sync, worker_runtime
 from ..models.task_response import TaskResponse, TaskStatus
 from ..scrapers.schema_generator import SchemaGenerator
 from ..scrapers.content_scraper import ContentScraper
@@ -19,13 +19,6 @@ from ..core.exceptions import (
 
 logger = logging.getLogger(__name__)
 
-def async_to_sync(f):
-    """Decorator to handle async functions in Celery tasks"""
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
-    return wrapper
-
 # Configure Celery
 celery_app = Celery('scraper', broker=Config.REDIS_URL)
 celery_app.conf.update(
@@ -36,7 +29,12 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     task_time_limit=Config.TASK_TIMEOUT,
-    worker_prefetch_multiplier=1
+    worker_prefetch_multiplier=1,
+    # Threads share the worker's persistent event loop, which runs their tasks concurrently.
+    # The threads pool ignores task_time_limit and worker_max_tasks_per_child; async_to_sync
+    # cancels tasks at the limit and the worker runtime restarts after WORKER_MAX_TASKS tasks.
+    worker_pool='threads',
+    worker_concurrency=settings.MAX_CONCURRENT_TASKS
 )
 
 class QueueManager:
@@ -44,8 +42,11 @@ class QueueManager:
         """Initialize QueueManager with required services"""
         self.crawler = Crawler(api_key=Config.CRAWL4AI_API_KEY)
         self.schema_generator = SchemaGenerator(Config.RULES_DIR, self.crawler)
-        self.content_scraper = ContentScraper()
+        self.content_scraper = ContentScraper(config_cache=self.schema_generator.config_cache)
         self.tasks: Dict[str, TaskResponse] = {}
+        worker_runtime.on_shutdown(self.content_scraper.close)
+        # Warm the browser pool in the background so the first render skips the launch
+        worker_runtime.submit(self.content_scraper.start())
         
         # Setup periodic cleanup
         self._setup_task_cleanup()
@@ -74,7 +75,7 @@ class QueueManager:
         return self.tasks.get(task_id)
 
     @celery_app.task(bind=True, max_retries=Config.MAX_RETRIES)
-    @async_to_sync
+    @async_to_sync(timeout=Config.TASK_TIMEOUT)
     async def process_task(self, task_id: str, url: str,
                           headers: Optional[Dict] = None,
                           timeout: int = Config.DEFAULT_TIMEOUT) -> None:
@@ -131,7 +132,7 @@ class QueueManager:
     async def _get_or_generate_config(self, url: str) -> Dict:
         """Get existing config or generate new one"""
         try:
-            config = self.schema_generator.load_config(url)
+            config = await self.schema_generator.load_config(url)
             if not config:
                 config = await self.schema_generator.generate_config(url)
                 logger.info(f"Generated new config for {url}")
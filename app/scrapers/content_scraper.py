@@ -1,112 +1,136 @@
 from typing import Dict, Optional
 import logging
-from bs4 import BeautifulSoup
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from urllib.parse import urlparse
 from ..models.domain_config import DomainConfig, SelectorType
 from ..models.scraped_content import ScrapedContent
+from ..services.fetcher import AsyncFetcher, proxy_for_url
+from ..services.browser_pool import BrowserPool
+from ..services.context_renderer import ContextRenderer
+from ..services.wait_conditions import build_wait_plan
+from ..services.fetch_mode import FetchModeTracker, missing_fields, persist_fetch_mode, resolve_fetch_mode
+from ..services.config_cache import ConfigCache
+from ..services.extraction_executor import ExtractionExecutor, extraction_executor as shared_extraction_executor
+from ..services.extraction_plan import extraction_plans
+from ..services.incremental import StreamingExtractor, stream_extract
+from ..core.settings import settings
 
 logger = logging.getLogger(__name__)
 
 class ContentScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, fetcher: Optional[AsyncFetcher] = None,
+                 browser_pool: Optional[BrowserPool] = None,
+                 context_renderer: Optional[ContextRenderer] = None,
+                 fetch_mode_tracker: Optional[FetchModeTracker] = None,
+                 extraction_executor: Optional[ExtractionExecutor] = None,
+                 config_cache: Optional[ConfigCache] = None):
+        """``config_cache`` is where learned fetch modes are persisted"""
+        self.fetcher = fetcher or AsyncFetcher()
+        self.browser_pool = browser_pool or BrowserPool()
+        self.context_renderer = context_renderer or ContextRenderer()
+        self.fetch_mode_tracker = fetch_mode_tracker or FetchModeTracker(
+            on_flip=persist_fetch_mode(config_cache) if config_cache else None
+        )
+        self.extraction_executor = extraction_executor or shared_extraction_executor
     
-    def _get_headless_browser(self) -> webdriver.Chrome:
-        """Initialize headless Chrome browser"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        return webdriver.Chrome(options=chrome_options)
-    
-    def _extract_with_selector(self, soup: BeautifulSoup, rule: dict) -> Optional[str]:
-        """Extract content using specified selector"""
+    async def start(self):
+        """Pre-launch the headless renderer selected by HEADLESS_RENDER_MODE"""
         try:
-            if rule.selector_type == SelectorType.CSS:
-                elements = soup.select(rule.selector)
-            else:  # XPath
-                elements = soup.find_all(xpath=rule.selector)
-            
-            if not elements:
-                return None
-            
-            if rule.attribute:
-                return elements[0].get(rule.attribute)
-            return elements[0].get_text(strip=True)
-            
+            if settings.HEADLESS_RENDER_MODE == "contexts":
+                await self.context_renderer.start()
+            else:
+                await self.browser_pool.start()
         except Exception as e:
-            logger.error(f"Error extracting with selector {rule.selector}: {str(e)}")
-            return None
+            # Renders launch browsers on demand, so a cold start is not fatal
+            logger.error(f"Failed to warm headless renderer: {str(e)}")
     
-    def scrape(self, url: str, config: DomainConfig) -> ScrapedContent:
+    async def close(self):
+        """Release pooled HTTP connections and browsers"""
+        await self.fetcher.close()
+        await self.browser_pool.close()
+        await self.context_renderer.close()
+        await self.fetch_mode_tracker.close()
+        self.extraction_executor.close()
+    
+    async def _get_headless_content(self, url: str, config: DomainConfig) -> str:
+        """Render page in an isolated context or a warm pooled browser"""
+        wait_plan = build_wait_plan(config.wait_for, config.extraction_rules)
+        if settings.HEADLESS_RENDER_MODE == "contexts":
+            return await self.context_renderer.render(
+                url,
+                config.timeout,
+                user_agent=config.user_agent,
+                block_resources=config.block_resources,
+                wait_plan=wait_plan
+            )
+        return await self.browser_pool.render(
+            url,
+            config.timeout,
+            block_resources=config.block_resources,
+            wait_plan=wait_plan
+        )
+    
+    async def scrape(self, url: str, config: DomainConfig) -> ScrapedContent:
         """Scrape content using provided configuration"""
         try:
-            # Setup session with custom user agent if specified
-            if config.user_agent:
-                self.session.headers.update({"User-Agent": config.user_agent})
-            
-            # Get page content
-            if config.use_headless:
-                driver = self._get_headless_browser()
-                driver.get(url)
-                html = driver.page_source
-                driver.quit()
-            else:
-                response = self.session.get(
-                    url,
-                    timeout=config.timeout,
-                    proxies=config.proxy_config if config.use_proxy else None
-                )
-                html = response.text
+            mode = resolve_fetch_mode(config.fetch_mode, config.use_headless)
+            if mode != "auto":
+                return await self._scrape_page(url, config, use_headless=(mode == "headless"))
             
-            # Parse HTML
-            soup = BeautifulSoup(html, 'html.parser')
+            # Static first, escalate to headless when required fields are missing
+            # Learned per host: subdomains sharing a config may render differently
+            host = urlparse(url).netloc
+            required_fields = config.required_fields or settings.REQUIRED_FIELDS
+            if self.fetch_mode_tracker.should_try_static(host, config.use_headless):
+                try:
+                    result = await self._scrape_page(url, config, use_headless=False)
+                    missing = missing_fields(result, required_fields)
+                except Exception as e:
+                    logger.warning(f"Static fetch failed for {url}: {str(e)}")
+                    missing = list(required_fields)
+                
+                self.fetch_mode_tracker.record_static(host, not missing)
+                if not missing:
+                    return result
+                logger.info(f"Static fetch of {url} missed {missing}, escalating to headless")
             
-            # Extract content using rules
-            content = {}
-            for field, rule in config.extraction_rules.items():
-                content[field] = self._extract_with_selector(soup, rule)
-            
-            # Extract media
-            media_files = {
-                "images": self._extract_media(soup, config.media_rules.images),
-                "videos": self._extract_media(soup, config.media_rules.videos),
-                "embeds": self._extract_media(soup, config.media_rules.embeds)
-            }
-            
-            return ScrapedContent(
-                title=content.get("title"),
-                content=content.get("content"),
-                author=content.get("author"),
-                publish_date=content.get("publish_date"),
-                language=content.get("language"),
-                categories=content.get("categories", []),
-                media_files=media_files
-            )
+            return await self._scrape_page(url, config, use_headless=True)
             
         except Exception as e:
             logger.error(f"Error scraping {url}: {str(e)}")
             raise
     
-    def _extract_media(self, soup: BeautifulSoup, rule: dict) -> list:
-        """Extract media elements using specified rule"""
-        try:
-            if rule.selector_type == SelectorType.CSS:
-                elements = soup.select(rule.selector)
-            else:  # XPath
-                elements = soup.find_all(xpath=rule.selector)
-            
-            urls = []
-            for element in elements:
-                if rule.attribute:
-                    url = element.get(rule.attribute)
-                    if url:
-                        urls.append(url)
-            
-            return urls
-            
-        except Exception as e:
-            logger.error(f"Error extracting media: {str(e)}")
-            return []
\ No newline at end of file
+    async def _scrape_page(self, url: str, config: DomainConfig,
+                           use_headless: bool) -> ScrapedContent:
+        """Fetch page on the given path and extract it with the config rules"""
+        # Send custom user agent if specified
+        headers = {"User-Agent": config.user_agent} if config.user_agent else None
+        
+        # Get page content
+        if use_headless:
+            html = await self._get_headless_content(url, config)
+            encoding = None
+        else:
+            fetch_kwargs = dict(
+                headers=headers,
+                timeout=config.timeout,
+                proxy=proxy_for_url(url, config.proxy_config) if config.use_proxy else None,
+                max_bytes=config.max_bytes
+            )
+            incremental = config.incremental_parse
+            if incremental is None:
+                incremental = settings.INCREMENTAL_PARSE
+            plan = extraction_plans.for_config(config) if incremental else None
+            if plan and StreamingExtractor.supports(plan):
+                # Extract while downloading and stop once every rule is done
+                structured = config.structured_data
+                if structured is None:
+                    structured = settings.STRUCTURED_DATA
+                return ScrapedContent(**await stream_extract(
+                    self.fetcher, url, plan, structured=structured, **fetch_kwargs
+                ))
+            response = await self.fetcher.fetch_response(url, **fetch_kwargs)
+            html, encoding = response.body, response.encoding
+        
+        # Parse and extract in the process pool so the event loop stays responsive
+        result = await self.extraction_executor.extract(html, config.to_dict(), encoding)
+        return ScrapedContent(**result)
@@ -0,0 +1,192 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+from pydantic import ValidationError
+from ..models.requests import ScrapeRequest
+from ..models.task import BatchInfo, TaskStatus
+from ..services.fetcher import AsyncFetcher
+from ..services.queue import QueueManager
+from ..services.storage_service import StorageService
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-item errors kept on a batch; the rest are only counted
+MAX_BATCH_ERRORS = 100
+
+async def ndjson_items(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """(line number, decoded JSON) for each non-empty line of a streamed NDJSON body"""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, _decode_line(line)
+    if buffer.strip():
+        yield line_no + 1, _decode_line(buffer)
+
+def _decode_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {str(e)}")
+
+async def json_items(items: Iterable[Any]) -> AsyncIterator[Tuple[int, Any]]:
+    """(position, item) for the elements of a JSON array body"""
+    for position, item in enumerate(items, 1):
+        yield position, item
+
+class DomainValidator:
+    """
+    Reachability checks for batch submissions, one per domain instead
+    of one per URL. The first URL seen for a domain is probed and the
+    outcome applies to every URL of that domain for ``ttl`` seconds, so
+    one instance is shared by the process. A domain is unreachable when
+    the probe fails to connect or gets a server error; any other status,
+    such as a 404 or a 403 for the probed URL, says nothing about the
+    rest of the domain. Concurrent checks of a domain share one probe,
+    and at most ``concurrency`` probes run at once. Results are kept in
+    expiry order, so expired ones are dropped from the front as new ones
+    come in, and at most ``max_entries`` are kept.
+    """
+
+    def __init__(self, fetcher: Optional[AsyncFetcher] = None, ttl: Optional[float] = None,
+                 concurrency: Optional[int] = None, max_entries: Optional[int] = None):
+        self.fetcher = fetcher or AsyncFetcher()
+        self.ttl = ttl if ttl is not None else settings.VALIDATION_CACHE_TTL
+        self.max_entries = max_entries or settings.VALIDATION_CACHE_SIZE
+        self._semaphore = asyncio.Semaphore(concurrency or settings.VALIDATION_CONCURRENCY)
+        self._results: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def check(self, url: str) -> Optional[str]:
+        """Why a URL's domain cannot be scraped, or None if it can"""
+        domain = urlparse(url).netloc
+        cached = self._results.get(domain)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            cached = self._results.get(domain)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+            async with self._semaphore:
+                try:
+                    error = None
+                    status = await self.fetcher.probe(url)
+                    if status >= 500:
+                        error = f"{domain} answered with status {status}"
+                except Exception as e:
+                    error = f"Failed to connect to {domain}: {str(e) or type(e).__name__}"
+            self._remember(domain, error)
+        self._locks.pop(domain, None)
+        return error
+
+    def _remember(self, domain: str, error: Optional[str]):
+        now = time.monotonic()
+        self._results.pop(domain, None)
+        self._results[domain] = (error, now + self.ttl)
+        while self._results and (len(self._results) > self.max_entries
+                                 or next(iter(self._results.values()))[1] <= now):
+            self._results.popitem(last=False)
+
+class BatchService:
+    """
+    Creates the tasks of a batch submission. Items are read as a stream
+    and handled in chunks of BATCH_CHUNK_SIZE: each chunk is validated
+    per domain and handed to the shared QueueManager, which stores it in
+    one pipelined round trip and runs it on its worker pool. Items that
+    do not fit in the queue are rejected.
+    """
+
+    def __init__(self, storage: StorageService, queue_manager: QueueManager,
+                 validator: Optional[DomainValidator] = None):
+        self.storage = storage
+        self.queue_manager = queue_manager
+        self.validator = validator or DomainValidator()
+
+    async def create_batch(self, items: AsyncIterator[Tuple[int, Any]]) -> BatchInfo:
+        """Validate a batch and queue its tasks"""
+        batch = BatchInfo(batch_id=str(uuid.uuid4()))
+        chunk: List[Tuple[int, ScrapeRequest]] = []
+
+        async for position, item in items:
+            request = self._parse_item(batch, position, item)
+            if request is None:
+                continue
+            if batch.total + len(chunk) >= settings.BATCH_MAX_SIZE:
+                self._reject(batch, position, f"Batch is limited to {settings.BATCH_MAX_SIZE} URLs")
+                continue
+            chunk.append((position, request))
+            if len(chunk) >= settings.BATCH_CHUNK_SIZE:
+                await self._create_tasks(batch, chunk)
+                chunk = []
+        if chunk:
+            await self._create_tasks(batch, chunk)
+
+        await self.storage.save_batch(batch)
+        logger.info(f"Created batch {batch.batch_id}: {batch.total} tasks, {batch.rejected} rejected")
+        return batch
+
+    def _parse_item(self, batch: BatchInfo, position: int, item: Any) -> Optional[ScrapeRequest]:
+        if isinstance(item, Exception):
+            self._reject(batch, position, str(item))
+            return None
+        try:
+            if isinstance(item, str):
+                return ScrapeRequest(url=item)
+            return ScrapeRequest.parse_obj(item)
+        except ValidationError as e:
+            self._reject(batch, position, str(e))
+            return None
+
+    def _reject(self, batch: BatchInfo, position: int, error: str):
+        batch.rejected += 1
+        if len(batch.errors) < MAX_BATCH_ERRORS:
+            batch.errors.append({"item": position, "error": error})
+
+    async def _create_tasks(self, batch: BatchInfo, chunk: List[Tuple[int, ScrapeRequest]]):
+        errors = await asyncio.gather(*(self.validator.check(str(request.url)) for _, request in chunk))
+        accepted = []
+        for (position, request), error in zip(chunk, errors):
+            if error:
+                self._reject(batch, position, error)
+            else:
+                accepted.append((position, request))
+        if not accepted:
+            return
+
+        task_ids = await self.queue_manager.create_tasks(
+            [(str(request.url), request.headers, request.options) for _, request in accepted],
+            batch.batch_id
+        )
+        for (position, _), task_id in zip(accepted, task_ids):
+            if task_id is None:
+                self._reject(batch, position, "Task queue is full")
+            else:
+                batch.total += 1
+
+    async def get_progress(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Aggregate status counts of a batch's tasks"""
+        batch = await self.storage.get_batch(batch_id)
+        if not batch:
+            return None
+        counts = await self.storage.batch_progress(batch_id)
+        finished = counts.get(TaskStatus.COMPLETED.value, 0) + counts.get(TaskStatus.FAILED.value, 0)
+        return {
+            "batch_id": batch.batch_id,
+            "total": batch.total,
+            "rejected": batch.rejected,
+            **counts,
+            "done": finished >= batch.total,
+            "created_at": batch.created_at,
+        }
@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional, Set
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from .resource_blocking import ResourceStats, apply_selenium_blocking, resolve_block_categories, selenium_report
+from .wait_conditions import WaitPlan
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+def create_chrome_driver() -> webdriver.Chrome:
+    """Launch a headless Chrome instance"""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    # Return from get() at DOMContentLoaded; the page's WaitPlan decides when to snapshot
+    options.page_load_strategy = 'eager'
+    # Network events for the resource blocking report
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return webdriver.Chrome(options=options)
+
+class PooledBrowser:
+    """A warm browser together with its usage counters"""
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+        self.broken = False
+
+class BrowserPool:
+    """
+    Pool of pre-launched headless Chrome instances.
+
+    Browsers are checked out with ``acquire()`` and returned automatically.
+    Each one is health-checked on checkout and recycled after
+    ``max_pages`` renders or as soon as it stops responding, so callers
+    only ever pay browser boot time when a replacement is needed.
+    All blocking WebDriver calls run in worker threads.
+
+    A failed launch frees its slot and puts a ``None`` wake-up on the idle
+    queue, so a waiter blocked on the queue retries the launch instead of
+    sleeping until ``acquire_timeout``.
+    """
+
+    def __init__(self, size: Optional[int] = None, max_pages: Optional[int] = None,
+                 acquire_timeout: Optional[int] = None):
+        self.size = size or settings.BROWSER_POOL_SIZE
+        self.max_pages = max_pages or settings.BROWSER_MAX_PAGES
+        self.acquire_timeout = acquire_timeout or settings.BROWSER_ACQUIRE_TIMEOUT
+        self._idle: Optional[asyncio.Queue] = None
+        self._launched = 0
+        self._closed = False
+        self._background: Set[asyncio.Task] = set()
+        self.resource_stats = ResourceStats()
+
+    def _get_idle(self) -> asyncio.Queue:
+        """Lazily create the idle queue inside the running event loop"""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        return self._idle
+
+    async def start(self):
+        """Pre-launch browsers until the pool is full"""
+        idle = self._get_idle()
+        while self._launched < self.size:
+            self._launched += 1
+            try:
+                idle.put_nowait(await self._launch())
+            except Exception:
+                self._launch_failed()
+                raise
+        logger.info(f"Browser pool warmed with {self.size} instances")
+
+    async def _launch(self) -> PooledBrowser:
+        """Start a new browser in a worker thread"""
+        driver = await asyncio.to_thread(create_chrome_driver)
+        return PooledBrowser(driver)
+
+    async def _is_healthy(self, browser: PooledBrowser) -> bool:
+        """Check that the browser still answers WebDriver commands"""
+        try:
+            await asyncio.to_thread(browser.driver.execute_script, "return 1")
+            return True
+        except Exception:
+            return False
+
+    async def _quit(self, browser: PooledBrowser):
+        """Shut a browser down, ignoring errors from already dead processes"""
+        try:
+            await asyncio.to_thread(browser.driver.quit)
+        except Exception as e:
+            logger.warning(f"Error quitting browser: {str(e)}")
+
+    def _launch_failed(self):
+        """Free a failed launch's slot and wake a waiter to retry it"""
+        self._launched -= 1
+        self._get_idle().put_nowait(None)
+
+    async def _checkout(self) -> PooledBrowser:
+        """Take an idle browser, launching one if the pool is not full yet"""
+        idle = self._get_idle()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        while True:
+            if idle.empty() and self._launched < self.size:
+                self._launched += 1
+                try:
+                    return await self._launch()
+                except Exception:
+                    self._launch_failed()
+                    raise
+
+            browser = await asyncio.wait_for(idle.get(), timeout=deadline - loop.time())
+            if browser is None:
+                # A launch failed; its slot is free again
+                continue
+            if await self._is_healthy(browser):
+                return browser
+
+            logger.warning("Discarding unresponsive browser from pool")
+            await self._quit(browser)
+            self._launched -= 1
+
+    async def _reset(self, browser: PooledBrowser):
+        """Clear per-page state before the browser is reused"""
+        def reset():
+            browser.driver.delete_all_cookies()
+            browser.driver.get("about:blank")
+        await asyncio.to_thread(reset)
+
+    async def _checkin(self, browser: PooledBrowser):
+        """Return a browser to the pool or recycle it"""
+        browser.pages += 1
+        recycle = self._closed or browser.pages >= self.max_pages
+
+        if not recycle and browser.broken:
+            recycle = not await self._is_healthy(browser)
+
+        if not recycle:
+            try:
+                await self._reset(browser)
+            except Exception:
+                recycle = True
+
+        if recycle:
+            await self._quit(browser)
+            self._launched -= 1
+            if not self._closed:
+                self._replenish()
+            return
+
+        self._get_idle().put_nowait(browser)
+
+    def _replenish(self):
+        """Launch a replacement browser in the background"""
+        async def launch():
+            if self._launched >= self.size:
+                return
+            self._launched += 1
+            try:
+                browser = await self._launch()
+            except Exception as e:
+                self._launch_failed()
+                logger.error(f"Failed to launch replacement browser: {str(e)}")
+                return
+            if self._closed:
+                await self._quit(browser)
+                self._launched -= 1
+            else:
+                self._get_idle().put_nowait(browser)
+
+        task = asyncio.create_task(launch())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[webdriver.Chrome]:
+        """Check out a warm browser for the duration of the block"""
+        browser = await self._checkout()
+        try:
+            yield browser.driver
+        except WebDriverException:
+            browser.broken = True
+            raise
+        finally:
+            await self._checkin(browser)
+
+    async def render(self, url: str, timeout: int = 30,
+                     block_resources: Optional[List[str]] = None,
+                     wait_plan: Optional[WaitPlan] = None) -> str:
+        """
+        Render a page in a pooled browser and return the resulting HTML
+        """
+        categories = resolve_block_categories(block_resources)
+        async with self.acquire() as driver:
+            return await asyncio.to_thread(
+                self._render_sync, driver, url, timeout, categories, wait_plan or WaitPlan()
+            )
+
+    def _render_sync(self, driver: webdriver.Chrome, url: str, timeout: int,
+                     categories: Set[str], wait_plan: WaitPlan) -> str:
+        """Blocking part of render(), executed in a worker thread"""
+        started = time.perf_counter()
+        apply_selenium_blocking(driver, categories, url)
+        driver.set_page_load_timeout(timeout)
+
+        driver.get(url)
+        WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located(("tag name", "body"))
+        )
+        self._wait_until_ready(driver, url, timeout, wait_plan)
+
+        html = driver.page_source
+        report = selenium_report(driver, url, started, self.resource_stats)
+        logger.info(f"Rendered {url}: {report.to_dict()}")
+        return html
+
+    def _wait_until_ready(self, driver: webdriver.Chrome, url: str, timeout: int,
+                          wait_plan: WaitPlan):
+        """Poll the page until its wait condition holds"""
+        script = "return " + wait_plan.ready_script().strip()
+        try:
+            WebDriverWait(
+                driver,
+                wait_plan.timeout or timeout,
+                poll_frequency=wait_plan.poll_ms / 1000
+            ).until(lambda d: d.execute_script(script))
+        except TimeoutException:
+            if wait_plan.strategy == "load":
+                raise
+            logger.warning(
+                f"Wait condition {wait_plan.strategy} not met for {url}, "
+                "taking snapshot anyway"
+            )
+
+    async def close(self):
+        """Quit all idle browsers; checked-out ones are quit on return"""
+        self._closed = True
+        for task in list(self._background):
+            task.cancel()
+        if self._idle is None:
+            return
+        while not self._idle.empty():
+            browser = self._idle.get_nowait()
+            if browser is not None:
+                await self._quit(browser)
+                self._launched -= 1
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+import aioredis
+from .config_store import ConfigStore
+from .extraction_plan import extraction_plans
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_LISTENER_RETRY_DELAY = 30
+
+@dataclass
+class _Entry:
+    config: Any
+    version: Optional[int]
+    checked_at: float
+
+class ConfigCache:
+    """
+    Bounded LRU of parsed domain configs in front of a ConfigStore.
+
+    A hit within ``check_interval`` seconds of the last validation is a
+    plain dict lookup, for domains without a config too. After that the
+    store's version stamp (file mtime, row or hash version) is checked,
+    and the config is re-read and re-parsed only when it changed, so
+    edits are picked up without restarts. Store reads run in a thread so
+    a blocking backend (a file, SQLite or a Redis round trip) never
+    stalls the event loop. Writers call ``invalidate`` locally and
+    ``publish`` to notify other workers over Redis pub/sub; every cache
+    with a Redis URL listens on CONFIG_UPDATES_CHANNEL. Dropping a config
+    also drops its compiled extraction plan.
+    """
+
+    def __init__(self, store: ConfigStore, parse: Callable[[Dict[str, Any]], Any],
+                 max_entries: Optional[int] = None, check_interval: Optional[float] = None,
+                 redis_url: Optional[str] = None):
+        self.store = store
+        self.parse = parse
+        self.max_entries = max_entries or settings.CONFIG_CACHE_SIZE
+        self.check_interval = (check_interval if check_interval is not None
+                               else settings.CONFIG_CACHE_CHECK_INTERVAL)
+        self.redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._listener: Optional[asyncio.Task] = None
+        self._listener_failed_at = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, domain: str) -> Optional[Any]:
+        """Parsed config for the domain, or None when it has none"""
+        self._ensure_listener()
+        now = time.monotonic()
+        entry = self._entries.get(domain)
+        if entry and now - entry.checked_at < self.check_interval:
+            self._entries.move_to_end(domain)
+            self.hits += 1
+            return entry.config
+
+        version = await asyncio.to_thread(self.store.version, domain)
+        if version is None:
+            # Remember the miss too: resolution probes keys that mostly don't exist
+            if entry and entry.config is not None:
+                extraction_plans.invalidate(domain)
+            self._put(domain, None, None, now)
+            return None
+
+        if entry and entry.version == version:
+            entry.checked_at = now
+            self._entries.move_to_end(domain)
+            self.hits += 1
+            return entry.config
+
+        self.misses += 1
+        if entry:
+            # Rules may have changed; recompile on next use
+            extraction_plans.invalidate(domain)
+        stored = await asyncio.to_thread(self.store.get, domain)
+        if stored is None:
+            self.invalidate(domain)
+            return None
+        config = self.parse(stored.data)
+        self._put(domain, config, stored.version, now)
+        return config
+
+    def version(self, domain: str) -> Optional[int]:
+        """Version of the cached config, if the domain is cached"""
+        entry = self._entries.get(domain)
+        return entry.version if entry else None
+
+    async def preload(self) -> int:
+        """
+        Parse every stored config up front (up to the cache size); returns
+        the count. Reading and parsing run in a thread; domains looked up
+        meanwhile keep the fresher entry they loaded.
+        """
+        def load():
+            parsed = []
+            for domain, stored in self.store.load_all().items():
+                if len(parsed) >= self.max_entries:
+                    break
+                try:
+                    parsed.append((domain, self.parse(stored.data), stored.version))
+                except Exception as e:
+                    logger.error(f"Skipping invalid config for {domain}: {str(e)}")
+            return parsed
+
+        now = time.monotonic()
+        loaded = 0
+        for domain, config, version in await asyncio.to_thread(load):
+            if domain not in self._entries:
+                self._put(domain, config, version, now)
+                loaded += 1
+        logger.info(f"Preloaded {loaded} domain configs")
+        return loaded
+
+    def _put(self, domain: str, config: Any, version: Optional[int], now: float):
+        self._entries[domain] = _Entry(config, version, now)
+        self._entries.move_to_end(domain)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, domain: str):
+        """Forget a domain's config and compiled plan"""
+        self._entries.pop(domain, None)
+        extraction_plans.invalidate(domain)
+
+    async def publish(self, domain: str):
+        """Tell other workers a domain's config changed"""
+        if self.redis is None:
+            return
+        try:
+            await self.redis.publish(settings.CONFIG_UPDATES_CHANNEL, domain)
+        except Exception as e:
+            logger.warning(f"Failed to publish config update for {domain}: {str(e)}")
+
+    def _ensure_listener(self):
+        if self.redis is None or (self._listener and not self._listener.done()):
+            return
+        if time.monotonic() - self._listener_failed_at < _LISTENER_RETRY_DELAY:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self):
+        pubsub = self.redis.pubsub()
+        try:
+            await pubsub.subscribe(settings.CONFIG_UPDATES_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    logger.debug(f"Config for {message['data']} changed elsewhere, invalidating")
+                    self.invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Restarted by a later lookup; mtime checks still apply meanwhile
+            logger.warning(f"Config update listener stopped: {str(e)}")
+            self._listener_failed_at = time.monotonic()
+        finally:
+            await pubsub.close()
+
+    async def close(self):
+        """Stop listening for updates and close the Redis connection"""
+        if self._listener:
+            self._listener.cancel()
+            self._listener = None
+        if self.redis:
+            await self.redis.close()
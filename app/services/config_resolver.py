@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+from .config_cache import ConfigCache
+from .extraction_executor import ExtractionExecutor, extract_page, plan_schema, extraction_executor as shared_extraction_executor
+from ..core.settings import settings
+from ..utils.domains import registrable_domain
+
+logger = logging.getLogger(__name__)
+
+# Store keys of shared CMS templates are "cms:<name>"
+CMS_KEY_PREFIX = "cms:"
+
+CMS_MARKERS: Dict[str, List[str]] = {
+    "wordpress": [r'<meta[^>]+generator[^>]+wordpress', r'/wp-content/', r'/wp-includes/'],
+    "ghost": [r'<meta[^>]+generator[^>]+ghost', r'ghost-(?:portal|sdk)'],
+    "drupal": [r'<meta[^>]+generator[^>]+drupal', r'/sites/default/files/'],
+}
+
+def _rule(selector: str, attribute: Optional[str] = None) -> Dict[str, Any]:
+    return {"selector": selector, "selector_type": "css", "attribute": attribute, "post_process": None}
+
+# Defaults for CMS themes that keep their stock markup; a "cms:<name>" config in the store wins
+CMS_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "wordpress": {
+        "extraction_rules": {
+            "title": _rule("h1.entry-title, h1.wp-block-post-title, article h1"),
+            "content": _rule(".entry-content, .wp-block-post-content"),
+            "author": _rule(".author.vcard a, .entry-author a, a[rel=\"author\"]"),
+            "publish_date": _rule("time.entry-date", "datetime"),
+            "language": _rule("html[lang]", "lang"),
+            "categories": _rule(".cat-links a, a[rel~=\"category\"]"),
+        },
+        "media_rules": {
+            "images": _rule(".entry-content img", "src"),
+            "videos": _rule(".entry-content video source, .entry-content video", "src"),
+            "embeds": _rule(".entry-content iframe", "src"),
+        },
+    },
+    "ghost": {
+        "extraction_rules": {
+            "title": _rule("h1.gh-article-title, h1.article-title, article h1"),
+            "content": _rule(".gh-content, .post-content"),
+            "author": _rule(".gh-article-author-name a, .author-name a, .author-name"),
+            "publish_date": _rule("time.byline-meta-date, article time", "datetime"),
+            "language": _rule("html[lang]", "lang"),
+            "categories": _rule(".gh-article-tag, .post-card-primary-tag a, .article-tag a"),
+        },
+        "media_rules": {
+            "images": _rule(".gh-content img, .post-content img", "src"),
+            "videos": _rule(".gh-content video", "src"),
+            "embeds": _rule(".gh-content iframe, .post-content iframe", "src"),
+        },
+    },
+}
+
+def config_keys(host: str) -> List[str]:
+    """Store keys to try for a host, most specific first"""
+    keys = [host]
+    shared = registrable_domain(host)
+    if shared != host:
+        keys.append(shared)
+    return keys
+
+def detect_cms(markup: Union[str, bytes]) -> Optional[str]:
+    """Name of the CMS that generated a page, from the first 64KB of it"""
+    if isinstance(markup, bytes):
+        markup = markup[:65536].decode("utf-8", "replace")
+    head = markup[:65536].lower()
+    for name, patterns in CMS_MARKERS.items():
+        if any(re.search(pattern, head) for pattern in patterns):
+            return name
+    return None
+
+def config_validates(data: Dict[str, Any], markup: Union[str, bytes], encoding: Optional[str] = None,
+                     required_fields: Optional[List[str]] = None) -> bool:
+    """Whether a config (``to_dict`` form) extracts every required field from a page"""
+    required_fields = data.get("required_fields") or required_fields or settings.REQUIRED_FIELDS
+    try:
+        result, _ = extract_page(markup, encoding, plan_schema(data))
+    except Exception as e:
+        logger.warning(f"Validating config for {data.get('domain')} failed: {str(e)}")
+        return False
+    return all(result.get(name) for name in required_fields)
+
+class ConfigResolver:
+    """
+    Finds the config that applies to a host: its own (a per-host
+    override), then the registrable domain's, shared by every subdomain.
+    CMS templates are the last resort for domains without a config and
+    are only used after they validate on a sample page.
+    """
+
+    def __init__(self, cache: ConfigCache, extraction_executor: Optional[ExtractionExecutor] = None):
+        self.cache = cache
+        # Validating a template parses the sample page, so it runs in the extraction process pool
+        self.extraction_executor = extraction_executor or shared_extraction_executor
+
+    async def resolve(self, host: str) -> Optional[Tuple[str, Any]]:
+        """(store key, config) of the most specific config for a host"""
+        for key in config_keys(host):
+            config = await self.cache.get(key)
+            if config is not None:
+                return key, config
+        return None
+
+    async def version(self, host: str) -> Optional[Tuple[str, int]]:
+        """(store key, version) of the config that applies to a host, None if it has none yet"""
+        resolved = await self.resolve(host)
+        if resolved is None:
+            return None
+        return resolved[0], self.cache.version(resolved[0])
+
+    async def template(self, name: str) -> Optional[Dict[str, Any]]:
+        """A CMS template as raw config data, preferring one in the store"""
+        stored = await asyncio.to_thread(self.cache.store.get, f"{CMS_KEY_PREFIX}{name}")
+        if stored:
+            return stored.data
+        return CMS_TEMPLATES.get(name)
+
+    async def template_for(self, markup: Union[str, bytes], domain: str,
+                           encoding: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The page's CMS template as config data for ``domain``, if it validates"""
+        cms = detect_cms(markup)
+        template = await self.template(cms) if cms else None
+        if not template:
+            return None
+        data = dict(template, domain=domain)
+        if not await self.extraction_executor.run(config_validates, data, markup, encoding):
+            logger.info(f"{cms} template does not fit {domain}")
+            return None
+        logger.info(f"Using {cms} template for {domain}")
+        return data
@@ -1,39 +1,46 @@
 from pathlib import Path
-import json
+import asyncio
 import logging
 from typing import Optional, Dict
 from urllib.parse import urlparse
 from ..models.domain_config import DomainConfig
-from ..core.config import settings
+from .config_cache import ConfigCache
+from .config_resolver import ConfigResolver
+from .config_store import get_config_store
+from ..core.settings import settings
 
 logger = logging.getLogger(__name__)
 
 class ConfigService:
     def __init__(self):
         self.config_dir = Path(settings.CONFIG_DIR)
-        self.config_dir.mkdir(parents=True, exist_ok=True)
+        self.store = get_config_store(config_dir=self.config_dir)
+        self.cache = ConfigCache(self.store, self._parse_config, redis_url=settings.REDIS_URL)
+        self.resolver = ConfigResolver(self.cache)
+    
+    async def start(self):
+        """Fill the config cache from the store when CONFIG_PRELOAD is on"""
+        if settings.CONFIG_PRELOAD:
+            await self.cache.preload()
     
     def _get_domain(self, url: str) -> str:
         """Extract domain from URL"""
         return urlparse(url).netloc
     
-    def _get_config_path(self, domain: str) -> Path:
-        """Get path for domain config file"""
-        return self.config_dir / f"{domain}.json"
+    def _parse_config(self, data: Dict) -> DomainConfig:
+        # Plans are compiled where they are used: on the first scrape, in
+        # the scraper's process or in each extraction worker
+        return DomainConfig(**data)
     
     async def get_config(self, url: str) -> Optional[DomainConfig]:
         """
-        Get configuration for domain if it exists
+        Get the configuration that applies to the URL's host (its own or
+        its registrable domain's), from the in-memory cache unless the
+        stored version changed
         """
         try:
-            domain = self._get_domain(url)
-            config_path = self._get_config_path(domain)
-            
-            if config_path.exists():
-                config_data = json.loads(config_path.read_text())
-                return DomainConfig(**config_data)
-            
-            return None
+            resolved = await self.resolver.resolve(self._get_domain(url))
+            return resolved[1] if resolved else None
             
         except Exception as e:
             logger.error(f"Error loading config for {url}: {str(e)}")
@@ -45,11 +52,12 @@ class ConfigService:
         """
         try:
             domain = self._get_domain(url)
-            config_path = self._get_config_path(domain)
             
-            # Save config
-            config_path.write_text(json.dumps(config.dict(), indent=2))
-            logger.info(f"Saved configuration for domain: {domain}")
+            # Atomic upsert; bumps the domain's version
+            version = await asyncio.to_thread(self.store.put, domain, config.dict())
+            self.cache.invalidate(domain)
+            await self.cache.publish(domain)
+            logger.info(f"Saved configuration for domain: {domain} (version {version})")
             
         except Exception as e:
             logger.error(f"Error saving config for {url}: {str(e)}")
@@ -60,7 +68,7 @@ class ConfigService:
         List all domains with configurations
         """
         try:
-            return [f.stem for f in self.config_dir.glob("*.json")]
+            return await asyncio.to_thread(self.store.list_domains)
         except Exception as e:
             logger.error(f"Error listing domains: {str(e)}")
             return []
@@ -70,12 +78,12 @@ class ConfigService:
         Delete configuration for domain
         """
         try:
-            config_path = self._get_config_path(domain)
-            if config_path.exists():
-                config_path.unlink()
+            if await asyncio.to_thread(self.store.delete, domain):
+                self.cache.invalidate(domain)
+                await self.cache.publish(domain)
                 logger.info(f"Deleted configuration for domain: {domain}")
                 return True
             return False
         except Exception as e:
             logger.error(f"Error deleting config for {domain}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
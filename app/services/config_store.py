@@ -0,0 +1,285 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import redis
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CONFIG_STORES = ("file", "sqlite", "redis")
+
+@dataclass
+class StoredConfig:
+    """A domain config as stored, with the version it was written at"""
+    domain: str
+    data: Dict[str, Any]
+    version: int
+
+class ConfigStore:
+    """
+    Where domain configs live. Every write is an atomic upsert that
+    bumps the domain's version, and ``version`` is cheap enough to be
+    called on every cache validation.
+    """
+
+    def get(self, domain: str) -> Optional[StoredConfig]:
+        raise NotImplementedError
+
+    def version(self, domain: str) -> Optional[int]:
+        """Current version of a domain's config, None if it has none"""
+        raise NotImplementedError
+
+    def put(self, domain: str, data: Dict[str, Any]) -> int:
+        """Insert or replace a config; returns its new version"""
+        raise NotImplementedError
+
+    def put_many(self, configs: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Upsert many configs; returns how many were written"""
+        count = 0
+        for domain, data in configs:
+            self.put(domain, data)
+            count += 1
+        return count
+
+    def delete(self, domain: str) -> bool:
+        raise NotImplementedError
+
+    def list_domains(self) -> List[str]:
+        raise NotImplementedError
+
+    def load_all(self) -> Dict[str, StoredConfig]:
+        """Every stored config, for warming caches at startup"""
+        raise NotImplementedError
+
+class FileConfigStore(ConfigStore):
+    """
+    One ``{domain}.json`` per domain, the original layout. The version
+    is the file's mtime in nanoseconds; writes go through a temp file and
+    a rename so readers never see a partial config.
+    """
+
+    def __init__(self, config_dir: Union[str, Path]):
+        self.config_dir = Path(config_dir)
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, domain: str) -> Path:
+        return self.config_dir / f"{domain}.json"
+
+    def get(self, domain: str) -> Optional[StoredConfig]:
+        path = self._path(domain)
+        try:
+            version = path.stat().st_mtime_ns
+            data = json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        return StoredConfig(domain, data, version)
+
+    def version(self, domain: str) -> Optional[int]:
+        try:
+            return self._path(domain).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def put(self, domain: str, data: Dict[str, Any]) -> int:
+        path = self._path(domain)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2))
+        os.replace(tmp_path, path)
+        return path.stat().st_mtime_ns
+
+    def delete(self, domain: str) -> bool:
+        try:
+            self._path(domain).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    def list_domains(self) -> List[str]:
+        return [path.stem for path in self.config_dir.glob("*.json")]
+
+    def load_all(self) -> Dict[str, StoredConfig]:
+        configs = {}
+        for domain in self.list_domains():
+            try:
+                stored = self.get(domain)
+            except ValueError as e:
+                logger.error(f"Skipping unreadable config for {domain}: {str(e)}")
+                continue
+            if stored:
+                configs[domain] = stored
+        return configs
+
+class SQLiteConfigStore(ConfigStore):
+    """
+    All configs in one SQLite table, for single-host deployments. WAL
+    mode lets readers in other processes proceed during writes, and each
+    upsert is a single statement that bumps the version atomically.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS domain_configs ("
+            "domain TEXT PRIMARY KEY, data TEXT NOT NULL, "
+            "version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    _UPSERT = (
+        "INSERT INTO domain_configs (domain, data, version, updated_at) VALUES (?, ?, 1, ?) "
+        "ON CONFLICT(domain) DO UPDATE SET data = excluded.data, "
+        "version = domain_configs.version + 1, updated_at = excluded.updated_at "
+        "RETURNING version"
+    )
+
+    def get(self, domain: str) -> Optional[StoredConfig]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, version FROM domain_configs WHERE domain = ?", (domain,)
+            ).fetchone()
+        return StoredConfig(domain, json.loads(row[0]), row[1]) if row else None
+
+    def version(self, domain: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM domain_configs WHERE domain = ?", (domain,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, domain: str, data: Dict[str, Any]) -> int:
+        with self._lock:
+            row = self._conn.execute(self._UPSERT, (domain, json.dumps(data), time.time())).fetchone()
+        return row[0]
+
+    def put_many(self, configs: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        count = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for domain, data in configs:
+                    self._conn.execute(self._UPSERT, (domain, json.dumps(data), time.time())).fetchone()
+                    count += 1
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def delete(self, domain: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM domain_configs WHERE domain = ?", (domain,))
+        return cursor.rowcount > 0
+
+    def list_domains(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT domain FROM domain_configs ORDER BY domain").fetchall()
+        return [row[0] for row in rows]
+
+    def load_all(self) -> Dict[str, StoredConfig]:
+        with self._lock:
+            rows = self._conn.execute("SELECT domain, data, version FROM domain_configs").fetchall()
+        return {domain: StoredConfig(domain, json.loads(data), version) for domain, data, version in rows}
+
+class RedisConfigStore(ConfigStore):
+    """
+    Configs in two Redis hashes (JSON and version per domain), shared by
+    every worker in a cluster. Writes run in MULTI/EXEC so the data and
+    its version change together.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "domain-configs"):
+        self.redis = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.data_key = f"{prefix}:data"
+        self.version_key = f"{prefix}:version"
+
+    def get(self, domain: str) -> Optional[StoredConfig]:
+        pipe = self.redis.pipeline()
+        pipe.hget(self.data_key, domain)
+        pipe.hget(self.version_key, domain)
+        data, version = pipe.execute()
+        if data is None:
+            return None
+        return StoredConfig(domain, json.loads(data), int(version or 0))
+
+    def version(self, domain: str) -> Optional[int]:
+        version = self.redis.hget(self.version_key, domain)
+        return int(version) if version is not None else None
+
+    def put(self, domain: str, data: Dict[str, Any]) -> int:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self.data_key, domain, json.dumps(data))
+        pipe.hincrby(self.version_key, domain, 1)
+        return pipe.execute()[1]
+
+    def put_many(self, configs: Iterable[Tuple[str, Dict[str, Any]]], batch_size: int = 500) -> int:
+        count = 0
+        pipe = self.redis.pipeline(transaction=True)
+        for domain, data in configs:
+            pipe.hset(self.data_key, domain, json.dumps(data))
+            pipe.hincrby(self.version_key, domain, 1)
+            count += 1
+            if count % batch_size == 0:
+                pipe.execute()
+        pipe.execute()
+        return count
+
+    def delete(self, domain: str) -> bool:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hdel(self.data_key, domain)
+        pipe.hdel(self.version_key, domain)
+        removed, _ = pipe.execute()
+        return bool(removed)
+
+    def list_domains(self) -> List[str]:
+        return sorted(self.redis.hkeys(self.data_key))
+
+    def load_all(self) -> Dict[str, StoredConfig]:
+        pipe = self.redis.pipeline()
+        pipe.hgetall(self.data_key)
+        pipe.hgetall(self.version_key)
+        data, versions = pipe.execute()
+        return {
+            domain: StoredConfig(domain, json.loads(raw), int(versions.get(domain, 0)))
+            for domain, raw in data.items()
+        }
+
+_stores: Dict[Tuple[str, str], ConfigStore] = {}
+
+def get_config_store(backend: Optional[str] = None,
+                     config_dir: Optional[Union[str, Path]] = None) -> ConfigStore:
+    """
+    Shared store for a backend (CONFIG_STORE by default). ``config_dir``
+    holds the JSON files, or the SQLite database when CONFIG_DB_PATH is
+    unset.
+    """
+    backend = backend or settings.CONFIG_STORE
+    config_dir = Path(config_dir or settings.CONFIG_DIR)
+    if backend == "sqlite":
+        location = str(settings.CONFIG_DB_PATH or config_dir / "configs.sqlite3")
+    elif backend == "redis":
+        if not settings.REDIS_URL:
+            raise ValueError("CONFIG_STORE=redis requires REDIS_URL")
+        location = settings.REDIS_URL
+    elif backend == "file":
+        location = str(config_dir)
+    else:
+        raise ValueError(f"Unknown config store {backend}, expected one of {CONFIG_STORES}")
+
+    key = (backend, location)
+    if key not in _stores:
+        if backend == "sqlite":
+            _stores[key] = SQLiteConfigStore(location)
+        elif backend == "redis":
+            _stores[key] = RedisConfigStore(location)
+        else:
+            _stores[key] = FileConfigStore(location)
+    return _stores[key]
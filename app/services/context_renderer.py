@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import List, Optional
+from playwright.async_api import async_playwright, Browser, Page, Playwright
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from .resource_blocking import PageBlocker, ResourceStats, resolve_block_categories
+from .wait_conditions import INSTALL_MUTATION_OBSERVER_JS, WaitPlan
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class ContextRenderer:
+    """
+    Headless renderer that multiplexes pages over a few Chromium processes.
+
+    Every render gets its own browser context (a fresh cookie jar, cache
+    and storage) opened as a tab in one of ``browsers`` shared Chromium
+    instances, with at most ``max_tabs_per_browser`` tabs per instance.
+    Contexts are cheap compared to processes, so one node can render many
+    more ``use_headless`` pages at once than with a browser per page.
+    """
+
+    def __init__(self, browsers: Optional[int] = None,
+                 max_tabs_per_browser: Optional[int] = None):
+        self.browser_count = browsers or settings.CONTEXT_BROWSERS
+        self.max_tabs_per_browser = max_tabs_per_browser or settings.MAX_TABS_PER_BROWSER
+        self._playwright: Optional[Playwright] = None
+        self._browsers: List[Optional[Browser]] = []
+        self._tabs: List[int] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._relaunch_lock: Optional[asyncio.Lock] = None
+        self.resource_stats = ResourceStats()
+
+    async def start(self):
+        """Launch the shared browser processes"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._playwright is not None:
+                return
+            playwright = await async_playwright().start()
+            browsers: List[Browser] = []
+            try:
+                for _ in range(self.browser_count):
+                    browsers.append(await self._launch(playwright))
+            except BaseException:
+                # Leave nothing half started; the next render retries from scratch
+                await self._shutdown(browsers, playwright)
+                raise
+            self._browsers = browsers
+            self._tabs = [0] * self.browser_count
+            self._slots = asyncio.Semaphore(self.browser_count * self.max_tabs_per_browser)
+            self._relaunch_lock = asyncio.Lock()
+            self._playwright = playwright
+            logger.info(
+                f"Context renderer started with {self.browser_count} browsers, "
+                f"{self.max_tabs_per_browser} tabs each"
+            )
+
+    async def _launch(self, playwright: Playwright) -> Browser:
+        """Start one headless Chromium process"""
+        return await playwright.chromium.launch(
+            headless=True,
+            args=['--no-sandbox', '--disable-dev-shm-usage']
+        )
+
+    async def _connected_browser(self, index: int) -> Browser:
+        """Browser #index, relaunched first if it crashed"""
+        if self._is_connected(index):
+            return self._browsers[index]
+        async with self._relaunch_lock:
+            # Another render may have relaunched it while we waited
+            browser = self._browsers[index]
+            if not self._is_connected(index):
+                logger.warning(f"Relaunching disconnected browser #{index}")
+                self._browsers[index] = None
+                if browser is not None:
+                    try:
+                        await browser.close()
+                    except Exception as e:
+                        logger.debug(f"Error closing disconnected browser #{index}: {str(e)}")
+                self._browsers[index] = await self._launch(self._playwright)
+        return self._browsers[index]
+
+    def _is_connected(self, index: int) -> bool:
+        browser = self._browsers[index]
+        return browser is not None and browser.is_connected()
+
+    async def render(self, url: str, timeout: int = 30,
+                     user_agent: Optional[str] = None,
+                     block_resources: Optional[List[str]] = None,
+                     wait_plan: Optional[WaitPlan] = None) -> str:
+        """
+        Render a page in an isolated context and return the resulting HTML
+        """
+        await self.start()
+        wait_plan = wait_plan or WaitPlan()
+        categories = resolve_block_categories(block_resources)
+        blocker = PageBlocker(url, categories, self.resource_stats)
+        # Held locally so a close() during the render cannot swap them out
+        slots, tabs = self._slots, self._tabs
+        async with slots:
+            # Reserve the tab before awaiting anything, so concurrent renders
+            # never pile more than max_tabs_per_browser onto one browser
+            index = min(range(len(tabs)), key=lambda i: tabs[i])
+            tabs[index] += 1
+            context = None
+            try:
+                browser = await self._connected_browser(index)
+                context = await browser.new_context(user_agent=user_agent)
+                if categories:
+                    await context.route("**/*", blocker.handle_route)
+                page = await context.new_page()
+                page.on("requestfinished", blocker.handle_finished)
+                wait_until = 'load' if wait_plan.strategy == 'load' else 'domcontentloaded'
+                await page.goto(url, wait_until=wait_until, timeout=timeout * 1000)
+                await page.wait_for_selector('body', state='attached', timeout=timeout * 1000)
+                await self._wait_until_ready(page, url, timeout, wait_plan)
+                html = await page.content()
+                logger.info(f"Rendered {url}: {blocker.finish().to_dict()}")
+                return html
+            finally:
+                tabs[index] -= 1
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.warning(f"Error closing browser context: {str(e)}")
+
+    async def _wait_until_ready(self, page: Page, url: str, timeout: int,
+                                wait_plan: WaitPlan):
+        """Wait for the page's configured condition before snapshotting"""
+        if wait_plan.strategy == 'load':
+            return
+        wait_ms = (wait_plan.timeout or timeout) * 1000
+        try:
+            # network_idle polls the resource count too, so idle_ms applies
+            # rather than Playwright's fixed 500ms networkidle window
+            if wait_plan.strategy == 'dom_quiet':
+                await page.evaluate(INSTALL_MUTATION_OBSERVER_JS)
+            await page.wait_for_function(
+                wait_plan.ready_script(),
+                polling=wait_plan.poll_ms,
+                timeout=wait_ms
+            )
+        except PlaywrightTimeoutError:
+            logger.warning(
+                f"Wait condition {wait_plan.strategy} not met for {url}, "
+                "taking snapshot anyway"
+            )
+
+    async def close(self):
+        """Close all browsers and stop Playwright"""
+        browsers, playwright = self._browsers, self._playwright
+        self._browsers, self._tabs = [], []
+        self._slots = self._relaunch_lock = None
+        self._playwright = None
+        await self._shutdown(browsers, playwright)
+
+    async def _shutdown(self, browsers: List[Optional[Browser]],
+                        playwright: Optional[Playwright]):
+        """Close the given browsers, then stop Playwright"""
+        for browser in browsers:
+            if browser is not None:
+                try:
+                    await browser.close()
+                except Exception as e:
+                    logger.warning(f"Error closing browser: {str(e)}")
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                logger.warning(f"Error stopping Playwright: {str(e)}")
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, TypeVar, Union
+from .extraction_plan import MEDIA_TYPES, extraction_plans
+from .structured_data import extract_structured
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+def scraped_fields(content: Dict[str, Any], media_files: Dict[str, list]) -> Dict[str, Any]:
+    """ScrapedContent keyword arguments from extracted fields and media"""
+    return {
+        "title": content.get("title"),
+        "content": content.get("content"),
+        "author": content.get("author"),
+        "publish_date": content.get("publish_date"),
+        "language": content.get("language"),
+        "categories": content.get("categories", []),
+        "media_files": media_files,
+    }
+
+def plan_schema(schema: Dict) -> Dict:
+    """The part of a schema extraction needs, to keep what is pickled small"""
+    return {
+        "domain": schema.get("domain"),
+        "parser": schema.get("parser"),
+        "extraction_rules": schema.get("extraction_rules") or {},
+        "media_rules": schema.get("media_rules") or {},
+        "structured_data": schema.get("structured_data"),
+    }
+
+def extract_page(markup: Union[str, bytes], encoding: Optional[str],
+                 schema: Dict) -> Tuple[Dict[str, Any], float]:
+    """
+    Parse a page and extract it with the schema's plan.
+
+    Fields published as structured data (JSON-LD, OpenGraph) are taken
+    from a head-only scan first; the full page is parsed only when some
+    rule is still unanswered, and only those rules are evaluated. Media
+    rules always run, and structured media is merged into their results.
+
+    Runs in a worker process: plans are compiled once per worker and
+    cached there. Returns ScrapedContent kwargs and the CPU seconds spent.
+    """
+    started = time.process_time()
+    plan = extraction_plans.for_schema(schema)
+    use_structured = schema.get("structured_data")
+    if use_structured is None:
+        use_structured = settings.STRUCTURED_DATA
+    structured = extract_structured(markup, encoding) if use_structured else {}
+    structured_media = structured.pop("media_files", {})
+
+    plan = plan.without(structured)
+    content: Dict[str, Any] = {}
+    media_files: Dict[str, list] = {media_type: [] for media_type in MEDIA_TYPES}
+    if plan.fields or plan.media:
+        content, media_files = plan.extract(plan.backend.parse(markup, encoding))
+    content.update(structured)
+    for media_type, urls in structured_media.items():
+        media_files[media_type] = list(dict.fromkeys(media_files.get(media_type, []) + urls))
+    return scraped_fields(content, media_files), time.process_time() - started
+
+class ExtractionExecutor:
+    """
+    Runs parsing and extraction off the event loop in a process pool.
+
+    HTML bytes go in and ScrapedContent dicts come out, so the loop only
+    does I/O; ``run`` offloads other parsing work (schema inference,
+    template validation) the same way. ``workers`` defaults to EXTRACTION_WORKERS (the CPU count
+    when unset); 0 extracts inline on the loop. ``metrics()`` reports
+    queue depth and per-task CPU time for sizing the pool. Scrapers share
+    the module's ``extraction_executor`` so a process starts one pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, window: int = 1000):
+        if workers is None:
+            workers = settings.EXTRACTION_WORKERS
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._cpu_times: Deque[float] = deque(maxlen=window)
+        self._wall_times: Deque[float] = deque(maxlen=window)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Never fork a process that runs an event loop and browser threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started extraction pool with {self.workers} workers")
+        return self._pool
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """
+        Run a picklable CPU-bound function in the pool, or inline with 0
+        workers. A pool broken by a dead worker is reaped so the next call
+        starts a fresh one.
+        """
+        pool = self._get_pool() if self.workers else None
+        if pool is None:
+            return fn(*args)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            # A worker died (OOM on a huge page); reap the broken pool and
+            # start a fresh one next time, unless another task already did
+            logger.error(f"Extraction pool broke: {str(e)}")
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self._pool is pool:
+                self._pool = None
+            raise
+
+    async def extract(self, markup: Union[str, bytes], schema: Dict,
+                      encoding: Optional[str] = None) -> Dict[str, Any]:
+        """Parse and extract a page, returning ScrapedContent kwargs"""
+        schema = plan_schema(schema)
+        started = time.perf_counter()
+        self._pending += 1
+        try:
+            result, cpu_time = await self.run(extract_page, markup, encoding, schema)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self._completed += 1
+        self._cpu_times.append(cpu_time)
+        self._wall_times.append(time.perf_counter() - started)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool load and per-task CPU time over the recent window"""
+        cpu_times = sorted(self._cpu_times)
+        wall_times = list(self._wall_times)
+
+        def percentile(values, fraction):
+            return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+        avg_cpu = sum(cpu_times) / len(cpu_times) if cpu_times else None
+        avg_wall = sum(wall_times) / len(wall_times) if wall_times else None
+        return {
+            "workers": self.workers,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "cpu_time_avg": avg_cpu,
+            "cpu_time_p95": percentile(cpu_times, 0.95),
+            "wall_time_avg": avg_wall,
+            # Time tasks spent waiting for a worker or shipping data
+            "queue_wait_avg": avg_wall - avg_cpu if cpu_times else None,
+        }
+
+    def close(self):
+        """Shut the worker processes down"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+extraction_executor = ExtractionExecutor()
@@ -0,0 +1,248 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .html_parser import ParsedDocument, ParserBackend, get_parser_backend, rule_selector, uses_xpath
+from .single_pass import SinglePassExtractor
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = ("images", "videos", "embeds")
+
+POST_PROCESSORS: Dict[str, Callable[[str], str]] = {
+    "strip": str.strip,
+    "lowercase": str.lower,
+    "uppercase": str.upper,
+}
+
+def _rule_value(rule: Any, name: str, default: Any = None) -> Any:
+    """Read a field from a rule dict or ExtractionRule"""
+    if isinstance(rule, dict):
+        return rule.get(name, default)
+    return getattr(rule, name, default)
+
+def _rule_key(rule: Any) -> Tuple:
+    if rule is None:
+        return (None,)
+    return (rule_selector(rule), _rule_value(rule, 'attribute'), _rule_value(rule, 'post_process'))
+
+def rules_fingerprint(extraction_rules: Dict[str, Any], media_rules: Dict[str, Any],
+                      parser: Optional[str]) -> Tuple:
+    """
+    What a plan depends on, read straight from the rule dicts or
+    ExtractionRule objects; cheap enough to compare on every lookup
+    """
+    return (
+        tuple((name, _rule_key(rule)) for name, rule in extraction_rules.items()),
+        tuple((name, _rule_key(rule)) for name, rule in media_rules.items()),
+        parser,
+    )
+
+@dataclass
+class CompiledRule:
+    """One extraction or media rule with everything resolved up front"""
+    name: str
+    selector: str
+    selector_type: str
+    matcher: Any
+    attribute: Optional[str] = None
+    post_process: Optional[Callable[[str], str]] = None
+
+class ExtractionPlan:
+    """
+    A domain's extraction rules compiled for one parser backend.
+
+    Selectors are compiled (soupsieve, cssselect/XPath or validated for
+    lexbor), attributes resolved and post-process names mapped to
+    callables when the plan is built, so extracting a page does no
+    selector parsing at all. Rules that fail to compile are logged once
+    and skipped.
+    """
+
+    def __init__(self, backend: ParserBackend, fields: List[CompiledRule],
+                 media: List[CompiledRule]):
+        self.backend = backend
+        self.fields = fields
+        self.media = media
+        self._start_tag_matcher: Optional[SinglePassExtractor] = None
+        self._subsets: Dict[frozenset, "ExtractionPlan"] = {}
+
+    @classmethod
+    def build(cls, extraction_rules: Dict[str, Any], media_rules: Dict[str, Any],
+              parser: Optional[str] = None) -> "ExtractionPlan":
+        """Compile a config's rules; configs with XPath rules get lxml"""
+        all_rules = list(extraction_rules.values()) + list(media_rules.values())
+        backend = get_parser_backend(parser, needs_xpath=uses_xpath(all_rules))
+
+        fields = []
+        for name, rule in extraction_rules.items():
+            compiled = cls._compile_rule(backend, name, rule)
+            if compiled:
+                compiled.post_process = cls._post_processor(_rule_value(rule, 'post_process'))
+                fields.append(compiled)
+
+        media = []
+        for name, rule in media_rules.items():
+            if name not in MEDIA_TYPES:
+                continue
+            compiled = cls._compile_rule(backend, name, rule)
+            if compiled:
+                compiled.attribute = compiled.attribute or 'src'
+                media.append(compiled)
+
+        return cls(backend, fields, media)
+
+    @staticmethod
+    def _compile_rule(backend: ParserBackend, name: str, rule: Any) -> Optional[CompiledRule]:
+        selector = rule_selector(rule) if rule is not None else None
+        if not selector:
+            logger.warning(f"Invalid rules format for field {name}")
+            return None
+        selector_type, selector = selector
+        try:
+            matcher = backend.compile(selector, selector_type)
+        except Exception as e:
+            logger.error(f"Cannot compile {selector_type} selector {selector} for {name}: {str(e)}")
+            return None
+        return CompiledRule(
+            name=name,
+            selector=selector,
+            selector_type=selector_type,
+            matcher=matcher,
+            attribute=_rule_value(rule, 'attribute')
+        )
+
+    @staticmethod
+    def _post_processor(process_type: Optional[str]) -> Optional[Callable[[str], str]]:
+        if not process_type:
+            return None
+        if process_type not in POST_PROCESSORS:
+            logger.warning(f"Unknown post-process type {process_type}, ignoring")
+            return None
+        return POST_PROCESSORS[process_type]
+
+    def without(self, fields: Iterable[str]) -> "ExtractionPlan":
+        """This plan minus the named field rules (cached)"""
+        key = frozenset(fields)
+        if not key:
+            return self
+        if key not in self._subsets:
+            self._subsets[key] = ExtractionPlan(
+                self.backend,
+                [rule for rule in self.fields if rule.name not in key],
+                self.media
+            )
+        return self._subsets[key]
+
+    def extract(self, document: ParsedDocument) -> Tuple[Dict[str, Optional[str]], Dict[str, list]]:
+        """Field values and media URLs of a page"""
+        return self.extract_fields(document), self.extract_media(document)
+
+    def extract_fields(self, document: ParsedDocument) -> Dict[str, Optional[str]]:
+        """First match of every field rule"""
+        content = {}
+        for rule in self.fields:
+            try:
+                content[rule.name] = self.field_value(document, rule, document.match(rule.matcher))
+            except Exception as e:
+                logger.error(f"Extraction failed for {rule.name}: {str(e)}")
+                content[rule.name] = None
+        return content
+
+    def extract_media(self, document: ParsedDocument) -> Dict[str, list]:
+        """All URLs matched by every media rule"""
+        media_files = {media_type: [] for media_type in MEDIA_TYPES}
+        for rule in self.media:
+            try:
+                media_files[rule.name].extend(
+                    self.media_urls(document, rule, document.match(rule.matcher))
+                )
+            except Exception as e:
+                logger.error(f"Media extraction failed for {rule.name}: {str(e)}")
+        return media_files
+
+    def start_tag_matcher(self) -> Optional[SinglePassExtractor]:
+        """
+        Matcher that evaluates every rule from an element's start tag, for
+        streaming extraction; None when some rule needs the full tree
+        (XPath, pseudo-classes)
+        """
+        if self._start_tag_matcher is None:
+            self._start_tag_matcher = SinglePassExtractor(self.fields, self.media)
+        if self._start_tag_matcher.fallback:
+            return None
+        return self._start_tag_matcher
+
+    @staticmethod
+    def field_value(document: ParsedDocument, rule: CompiledRule,
+                    elements: List[Any]) -> Optional[str]:
+        if not elements:
+            return None
+        element = elements[0]
+        value = document.attr(element, rule.attribute) if rule.attribute else document.text(element)
+        if rule.post_process and value:
+            value = rule.post_process(value)
+        return value
+
+    @staticmethod
+    def media_urls(document: ParsedDocument, rule: CompiledRule, elements: List[Any]) -> List[str]:
+        urls = []
+        for element in elements:
+            url = document.attr(element, rule.attribute)
+            if url:
+                urls.append(url)
+        return urls
+
+class ExtractionPlanCache:
+    """
+    Compiled plans per domain, rebuilt when the domain's rules change.
+
+    Each plan is stored with a fingerprint of the rules it was built from;
+    a lookup with different rules (an edited or regenerated config)
+    replaces it. ConfigService also drops a domain's plan on save and
+    delete. Least recently used domains are evicted past ``max_domains``.
+    """
+
+    def __init__(self, max_domains: int = 4096):
+        self.max_domains = max_domains
+        self._plans: "OrderedDict[str, Tuple[Tuple, ExtractionPlan]]" = OrderedDict()
+
+    def for_schema(self, schema: Dict) -> ExtractionPlan:
+        """Plan for a schema dict as used by Scraper"""
+        extraction_rules = schema.get('extraction_rules') or {}
+        media_rules = schema.get('media_rules') or {}
+        fingerprint = rules_fingerprint(extraction_rules, media_rules, schema.get('parser'))
+        return self._get(schema.get('domain') or str(hash(fingerprint)), fingerprint,
+                         extraction_rules, media_rules, schema.get('parser'))
+
+    def for_config(self, config: Any) -> ExtractionPlan:
+        """Plan for a DomainConfig, whose rules may be ExtractionRule objects or plain dicts"""
+        extraction_rules = config.extraction_rules or {}
+        media_rules = {
+            media_type: _rule_value(config.media_rules, media_type)
+            for media_type in MEDIA_TYPES
+        } if config.media_rules else {}
+        fingerprint = rules_fingerprint(extraction_rules, media_rules, config.parser)
+        return self._get(config.domain, fingerprint, extraction_rules,
+                         media_rules, config.parser)
+
+    def _get(self, key: str, fingerprint: Tuple, extraction_rules: Dict[str, Any],
+             media_rules: Dict[str, Any], parser: Optional[str]) -> ExtractionPlan:
+        cached = self._plans.get(key)
+        if cached and cached[0] == fingerprint:
+            self._plans.move_to_end(key)
+            return cached[1]
+
+        plan = ExtractionPlan.build(extraction_rules, media_rules, parser)
+        self._plans[key] = (fingerprint, plan)
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_domains:
+            self._plans.popitem(last=False)
+        return plan
+
+    def invalidate(self, domain: str):
+        """Drop a domain's plan after its config changed"""
+        self._plans.pop(domain, None)
+
+# Shared by the scrapers and ConfigService so config writes invalidate plans
+extraction_plans = ExtractionPlanCache()
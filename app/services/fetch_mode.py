@@ -0,0 +1,164 @@
+import asyncio
+import inspect
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set
+from .config_resolver import config_keys
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+FETCH_MODES = ("static", "headless", "auto")
+
+def resolve_fetch_mode(fetch_mode: Optional[str], use_headless: bool) -> str:
+    """
+    Effective fetch mode for a domain.
+
+    ``static`` and ``headless`` pin the fetch path; ``auto`` tries the
+    plain HTTP path first and escalates to a headless render only when
+    required fields come back empty. In ``auto`` mode ``use_headless``
+    is the domain's starting default (see FetchModeTracker).
+    """
+    mode = fetch_mode or settings.DEFAULT_FETCH_MODE
+    if mode not in FETCH_MODES:
+        logger.warning(f"Unknown fetch mode {mode}, falling back to use_headless flag")
+        return "headless" if use_headless else "static"
+    return mode
+
+def missing_fields(content: Any, required_fields: Iterable[str]) -> List[str]:
+    """Required fields that are empty in a ScrapedContent"""
+    return [name for name in required_fields if not getattr(content, name, None)]
+
+class DomainFetchStats:
+    """Recent static-path outcomes for one domain"""
+
+    def __init__(self, window: int, prefer_headless: bool = False):
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.prefer_headless = prefer_headless
+        self.requests_since_probe = 0
+
+    @property
+    def static_success_rate(self) -> Optional[float]:
+        if not self.outcomes:
+            return None
+        return sum(self.outcomes) / len(self.outcomes)
+
+class FetchModeTracker:
+    """
+    Learns per domain whether the cheap HTTP path is good enough.
+
+    Every static attempt in ``auto`` mode is recorded as a success or a
+    failure (required fields missing). Once a domain has enough samples
+    and its static success rate drops below the threshold it flips to
+    headless-first; while headless-first, every ``probe_interval``-th
+    request still tries the static path so the domain can flip back.
+    A domain starts from its configured ``use_headless`` flag and only
+    leaves it once the static path has ``min_samples`` outcomes.
+    ``on_flip(domain, use_headless)`` is called on every flip so the
+    learned default can be persisted in the domain config (see
+    ``persist_fetch_mode``); coroutines it returns are kept until done.
+    """
+
+    def __init__(self, window: Optional[int] = None, min_samples: Optional[int] = None,
+                 threshold: Optional[float] = None, probe_interval: Optional[int] = None,
+                 on_flip: Optional[Callable[[str, bool], Any]] = None):
+        self.window = window or settings.FETCH_MODE_WINDOW
+        self.min_samples = min_samples or settings.FETCH_MODE_MIN_SAMPLES
+        self.threshold = threshold or settings.FETCH_MODE_STATIC_SUCCESS_THRESHOLD
+        self.probe_interval = probe_interval or settings.FETCH_MODE_PROBE_INTERVAL
+        self.on_flip = on_flip
+        self._domains: Dict[str, DomainFetchStats] = {}
+        self._flips: Set[asyncio.Future] = set()
+
+    def _stats(self, domain: str, prefer_headless: bool = False) -> DomainFetchStats:
+        if domain not in self._domains:
+            self._domains[domain] = DomainFetchStats(self.window, prefer_headless)
+        return self._domains[domain]
+
+    def should_try_static(self, domain: str, use_headless: bool = False) -> bool:
+        """
+        Whether the next auto-mode request should start on the static
+        path; ``use_headless`` is the configured default for a domain
+        without recorded outcomes
+        """
+        stats = self._stats(domain, use_headless)
+        if not stats.prefer_headless:
+            return True
+        stats.requests_since_probe += 1
+        if stats.requests_since_probe >= self.probe_interval:
+            stats.requests_since_probe = 0
+            return True
+        return False
+
+    def record_static(self, domain: str, success: bool):
+        """Record the outcome of a static attempt and flip the default if needed"""
+        stats = self._stats(domain)
+        stats.outcomes.append(success)
+        if len(stats.outcomes) < self.min_samples:
+            return
+
+        prefer_headless = stats.static_success_rate < self.threshold
+        if prefer_headless != stats.prefer_headless:
+            stats.prefer_headless = prefer_headless
+            stats.requests_since_probe = 0
+            logger.info(
+                f"Fetch mode for {domain} flipped to "
+                f"{'headless' if prefer_headless else 'static'} "
+                f"(static success rate {stats.static_success_rate:.0%})"
+            )
+            if self.on_flip:
+                try:
+                    result = self.on_flip(domain, prefer_headless)
+                    if inspect.isawaitable(result):
+                        future = asyncio.ensure_future(result)
+                        self._flips.add(future)
+                        future.add_done_callback(lambda done: self._flip_done(domain, done))
+                except Exception as e:
+                    logger.error(f"Failed to persist fetch mode for {domain}: {str(e)}")
+
+    def _flip_done(self, domain: str, future: asyncio.Future):
+        self._flips.discard(future)
+        if not future.cancelled() and future.exception():
+            logger.error(f"Failed to persist fetch mode for {domain}: {str(future.exception())}")
+
+    async def close(self):
+        """Wait for pending on_flip writes"""
+        if self._flips:
+            await asyncio.gather(*self._flips, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Per-domain stats for monitoring"""
+        return {
+            domain: {
+                "prefer_headless": stats.prefer_headless,
+                "static_success_rate": stats.static_success_rate,
+                "samples": len(stats.outcomes),
+            }
+            for domain, stats in self._domains.items()
+        }
+
+def persist_fetch_mode(cache) -> Callable[[str, bool], Awaitable[None]]:
+    """
+    ``on_flip`` callback that writes a host's learned default into its
+    stored config as the ``use_headless`` flag, then drops the cached copy
+    here and in other workers. ``cache`` is the ConfigCache the scraper's
+    configs are read through.
+
+    The flag always lands under the host's own key: a host that only
+    inherits its registrable domain's config gets a per-host override
+    copied from it, so one subdomain's escalation leaves its siblings be.
+    """
+    async def on_flip(host: str, use_headless: bool):
+        stored = None
+        for key in config_keys(host):
+            stored = await asyncio.to_thread(cache.store.get, key)
+            if stored is not None:
+                break
+        if stored is None or stored.data.get("use_headless") == use_headless:
+            return
+        data = dict(stored.data, domain=host, use_headless=use_headless)
+        version = await asyncio.to_thread(cache.store.put, host, data)
+        cache.invalidate(host)
+        await cache.publish(host)
+        logger.info(f"Saved use_headless={use_headless} for {host} (version {version})")
+    return on_flip
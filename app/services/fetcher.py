@@ -0,0 +1,227 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Mapping, Optional
+from urllib.parse import urlparse
+import aiohttp
+from ..core.exceptions import ContentRejectedError
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Statuses some servers give HEAD requests while serving GET normally
+HEAD_REFUSED_STATUSES = {403, 405, 501}
+
+@dataclass
+class FetchResult:
+    """Status, headers and raw body of a fetched page"""
+    url: str
+    status: int
+    headers: Mapping[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    encoding: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the charset announced by the server"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+class ResponseStream:
+    """
+    Body of an in-flight response, read chunk by chunk.
+
+    Raises ContentRejectedError and drops the connection as soon as more
+    than ``max_bytes`` have been received.
+    """
+
+    def __init__(self, response: aiohttp.ClientResponse, max_bytes: int):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.url = str(response.url)
+        self.status = response.status
+        self.headers = response.headers
+        self.encoding = response.charset
+        self.bytes_read = 0
+
+    async def iter_chunks(self) -> AsyncIterator[bytes]:
+        """Yield body chunks while enforcing the byte cap"""
+        async for chunk in self.response.content.iter_chunked(CHUNK_SIZE):
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                raise ContentRejectedError(
+                    f"{self.url} exceeded the {self.max_bytes} byte limit"
+                )
+            yield chunk
+
+    async def read(self) -> bytes:
+        """Read the remaining body under the byte cap"""
+        body = bytearray()
+        async for chunk in self.iter_chunks():
+            body.extend(chunk)
+        return bytes(body)
+
+    def abort(self):
+        """Stop the download and drop the connection instead of draining it"""
+        self.response.close()
+
+class AsyncFetcher:
+    """
+    Non-blocking HTTP fetcher shared by the scrapers.
+
+    Wraps a single aiohttp session so connections are pooled per host
+    and kept alive between requests, while a semaphore caps the number
+    of fetches in flight for the whole process.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None,
+                 max_connections: Optional[int] = None,
+                 max_connections_per_host: Optional[int] = None,
+                 keepalive_timeout: Optional[int] = None):
+        self.concurrency = concurrency or settings.FETCH_CONCURRENCY
+        self.max_connections = max_connections or settings.FETCH_MAX_CONNECTIONS
+        self.max_connections_per_host = (
+            max_connections_per_host or settings.FETCH_MAX_CONNECTIONS_PER_HOST
+        )
+        self.keepalive_timeout = keepalive_timeout or settings.FETCH_KEEPALIVE_TIMEOUT
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Lazily create the session inside the running event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    @property
+    def in_flight(self) -> int:
+        """Number of fetches currently holding a concurrency slot"""
+        return self._in_flight
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncIterator[None]:
+        """Hold one of the ``concurrency`` fetch slots"""
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                yield
+            finally:
+                self._in_flight -= 1
+
+    async def fetch(self, url: str, headers: Optional[Dict] = None,
+                    timeout: int = 30, proxy: Optional[str] = None,
+                    max_bytes: Optional[int] = None) -> str:
+        """
+        Fetch a URL and return the decoded body
+        """
+        result = await self.fetch_response(
+            url, headers=headers, timeout=timeout, proxy=proxy, max_bytes=max_bytes
+        )
+        return result.text
+
+    async def fetch_response(self, url: str, headers: Optional[Dict] = None,
+                             timeout: int = 30, proxy: Optional[str] = None,
+                             max_bytes: Optional[int] = None) -> FetchResult:
+        """
+        Fetch a URL and return status, headers and raw body.
+
+        Error statuses raise; a 304 Not Modified is returned with an empty body.
+        """
+        async with self.stream(url, headers=headers, timeout=timeout, proxy=proxy,
+                               max_bytes=max_bytes) as stream:
+            body = b"" if stream.status == 304 else await stream.read()
+            return FetchResult(
+                url=stream.url,
+                status=stream.status,
+                headers=stream.headers,
+                body=body,
+                encoding=stream.encoding
+            )
+
+    async def probe(self, url: str, headers: Optional[Dict] = None, timeout: int = 10) -> int:
+        """
+        Status a URL answers with, without reading its body. Servers that
+        refuse HEAD (403, 405, 501) are asked again with GET.
+        """
+        session = self._get_session()
+        async with self._slot():
+            for method in ("HEAD", "GET"):
+                async with session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    allow_redirects=True,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    status = response.status
+                    if method == "GET":
+                        # Drop the connection rather than download a body nobody reads
+                        response.close()
+                if method == "HEAD" and status in HEAD_REFUSED_STATUSES:
+                    continue
+                return status
+        return status
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: Optional[Dict] = None,
+                     timeout: int = 30, proxy: Optional[str] = None,
+                     max_bytes: Optional[int] = None) -> AsyncIterator[ResponseStream]:
+        """
+        Open a URL and yield its body as a capped chunk stream.
+
+        The response is rejected before any body is read when its
+        Content-Type is not HTML or its Content-Length is over the cap.
+        """
+        max_bytes = max_bytes or settings.FETCH_MAX_BYTES
+        session = self._get_session()
+        async with self._slot():
+            async with session.get(
+                url,
+                headers=headers,
+                proxy=proxy,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                response.raise_for_status()
+                if response.status != 304:
+                    self._check_headers(response, max_bytes)
+                yield ResponseStream(response, max_bytes)
+
+    def _check_headers(self, response: aiohttp.ClientResponse, max_bytes: int):
+        """Reject responses we can tell are unusable from their headers"""
+        content_type = response.content_type
+        if response.headers.get('Content-Type') and not any(
+            content_type.startswith(allowed) for allowed in settings.FETCH_ALLOWED_CONTENT_TYPES
+        ):
+            raise ContentRejectedError(
+                f"{response.url} has unsupported content type {content_type}"
+            )
+
+        if response.content_length is not None and response.content_length > max_bytes:
+            raise ContentRejectedError(
+                f"{response.url} is {response.content_length} bytes, "
+                f"over the {max_bytes} byte limit"
+            )
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+def proxy_for_url(url: str, proxy_config: Optional[Dict]) -> Optional[str]:
+    """Pick the proxy URL from a requests-style proxies mapping"""
+    if not proxy_config:
+        return None
+    scheme = urlparse(url).scheme
+    return proxy_config.get(scheme) or proxy_config.get('http')
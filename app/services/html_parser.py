@@ -0,0 +1,274 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from bs4 import BeautifulSoup
+import lxml.html
+import soupsieve
+from lxml import etree
+from lxml.cssselect import CSSSelector
+from ..core.settings import settings
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # selectolax is optional
+    LexborHTMLParser = None
+
+logger = logging.getLogger(__name__)
+
+PARSER_BACKENDS = ("bs4", "lxml", "selectolax")
+
+# Text of script and style elements is not page content (matches bs4's get_text)
+_SKIP_TEXT_TAGS = ("script", "style", "template")
+_VISIBLE_TEXT = etree.XPath(
+    ".//text()[not(parent::script) and not(parent::style) and not(parent::template)]"
+)
+
+Markup = Union[str, bytes]
+
+def _selector_type(selector_type: Any) -> str:
+    """Plain string form of a rule's selector type"""
+    return getattr(selector_type, 'value', selector_type) or 'css'
+
+def rule_selector(rule: Any) -> Optional[Tuple[str, str]]:
+    """(selector_type, selector) from a rule dict or ExtractionRule"""
+    if isinstance(rule, dict):
+        selector_type = rule.get('selector_type', 'css')
+        selector = rule.get('selector')
+    else:
+        selector_type = getattr(rule, 'selector_type', 'css')
+        selector = getattr(rule, 'selector', None)
+    return (_selector_type(selector_type), selector) if selector else None
+
+def uses_xpath(rules: Iterable[Any]) -> bool:
+    """Whether any of the rules is an XPath rule"""
+    return any(
+        selector and selector[0] == 'xpath'
+        for selector in map(rule_selector, rules)
+    )
+
+class ParsedDocument:
+    """
+    A parsed page exposing the few operations the extractors need, so
+    rules can be evaluated the same way whatever parser built the tree.
+    """
+
+    def select(self, selector: str, selector_type: Any = 'css') -> List[Any]:
+        """Elements matching a CSS or XPath selector, in document order"""
+        raise NotImplementedError
+
+    def match(self, matcher: Any) -> List[Any]:
+        """Elements matching a selector compiled by ParserBackend.compile"""
+        raise NotImplementedError
+
+    def text(self, element: Any) -> str:
+        """Visible text of an element with whitespace stripped per text node"""
+        raise NotImplementedError
+
+    def attr(self, element: Any, name: str) -> Optional[str]:
+        """Attribute value of an element"""
+        raise NotImplementedError
+
+class SoupDocument(ParsedDocument):
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+
+    def select(self, selector: str, selector_type: Any = 'css') -> List[Any]:
+        if _selector_type(selector_type) == 'xpath':
+            logger.warning(f"XPath selector {selector} is not supported by the bs4 parser")
+            return []
+        return self.soup.select(selector)
+
+    def match(self, matcher: Any) -> List[Any]:
+        return matcher.select(self.soup)
+
+    def text(self, element: Any) -> str:
+        return element.get_text(strip=True)
+
+    def attr(self, element: Any, name: str) -> Optional[str]:
+        return element.get(name)
+
+class LxmlDocument(ParsedDocument):
+    """
+    lxml tree; the only backend with real XPath support. XPath rules may
+    select elements or strings (``//meta/@content``, ``//h1/text()``).
+    """
+
+    def __init__(self, root: etree._Element):
+        self.root = root
+
+    def select(self, selector: str, selector_type: Any = 'css') -> List[Any]:
+        if _selector_type(selector_type) == 'xpath':
+            return self.match(etree.XPath(selector))
+        return self.root.cssselect(selector)
+
+    def match(self, matcher: Any) -> List[Any]:
+        # CSSSelector is an XPath subclass, so both compile to one callable
+        result = matcher(self.root)
+        if isinstance(result, list):
+            return result
+        # string(), count() and boolean expressions return a scalar
+        return [str(result)] if result not in ('', None) else []
+
+    def text(self, element: Any) -> str:
+        if isinstance(element, str):
+            return element.strip()
+        return ''.join(part.strip() for part in _VISIBLE_TEXT(element))
+
+    def attr(self, element: Any, name: str) -> Optional[str]:
+        if isinstance(element, str):
+            # The XPath already selected the attribute value
+            return element
+        return element.get(name)
+
+class SelectolaxDocument(ParsedDocument):
+    def __init__(self, tree: Any):
+        self.tree = tree
+
+    def select(self, selector: str, selector_type: Any = 'css') -> List[Any]:
+        if _selector_type(selector_type) == 'xpath':
+            logger.warning(f"XPath selector {selector} is not supported by the selectolax parser")
+            return []
+        return self.tree.css(selector)
+
+    def match(self, matcher: Any) -> List[Any]:
+        # lexbor has no public compiled selector object
+        return self.tree.css(matcher)
+
+    def text(self, element: Any) -> str:
+        return ''.join(
+            node.text_content.strip()
+            for node in element.traverse(include_text=True)
+            if node.tag == '-text' and node.parent.tag not in _SKIP_TEXT_TAGS
+        )
+
+    def attr(self, element: Any, name: str) -> Optional[str]:
+        return element.attributes.get(name)
+
+class IncrementalParse:
+    """
+    Feed interface for parsing a body while it downloads.
+
+    Backends without a push parser buffer the chunks and parse on close().
+    """
+
+    def __init__(self, backend: "ParserBackend", encoding: Optional[str] = None):
+        self.backend = backend
+        self.encoding = encoding
+        self._chunks: List[bytes] = []
+
+    def feed(self, chunk: bytes):
+        self._chunks.append(chunk)
+
+    def close(self) -> ParsedDocument:
+        return self.backend.parse(b''.join(self._chunks), self.encoding)
+
+class LxmlIncrementalParse(IncrementalParse):
+    """Push chunks straight into libxml2 so no full copy of the body is kept"""
+
+    def __init__(self, backend: "ParserBackend", encoding: Optional[str] = None):
+        super().__init__(backend, encoding)
+        self._parser = lxml.html.HTMLParser(encoding=encoding)
+        self._fed = False
+
+    def feed(self, chunk: bytes):
+        if chunk:
+            self._parser.feed(chunk)
+            self._fed = True
+
+    def close(self) -> ParsedDocument:
+        if not self._fed:
+            return LxmlDocument(lxml.html.fromstring('<html></html>'))
+        return LxmlDocument(self._parser.close())
+
+class ParserBackend:
+    """Turns markup into a ParsedDocument"""
+    name = ""
+
+    def parse(self, markup: Markup, encoding: Optional[str] = None) -> ParsedDocument:
+        raise NotImplementedError
+
+    def incremental(self, encoding: Optional[str] = None) -> IncrementalParse:
+        return IncrementalParse(self, encoding)
+
+    def compile(self, selector: str, selector_type: Any = 'css') -> Any:
+        """
+        Compile a selector once for repeated use with ParsedDocument.match;
+        raises ValueError for selectors this backend cannot evaluate
+        """
+        raise NotImplementedError
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with the pure-Python html.parser"""
+    name = "bs4"
+
+    def parse(self, markup: Markup, encoding: Optional[str] = None) -> ParsedDocument:
+        if isinstance(markup, bytes):
+            return SoupDocument(BeautifulSoup(markup, 'html.parser', from_encoding=encoding))
+        return SoupDocument(BeautifulSoup(markup, 'html.parser'))
+
+    def compile(self, selector: str, selector_type: Any = 'css') -> Any:
+        if _selector_type(selector_type) == 'xpath':
+            raise ValueError("XPath is not supported by the bs4 parser")
+        return soupsieve.compile(selector)
+
+class LxmlBackend(ParserBackend):
+    """libxml2 HTML parser with cssselect and native XPath"""
+    name = "lxml"
+
+    def parse(self, markup: Markup, encoding: Optional[str] = None) -> ParsedDocument:
+        if isinstance(markup, str):
+            markup, encoding = markup.encode('utf-8'), 'utf-8'
+        parse = self.incremental(encoding)
+        parse.feed(markup)
+        return parse.close()
+
+    def incremental(self, encoding: Optional[str] = None) -> IncrementalParse:
+        return LxmlIncrementalParse(self, encoding)
+
+    def compile(self, selector: str, selector_type: Any = 'css') -> Any:
+        if _selector_type(selector_type) == 'xpath':
+            return etree.XPath(selector)
+        return CSSSelector(selector, translator='html')
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax bindings to the lexbor HTML5 parser"""
+    name = "selectolax"
+
+    def parse(self, markup: Markup, encoding: Optional[str] = None) -> ParsedDocument:
+        if isinstance(markup, bytes) and encoding:
+            markup = markup.decode(encoding, errors='replace')
+        return SelectolaxDocument(LexborHTMLParser(markup))
+
+    def compile(self, selector: str, selector_type: Any = 'css') -> Any:
+        if _selector_type(selector_type) == 'xpath':
+            raise ValueError("XPath is not supported by the selectolax parser")
+        # Validate now so a broken selector fails once, not on every page
+        LexborHTMLParser("<html></html>").css(selector)
+        return selector
+
+_BACKENDS: Dict[str, ParserBackend] = {}
+
+def get_parser_backend(name: Optional[str] = None, needs_xpath: bool = False) -> ParserBackend:
+    """
+    Parser backend for a domain's ``parser`` setting, falling back to the
+    deployment-wide PARSER_BACKEND. Configs with XPath rules always get
+    lxml so every rule is evaluated against the same tree.
+    """
+    name = name or settings.PARSER_BACKEND
+    if needs_xpath and name != "lxml":
+        logger.debug(f"Using lxml instead of {name} for XPath rules")
+        name = "lxml"
+    if name not in PARSER_BACKENDS:
+        logger.warning(f"Unknown parser backend {name}, using lxml")
+        name = "lxml"
+    if name == "selectolax" and LexborHTMLParser is None:
+        logger.warning("selectolax is not installed, using lxml")
+        name = "lxml"
+
+    if name not in _BACKENDS:
+        backend_class = {
+            "bs4": SoupBackend,
+            "lxml": LxmlBackend,
+            "selectolax": SelectolaxBackend,
+        }[name]
+        _BACKENDS[name] = backend_class()
+    return _BACKENDS[name]
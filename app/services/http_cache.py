@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import date
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r'(?:s-maxage|max-age)\s*=\s*"?(\d+)')
+
+# Extractions kept per response; the oldest schema fingerprint is dropped first
+MAX_EXTRACTIONS_PER_ENTRY = 4
+
+# Request headers that only make a request conditional, not a different representation
+_CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+
+# ScrapedContent fields kept with a cached extraction
+EXTRACTION_FIELDS = ("title", "content", "author", "publish_date", "language", "categories", "media_files")
+
+def extraction_record(content: Any) -> Dict[str, Any]:
+    """JSON-safe ScrapedContent kwargs of an extraction result"""
+    record = {name: getattr(content, name, None) for name in EXTRACTION_FIELDS}
+    if isinstance(record["publish_date"], date):
+        record["publish_date"] = record["publish_date"].isoformat()
+    record["categories"] = list(record["categories"] or [])
+    record["media_files"] = {
+        media_type: list(urls) for media_type, urls in (record["media_files"] or {}).items()
+    }
+    return record
+
+def schema_fingerprint(schema: Any) -> str:
+    """Stable key for the rules a cached extraction was produced with"""
+    payload = json.dumps(schema, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+@dataclass
+class CacheEntry:
+    """Metadata of one cached response"""
+    url: str
+    stored_at: float
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    cache_control: str = ""
+    expires_at: Optional[float] = None
+    encoding: Optional[str] = None
+    extractions: Dict[str, Dict] = field(default_factory=dict)
+
+    def is_fresh(self) -> bool:
+        """Whether the entry can be used without asking the origin"""
+        if 'no-cache' in self.cache_control:
+            return False
+        return self.expires_at is not None and time.time() < self.expires_at
+
+    def to_json(self) -> bytes:
+        return json.dumps(asdict(self)).encode('utf-8')
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Validators to send with a revalidation request"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class HttpCache:
+    """
+    Size-bounded on-disk cache of HTTP responses.
+
+    Each URL and request header set is stored as ``<sha256>.json``
+    (validators, freshness and up to MAX_EXTRACTIONS_PER_ENTRY extraction
+    results produced from the body, keyed by schema fingerprint) plus
+    ``<sha256>.body``. Keying on the request headers keeps responses that
+    ``Vary`` on them apart; ``Vary: *`` responses are not stored. Entries
+    honour ``Cache-Control`` (``no-store``, ``no-cache``,
+    ``max-age``/``s-maxage``) and ``Expires``,
+    are revalidated with ``If-None-Match``/``If-Modified-Since`` and are
+    evicted least-recently-used first once both files of all entries
+    exceed ``max_bytes``. File I/O runs in a thread; the index is built
+    on first use.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or settings.HTTP_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or settings.HTTP_CACHE_MAX_BYTES
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._index_lock = asyncio.Lock()
+        self._indexed = False
+
+    def _key(self, url: str, request_headers: Optional[Mapping[str, str]] = None) -> str:
+        varying = sorted(
+            (name.lower(), value) for name, value in (request_headers or {}).items()
+            if name.lower() not in _CONDITIONAL_HEADERS
+        )
+        payload = url if not varying else url + "\n" + json.dumps(varying)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.body"
+
+    async def _ensure_index(self):
+        if self._indexed:
+            return
+        async with self._index_lock:
+            if not self._indexed:
+                for key, size in await asyncio.to_thread(self._scan):
+                    self._lru[key] = size
+                    self._total_bytes += size
+                self._indexed = True
+
+    def _scan(self) -> Iterable[Tuple[str, int]]:
+        """(key, bytes on disk) of every complete entry, least recently used first"""
+        entries = []
+        for meta_path in self.cache_dir.glob("*.json"):
+            key = meta_path.stem
+            try:
+                meta = meta_path.stat()
+                body = self._body_path(key).stat()
+            except FileNotFoundError:
+                self._unlink([key])
+                continue
+            entries.append((meta.st_mtime, key, meta.st_size + body.st_size))
+        return [(key, size) for _, key, size in sorted(entries)]
+
+    def _write_atomic(self, path: Path, data: bytes):
+        # Unique per writer so concurrent writes of one entry never share a temp file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, key: str) -> CacheEntry:
+        """Read an entry and touch it so the LRU order survives restarts"""
+        meta_path = self._meta_path(key)
+        entry = CacheEntry(**json.loads(meta_path.read_bytes()))
+        os.utime(meta_path)
+        return entry
+
+    def _write_entry(self, key: str, entry: CacheEntry, body: Optional[bytes] = None) -> int:
+        """Write an entry (and its body); returns the bytes both files take"""
+        meta = entry.to_json()
+        if body is not None:
+            self._write_atomic(self._body_path(key), body)
+        self._write_atomic(self._meta_path(key), meta)
+        return len(meta) + entry.size
+
+    def _unlink(self, keys: Iterable[str]):
+        for key in keys:
+            self._meta_path(key).unlink(missing_ok=True)
+            self._body_path(key).unlink(missing_ok=True)
+
+    async def _save(self, key: str, entry: CacheEntry, body: Optional[bytes] = None):
+        size = await asyncio.to_thread(self._write_entry, key, entry, body)
+        self._total_bytes += size - self._lru.pop(key, 0)
+        self._lru[key] = size
+        await self._evict()
+
+    async def get(self, url: str,
+                  request_headers: Optional[Mapping[str, str]] = None) -> Optional[CacheEntry]:
+        """Look up the cached entry for a URL and mark it recently used"""
+        await self._ensure_index()
+        key = self._key(url, request_headers)
+        if key not in self._lru:
+            return None
+        try:
+            entry = await asyncio.to_thread(self._read_meta, key)
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry for {url}: {str(e)}")
+            await self._remove([key])
+            return None
+        if key in self._lru:
+            self._lru.move_to_end(key)
+        return entry
+
+    async def read_body(self, url: str,
+                        request_headers: Optional[Mapping[str, str]] = None) -> Optional[bytes]:
+        """Cached raw body of a URL"""
+        try:
+            return await asyncio.to_thread(self._body_path(self._key(url, request_headers)).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def put(self, url: str, body: bytes, headers: Mapping[str, str],
+                  encoding: Optional[str] = None,
+                  request_headers: Optional[Mapping[str, str]] = None) -> Optional[CacheEntry]:
+        """
+        Store a response if its headers allow it; returns the new entry.
+        An uncacheable response drops the older entry, which is now stale.
+        """
+        await self._ensure_index()
+        key = self._key(url, request_headers)
+        entry = self._entry_for(url, body, headers, encoding)
+        if entry is None:
+            if key in self._lru:
+                await self._remove([key])
+            return None
+        await self._save(key, entry, body)
+        return entry
+
+    def _entry_for(self, url: str, body: bytes, headers: Mapping[str, str],
+                   encoding: Optional[str]) -> Optional[CacheEntry]:
+        """Entry for a response, or None when it must not be cached"""
+        cache_control = headers.get('Cache-Control', '').lower()
+        entry = CacheEntry(
+            url=url,
+            stored_at=time.time(),
+            size=0,
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            cache_control=cache_control,
+            encoding=encoding
+        )
+        entry.expires_at = self._expires_at(entry.stored_at, cache_control, headers.get('Expires'))
+
+        if 'no-store' in cache_control or 'private' in cache_control:
+            return None
+        if '*' in headers.get('Vary', ''):
+            return None
+        if not (entry.etag or entry.last_modified or entry.expires_at):
+            return None
+
+        entry.size = len(body)
+        if entry.size > self.max_bytes:
+            return None
+        return entry
+
+    async def revalidated(self, url: str, entry: CacheEntry, headers: Mapping[str, str],
+                          request_headers: Optional[Mapping[str, str]] = None) -> CacheEntry:
+        """Refresh freshness and validators after a 304 Not Modified"""
+        entry.stored_at = time.time()
+        entry.etag = headers.get('ETag', entry.etag)
+        entry.last_modified = headers.get('Last-Modified', entry.last_modified)
+        entry.cache_control = headers.get('Cache-Control', entry.cache_control).lower()
+        entry.expires_at = self._expires_at(entry.stored_at, entry.cache_control, headers.get('Expires'))
+        key = self._key(url, request_headers)
+        if key in self._lru:
+            await self._save(key, entry)
+        return entry
+
+    async def store_extraction(self, url: str, entry: CacheEntry, schema_key: str, result: Dict,
+                               request_headers: Optional[Mapping[str, str]] = None):
+        """Attach an extraction result (``extraction_record`` form) to a cached response"""
+        key = self._key(url, request_headers)
+        if key not in self._lru:
+            return
+        entry.extractions.pop(schema_key, None)
+        entry.extractions[schema_key] = result
+        while len(entry.extractions) > MAX_EXTRACTIONS_PER_ENTRY:
+            del entry.extractions[next(iter(entry.extractions))]
+        await self._save(key, entry)
+
+    def _expires_at(self, stored_at: float, cache_control: str,
+                    expires: Optional[str]) -> Optional[float]:
+        match = _MAX_AGE.search(cache_control)
+        if match:
+            return stored_at + int(match.group(1))
+        if expires:
+            try:
+                return parsedate_to_datetime(expires).timestamp()
+            except (TypeError, ValueError):
+                return None
+        return None
+
+    async def _remove(self, keys: Iterable[str]):
+        keys = list(keys)
+        for key in keys:
+            self._total_bytes -= self._lru.pop(key, 0)
+        await asyncio.to_thread(self._unlink, keys)
+
+    async def _evict(self):
+        """Drop least recently used entries until the cache fits"""
+        evicted = []
+        total = self._total_bytes
+        for key, size in self._lru.items():
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+        if evicted:
+            await self._remove(evicted)
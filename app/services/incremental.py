@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from lxml import etree
+from .extraction_plan import MEDIA_TYPES, ExtractionPlan
+from .extraction_executor import scraped_fields
+from .fetcher import AsyncFetcher
+from .html_parser import LxmlDocument
+from .structured_data import extract_structured
+
+logger = logging.getLogger(__name__)
+
+class _MediaScope:
+    """Progress of one media selector towards the end of its container"""
+
+    def __init__(self, test: Any):
+        self.test = test
+        self.container: Optional[etree._Element] = None
+        self.done = False
+
+class StreamingExtractor:
+    """
+    Evaluates a plan's rules while the body is still downloading.
+
+    Chunks are pushed into an lxml HTMLPullParser. Selectors are matched
+    on each element's start tag (ancestors and preceding siblings are
+    already known, so document order is preserved); attribute values are
+    taken right away and text values when the element closes.
+
+    With ``structured`` on, the <head> is buffered and scanned for
+    JSON-LD/OpenGraph once it ends; those fields win over selectors, as
+    in ``extract_page``. ``feed`` returns True once the rest of the page
+    can be skipped: every field has a value and every media rule is done.
+    A media selector confined to a container (``article img``) is done
+    when the first such container closes; any other one at ``</body>``.
+    So media in a repeated container later on the page (a second
+    ``article``) is not collected when streaming.
+    """
+
+    def __init__(self, plan: ExtractionPlan, encoding: Optional[str] = None,
+                 structured: bool = False):
+        self.plan = plan
+        self.encoding = encoding
+        self.matcher = plan.start_tag_matcher()
+        self.parser = etree.HTMLPullParser(events=('start', 'end'), encoding=encoding)
+        self.document: Optional[LxmlDocument] = None
+        self._first: Dict[str, Any] = {}
+        self._values: Dict[str, Optional[str]] = {}
+        self._open: Dict[Any, List[Any]] = {}
+        self._media: Dict[str, List[str]] = {media_type: [] for media_type in MEDIA_TYPES}
+        self._scopes: Dict[str, List[_MediaScope]] = {
+            rule.name: [_MediaScope(test) for test in self.matcher.media_scopes.get(rule.name, [])]
+            for rule in plan.media
+        }
+        self._body_closed = False
+        # Head bytes buffered for the structured data scan; None once it ran
+        self._head: Optional[bytearray] = bytearray() if structured else None
+        self._structured: Dict[str, Any] = {}
+
+    @staticmethod
+    def supports(plan: ExtractionPlan) -> bool:
+        """Whether all of the plan's rules can be matched on start tags"""
+        return plan.start_tag_matcher() is not None
+
+    @property
+    def complete(self) -> bool:
+        """Whether the rest of the page can no longer change the result"""
+        if self._head is not None:
+            return False
+        if not all(rule.name in self._values or rule.name in self._structured
+                   for rule in self.plan.fields):
+            return False
+        return self._body_closed or all(
+            scope.done for scopes in self._scopes.values() for scope in scopes
+        )
+
+    def feed(self, chunk: bytes) -> bool:
+        """Parse a chunk; returns True when the rest of the page can be skipped"""
+        if self._head is not None:
+            self._head.extend(chunk)
+        self.parser.feed(chunk)
+        self._handle_events()
+        return self.complete
+
+    def _handle_events(self):
+        for event, element in self.parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            if event == 'start':
+                self._on_start(element)
+            else:
+                self._on_end(element)
+
+    def _on_start(self, element: etree._Element):
+        if self.document is None:
+            self.document = LxmlDocument(element.getroottree().getroot())
+        if element.tag == 'body':
+            self._scan_structured()
+        fields, media = self.matcher.match_element(element, self._first)
+        for rule in fields:
+            if rule.name in self._structured:
+                continue
+            if rule.attribute:
+                self._values[rule.name] = self.plan.field_value(self.document, rule, [element])
+            else:
+                self._open.setdefault(element, []).append(rule)
+        for rule in media:
+            self._media[rule.name].extend(self.plan.media_urls(self.document, rule, [element]))
+        for scopes in self._scopes.values():
+            for scope in scopes:
+                if scope.test and scope.container is None and scope.test(element):
+                    scope.container = element
+
+    def _on_end(self, element: etree._Element):
+        for rule in self._open.pop(element, ()):
+            self._values[rule.name] = self.plan.field_value(self.document, rule, [element])
+        for scopes in self._scopes.values():
+            for scope in scopes:
+                if scope.container is element:
+                    scope.done = True
+        if element.tag == 'head':
+            self._scan_structured()
+        elif element.tag == 'body':
+            self._body_closed = True
+
+    def _scan_structured(self):
+        """Read structured data from the buffered head, once"""
+        if self._head is None:
+            return
+        head, self._head = bytes(self._head), None
+        self._structured = extract_structured(head, self.encoding)
+
+    def result(self) -> Dict[str, Any]:
+        """ScrapedContent kwargs from what has been extracted so far"""
+        if not self.complete:
+            # The whole body was read; flush the parser to close open elements
+            try:
+                self.parser.close()
+            except etree.XMLSyntaxError:
+                pass
+            self._handle_events()
+            self._scan_structured()
+        structured = dict(self._structured)
+        structured_media = structured.pop("media_files", {})
+        content = {rule.name: self._values.get(rule.name) for rule in self.plan.fields}
+        content.update(structured)
+        media_files = {media_type: list(urls) for media_type, urls in self._media.items()}
+        for media_type, urls in structured_media.items():
+            media_files[media_type] = list(dict.fromkeys(media_files.get(media_type, []) + urls))
+        return scraped_fields(content, media_files)
+
+async def stream_extract(fetcher: AsyncFetcher, url: str, plan: ExtractionPlan,
+                         structured: bool = False, **stream_kwargs) -> Dict[str, Any]:
+    """
+    Fetch a page and extract it incrementally, cancelling the download as
+    soon as the rest of the page cannot change the result. Returns
+    ScrapedContent kwargs.
+
+    The parser keeps state across chunks, so it cannot move to the
+    extraction process pool; each chunk is parsed in a thread instead,
+    keeping the event loop free.
+    """
+    async with fetcher.stream(url, **stream_kwargs) as stream:
+        extractor = StreamingExtractor(plan, stream.encoding, structured)
+        async for chunk in stream.iter_chunks():
+            if await asyncio.to_thread(extractor.feed, chunk):
+                logger.info(f"All rules satisfied after {stream.bytes_read} bytes of {url}, "
+                            "cancelling download")
+                stream.abort()
+                break
+    return await asyncio.to_thread(extractor.result)
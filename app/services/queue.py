@@ -1,79 +1,194 @@
 import asyncio
 import uuid
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlparse
 import logging
-from ..models.task import TaskStatus, TaskResponse
-from ..services.storage import Storage
-from ..services.crawler import CrawlerService
+from ..models.task import TaskStatus, TaskInfo
+from ..services.storage_service import StorageService
+from ..services.scraper_service import ScraperService
+from ..services.worker_pool import Job, WorkerPool
+from ..services.retry_scheduler import RetryScheduler, backoff_delay, is_retryable, retry_after
+from ..services.result_cache import ResultCache, request_key
+from ..core.exceptions import QueueFullError
+from ..core.settings import settings
 
 logger = logging.getLogger(__name__)
 
 class QueueManager:
-    def __init__(self):
-        self.storage = Storage()
-        self.crawler = CrawlerService()
-        self.tasks: Dict[str, asyncio.Task] = {}
+    """
+    In-process task queue shared by the API endpoints: tasks are stored
+    through StorageService and scraped by a bounded WorkerPool, with
+    delayed retries, in-flight deduplication and a recent-result cache.
+    """
+
+    def __init__(self, storage: StorageService, scraper: ScraperService):
+        self.storage = storage
+        self.scraper = scraper
+        self.pool = WorkerPool(self._process_task)
+        self.retries = RetryScheduler(lambda job: self.pool.submit(job, bounded=False))
+        self.results = ResultCache()
+        # Request key -> id of the task currently scraping it
+        self.in_flight: Dict[str, str] = {}
+        # Queue slots promised to tasks that are still being stored
+        self._reserved = 0
     
     async def create_task(self, url: str, headers: Optional[Dict] = None,
-                         timeout: int = 30) -> str:
+                         options: Optional[Dict] = None) -> str:
         """
-        Create and queue a new scraping task
+        Create and queue a new scraping task.
+        
+        A URL that is already being scraped returns the running task's id,
+        and one scraped within RESULT_CACHE_TTL with the current config gets
+        a completed task marked ``cached``. Raises QueueFullError when the
+        queue is at QUEUE_MAX_SIZE.
         """
-        task_id = str(uuid.uuid4())
+        task_id = (await self.create_tasks([(url, headers, options)]))[0]
+        if task_id is None:
+            raise QueueFullError(f"Task queue is full ({self.pool.max_queue} pending)")
+        return task_id
+    
+    async def create_tasks(self, requests: List[Tuple[str, Optional[Dict], Optional[Dict]]],
+                           batch_id: Optional[str] = None) -> List[Optional[str]]:
+        """
+        Create tasks for many (url, headers, options) requests with one
+        pipelined storage write. Returns each request's task id (an
+        in-flight task for the same URL, a cached result or a new queued
+        task), or None where the queue was full. With ``batch_id`` the ids
+        are recorded as the batch's members.
+        """
+        # Look up config versions first so the loop below runs without yielding
+        hosts = list({urlparse(url).netloc for url, _, _ in requests})
+        versions = dict(zip(hosts, await asyncio.gather(*map(self._config_version, hosts))))
         
-        # Create task metadata
-        task_data = TaskResponse(
-            task_id=task_id,
-            status=TaskStatus.QUEUED,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
+        now = datetime.utcnow()
+        task_ids: List[Optional[str]] = []
+        tasks: List[TaskInfo] = []
+        jobs: List[Job] = []
+        capacity = self.pool.max_queue - self.pool.pending - self._reserved
         
-        # Store task data
-        await self.storage.save_task(task_id, task_data)
+        for url, headers, options in requests:
+            key = request_key(url, headers, options)
+            existing = self.in_flight.get(key)
+            if existing:
+                logger.info(f"Attaching {url} to in-flight task {existing}")
+                task_ids.append(existing)
+                continue
+            
+            task = TaskInfo(
+                task_id=str(uuid.uuid4()),
+                url=url,
+                status=TaskStatus.QUEUED,
+                created_at=now,
+                updated_at=now,
+                headers=headers,
+                options=options,
+                batch_id=batch_id
+            )
+            
+            # Serve a recent result for the same page and config version
+            cached = self.results.get(key, versions[urlparse(url).netloc])
+            if cached is not None:
+                task.status = TaskStatus.COMPLETED
+                task.completed_at = now
+                task.result = cached
+                task.cached = True
+            elif capacity <= 0:
+                task_ids.append(None)
+                continue
+            else:
+                capacity -= 1
+                self.in_flight[key] = task.task_id
+                jobs.append(Job(task.task_id, url, {"headers": headers, "options": options, "key": key}))
+            tasks.append(task)
+            task_ids.append(task.task_id)
         
-        # Create and store asyncio task
-        self.tasks[task_id] = asyncio.create_task(
-            self._process_task(task_id, url, headers, timeout)
-        )
+        # Store task data, then queue for the worker pool
+        self._reserved += len(jobs)
+        try:
+            await self.storage.save_tasks(
+                tasks, batch_id, [task_id for task_id in task_ids if task_id]
+            )
+        except Exception:
+            for job in jobs:
+                self._finish(job.payload["key"], job.task_id)
+            raise
+        finally:
+            self._reserved -= len(jobs)
+        for job in jobs:
+            # Capacity was checked above
+            self.pool.submit(job, bounded=False)
         
-        return task_id
+        return task_ids
     
-    async def get_task(self, task_id: str) -> Optional[TaskResponse]:
+    async def get_task(self, task_id: str) -> Optional[TaskInfo]:
         """
         Get task status and result
         """
         return await self.storage.get_task(task_id)
     
-    async def _process_task(self, task_id: str, url: str,
-                           headers: Optional[Dict], timeout: int):
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight tasks, latency and waiting retries"""
+        return {
+            **self.pool.metrics(),
+            "retries": self.retries.metrics(),
+            "results": self.results.metrics(),
+            "in_flight_urls": len(self.in_flight),
+        }
+    
+    async def close(self):
+        """Stop the worker pool and the retry timer"""
+        await self.retries.close()
+        await self.pool.close()
+    
+    async def _process_task(self, job: Job):
         """
-        Process a scraping task with retries
+        Process one attempt of a scraping task. A retryable failure is
+        handed to the retry scheduler with a jittered backoff so the
+        worker moves on instead of sleeping through the delay.
         """
-        max_attempts = 3
-        attempt = 0
-        
-        while attempt < max_attempts:
-            try:
-                # Update status to processing
-                await self._update_status(task_id, TaskStatus.PROCESSING)
-                
-                # Attempt scraping
-                result = await self.crawler.scrape(url, headers, timeout)
-                
-                # Update task with success
-                await self._update_success(task_id, result)
+        try:
+            # Update status to processing
+            await self._update_status(job.task_id, TaskStatus.PROCESSING)
+            
+            # Attempt scraping
+            result = await self.scraper.scrape(job.url, job.payload["headers"], job.payload["options"])
+            
+            # Update task with success
+            self.results.put(job.payload["key"], await self._config_version(job.domain), result)
+            self._finish(job.payload["key"], job.task_id)
+            await self._update_success(job.task_id, result)
+            
+        except Exception as e:
+            job.attempt += 1
+            if not is_retryable(e) or job.attempt >= settings.MAX_RETRIES:
+                self._finish(job.payload["key"], job.task_id)
+                await self._update_failure(job.task_id, str(e))
                 return
-                
-            except Exception as e:
-                attempt += 1
-                if attempt >= max_attempts:
-                    await self._update_failure(task_id, str(e))
-                    return
-                
-                # Wait with exponential backoff before retry
-                await asyncio.sleep(60 * (2 ** attempt))
+            
+            # Server's Retry-After wins over our own backoff when it is longer
+            delay = max(backoff_delay(job.attempt), retry_after(e) or 0)
+            logger.warning(
+                f"Attempt {job.attempt} for {job.url} failed: {str(e)}; retrying in {delay:.0f}s"
+            )
+            await self._update_status(job.task_id, TaskStatus.QUEUED)
+            self.retries.schedule(job, delay)
+    
+    def _finish(self, key: str, task_id: str):
+        """Stop attaching new submissions of a request to this task"""
+        if self.in_flight.get(key) == task_id:
+            del self.in_flight[key]
+    
+    async def _config_version(self, host: str) -> Optional[Any]:
+        """
+        Version of the config the scraper uses for a host, part of the result
+        cache key, so regenerating the config makes older results miss
+        """
+        try:
+            return await self.scraper.config_service.resolver.version(host)
+        except Exception as e:
+            logger.warning(f"Could not read config version for {host}: {str(e)}")
+            return None
     
     async def _update_status(self, task_id: str, status: TaskStatus):
         """Update task status"""
@@ -0,0 +1,255 @@
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+from ..utils.domains import registrable_domain
+
+logger = logging.getLogger(__name__)
+
+# Named profiles usable in DomainConfig.block_resources
+BLOCK_PROFILES: Dict[str, List[str]] = {
+    "none": [],
+    "media": ["image", "media", "font"],
+    "lean": ["image", "media", "font", "stylesheet", "tracking"],
+    "strict": ["image", "media", "font", "stylesheet", "tracking", "third_party"],
+}
+
+RESOURCE_CATEGORIES = {"image", "media", "font", "stylesheet", "script", "tracking", "third_party"}
+
+TRACKING_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "doubleclick.net",
+    "amazon-adsystem.com",
+    "adnxs.com",
+    "facebook.net",
+    "scorecardresearch.com",
+    "chartbeat.com",
+    "chartbeat.net",
+    "quantserve.com",
+    "taboola.com",
+    "outbrain.com",
+    "hotjar.com",
+    "segment.io",
+    "nr-data.net",
+)
+
+def _extension_patterns(*extensions: str) -> List[str]:
+    """Patterns for URLs ending in an extension, with or without a query string"""
+    return [pattern for ext in extensions for pattern in (f"*.{ext}", f"*.{ext}?*")]
+
+# URL patterns used where the browser can only block by URL (Selenium/CDP)
+URL_PATTERNS: Dict[str, List[str]] = {
+    "image": _extension_patterns("jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico"),
+    "media": _extension_patterns("mp4", "webm", "mp3", "m3u8", "ogg"),
+    "font": _extension_patterns("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": _extension_patterns("css"),
+    "script": _extension_patterns("js", "mjs"),
+    "tracking": [f"*{host}*" for host in TRACKING_HOSTS],
+}
+
+# Categories Chrome's URL blocklist cannot express; only the Playwright renderer enforces them
+URL_UNBLOCKABLE = {"third_party"}
+
+def resolve_block_categories(block_resources: Optional[Iterable[str]]) -> Set[str]:
+    """Expand profile names and categories into a set of categories"""
+    categories: Set[str] = set()
+    for entry in block_resources or []:
+        if entry in BLOCK_PROFILES:
+            categories.update(BLOCK_PROFILES[entry])
+        elif entry in RESOURCE_CATEGORIES:
+            categories.add(entry)
+        else:
+            logger.warning(f"Unknown resource blocking entry: {entry}")
+    return categories
+
+def blocked_url_patterns(categories: Set[str]) -> List[str]:
+    """URL patterns for Chrome's Network.setBlockedURLs"""
+    patterns = []
+    for category in sorted(categories):
+        patterns.extend(URL_PATTERNS.get(category, []))
+    return patterns
+
+def _is_tracking_host(host: str) -> bool:
+    return any(host == t or host.endswith("." + t) for t in TRACKING_HOSTS)
+
+def request_category(resource_type: str, url: str, page_host: str) -> Set[str]:
+    """Categories a browser request belongs to"""
+    host = urlparse(url).hostname or ""
+    categories = set()
+    if resource_type in ("image", "media", "font", "stylesheet", "script"):
+        categories.add(resource_type)
+    if _is_tracking_host(host):
+        categories.add("tracking")
+    if host and page_host and registrable_domain(host) != registrable_domain(page_host):
+        categories.add("third_party")
+    return categories
+
+@dataclass
+class RenderReport:
+    """Per-page accounting of what resource blocking saved"""
+    url: str
+    render_time_ms: float = 0.0
+    loaded_requests: int = 0
+    bytes_loaded: int = 0
+    blocked_requests: int = 0
+    blocked_by_type: Dict[str, int] = field(default_factory=dict)
+    estimated_bytes_saved: int = 0
+    estimated_time_saved_ms: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "url": self.url,
+            "render_time_ms": round(self.render_time_ms, 1),
+            "loaded_requests": self.loaded_requests,
+            "bytes_loaded": self.bytes_loaded,
+            "blocked_requests": self.blocked_requests,
+            "blocked_by_type": self.blocked_by_type,
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "estimated_time_saved_ms": round(self.estimated_time_saved_ms, 1),
+        }
+
+    def estimate_savings(self, stats: "ResourceStats"):
+        """Estimate what the blocked requests would have cost from observed averages"""
+        self.estimated_bytes_saved = sum(
+            count * stats.average(resource_type)
+            for resource_type, count in self.blocked_by_type.items()
+        )
+        if self.bytes_loaded and self.render_time_ms:
+            throughput = self.bytes_loaded / self.render_time_ms
+            self.estimated_time_saved_ms = self.estimated_bytes_saved / throughput
+
+class ResourceStats:
+    """
+    Running average response size per resource type, learned from
+    requests that were allowed through. Used to estimate what the
+    blocked requests would have cost.
+    """
+
+    def __init__(self):
+        self._bytes: Dict[str, int] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, resource_type: str, size: int):
+        self._bytes[resource_type] = self._bytes.get(resource_type, 0) + size
+        self._counts[resource_type] = self._counts.get(resource_type, 0) + 1
+
+    def average(self, resource_type: str) -> int:
+        count = self._counts.get(resource_type, 0)
+        return self._bytes[resource_type] // count if count else 0
+
+class PageBlocker:
+    """
+    Playwright route handler enforcing a blocking profile for one page
+    and collecting the numbers for its RenderReport.
+    """
+
+    def __init__(self, url: str, categories: Set[str], stats: ResourceStats):
+        self.categories = categories
+        self.stats = stats
+        self.page_host = urlparse(url).hostname or ""
+        self.report = RenderReport(url=url)
+        self._started = time.perf_counter()
+
+    async def handle_route(self, route):
+        request = route.request
+        matched = request_category(request.resource_type, request.url, self.page_host)
+        blocked = matched & self.categories
+        if blocked and request.resource_type != "document":
+            self.report.blocked_requests += 1
+            key = request.resource_type
+            self.report.blocked_by_type[key] = self.report.blocked_by_type.get(key, 0) + 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def handle_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        self.report.loaded_requests += 1
+        self.report.bytes_loaded += max(size, 0)
+        self.stats.record(request.resource_type, max(size, 0))
+
+    def finish(self) -> RenderReport:
+        """Close the report, estimating savings from observed averages"""
+        report = self.report
+        report.render_time_ms = (time.perf_counter() - self._started) * 1000
+        report.estimate_savings(self.stats)
+        return report
+
+_unenforced_warned: Set[str] = set()
+
+def apply_selenium_blocking(driver, categories: Set[str], url: str = ""):
+    """
+    Configure Chrome's network blocking for the next page load.
+
+    Always called so a pooled browser never inherits the previous
+    domain's profile. Chrome can only block by URL here, so categories
+    in URL_UNBLOCKABLE are not enforced; a warning is logged once per
+    domain (set HEADLESS_RENDER_MODE=contexts to enforce them). Pending
+    performance log entries are dropped so the next report only sees
+    this page's requests.
+    """
+    unenforced = categories & URL_UNBLOCKABLE
+    domain = registrable_domain(urlparse(url).hostname or "")
+    if unenforced and domain not in _unenforced_warned:
+        _unenforced_warned.add(domain)
+        logger.warning(
+            f"Blocking {sorted(unenforced)} for {domain} needs the contexts renderer; "
+            "the browser pool loads those requests"
+        )
+    try:
+        driver.get_log("performance")
+    except Exception:
+        pass
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns(categories)})
+
+def selenium_report(driver, url: str, started: float, stats: ResourceStats) -> RenderReport:
+    """
+    Build a RenderReport from the page's network events in Chrome's
+    performance log (``goog:loggingPrefs``), falling back to Resource
+    Timing entries, which only cover loaded requests
+    """
+    report = RenderReport(url=url, render_time_ms=(time.perf_counter() - started) * 1000)
+    try:
+        events = [json.loads(entry["message"])["message"] for entry in driver.get_log("performance")]
+    except Exception as e:
+        logger.debug(f"No performance log for {url}, using resource timings: {str(e)}")
+        events = None
+
+    if events is None:
+        try:
+            entries = driver.execute_script(
+                "return performance.getEntriesByType('resource')"
+                ".map(e => e.transferSize || 0)"
+            )
+            report.loaded_requests = len(entries)
+            report.bytes_loaded = int(sum(entries))
+        except Exception as e:
+            logger.debug(f"Could not read resource timings for {url}: {str(e)}")
+        return report
+
+    types: Dict[str, str] = {}
+    for event in events:
+        method, params = event.get("method"), event.get("params", {})
+        if method == "Network.responseReceived":
+            types[params["requestId"]] = params.get("type", "other").lower()
+        elif method == "Network.loadingFinished":
+            resource_type = types.get(params["requestId"], "other")
+            size = int(params.get("encodedDataLength", 0))
+            report.loaded_requests += 1
+            report.bytes_loaded += size
+            stats.record(resource_type, size)
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            resource_type = params.get("type", "other").lower()
+            report.blocked_requests += 1
+            report.blocked_by_type[resource_type] = report.blocked_by_type.get(resource_type, 0) + 1
+    report.estimate_savings(stats)
+    return report
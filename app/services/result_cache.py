@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a link was shared
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def canonical_url(url: str) -> str:
+    """
+    One spelling for URLs that name the same page: lowercase scheme and
+    host, no default port, fragment or tracking parameters, remaining
+    query parameters sorted and an empty path as ``/``.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in TRACKING_PARAMS and not name.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+def request_key(url: str, headers: Optional[Dict] = None, options: Optional[Dict] = None) -> str:
+    """
+    Canonical URL, plus a fingerprint of custom headers and scrape options
+    since they can change the result
+    """
+    key = canonical_url(url)
+    if headers or options:
+        fingerprint = hashlib.sha1(
+            json.dumps([headers or {}, options or {}], sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+        key = f"{key}#{fingerprint}"
+    return key
+
+class ResultCache:
+    """
+    Recent scrape results by request key and the version of the config
+    that produced them, so a config change makes older results miss.
+    Entries expire after ``ttl`` seconds; the least recently used are
+    dropped beyond ``max_entries``.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.RESULT_CACHE_TTL
+        self.max_entries = max_entries or settings.RESULT_CACHE_SIZE
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, version: Any) -> Optional[Dict]:
+        """A fresh result for the key at this config version"""
+        entry = self._entries.get((key, version))
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[(key, version)]
+            self.misses += 1
+            return None
+        self._entries.move_to_end((key, version))
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: str, version: Any, result: Dict):
+        if self.ttl <= 0:
+            return
+        self._entries[(key, version)] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end((key, version))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def metrics(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .worker_pool import Job
+from ..core.exceptions import ContentRejectedError
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Client errors that describe a transient condition rather than a bad request
+RETRYABLE_CLIENT_STATUSES = {408, 425, 429}
+
+def response_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an exception (aiohttp, httpx or requests style)"""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    return status if isinstance(status, int) else None
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed scrape may succeed on a later attempt. 4xx responses
+    are final except timeouts and rate limiting; rejected content never
+    changes; server errors, timeouts and connection errors are retried.
+    """
+    if isinstance(error, ContentRejectedError):
+        return False
+    status = response_status(error)
+    if status is not None and 400 <= status < 500:
+        return status in RETRYABLE_CLIENT_STATUSES
+    return True
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds requested by a Retry-After header on the failed response, if any"""
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None)
+    value = headers.get("Retry-After") if headers else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """
+    Exponential backoff with equal jitter: half of ``base * 2**attempt``
+    plus a random share of the other half, so failures from one outage
+    do not come back in lockstep
+    """
+    base = base if base is not None else settings.RETRY_DELAY
+    cap = cap if cap is not None else settings.RETRY_MAX_DELAY
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+class RetryScheduler:
+    """
+    Holds jobs waiting for a retry in a heap ordered by due time and
+    hands them back to ``submit`` when they are due. One timer task
+    sleeps until the earliest job, so waiting retries cost a heap entry
+    instead of a worker slot and a sleeping coroutine.
+    """
+
+    def __init__(self, submit: Callable[[Job], Any]):
+        self.submit = submit
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._timer: Optional[asyncio.Task] = None
+        self.scheduled = 0
+        self.resubmitted = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, job: Job, delay: float):
+        """Resubmit ``job`` after ``delay`` seconds"""
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), job))
+        self.scheduled += 1
+        if self._timer is None or self._timer.done():
+            self._wakeup = asyncio.Event()
+            self._timer = asyncio.create_task(self._run(), name="retry-scheduler")
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, job = heapq.heappop(self._heap)
+                job.enqueued_at = now
+                try:
+                    self.submit(job)
+                    self.resubmitted += 1
+                except Exception as e:
+                    logger.error(f"Failed to resubmit job {job.task_id} for {job.url}: {str(e)}")
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        """Waiting retries and when the next one is due"""
+        return {
+            "waiting": len(self._heap),
+            "next_due_in": max(0.0, self._heap[0][0] - time.monotonic()) if self._heap else None,
+            "scheduled": self.scheduled,
+            "resubmitted": self.resubmitted,
+        }
+
+    async def close(self):
+        """Stop the timer; waiting retries are dropped"""
+        if self._timer:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
@@ -1,53 +1,73 @@
-import json
-import os
 from urllib.parse import urlparse
 from typing import Optional
+import asyncio
 import logging
 from crawl4ai import Crawler
+from .fetcher import AsyncFetcher, FetchResult
+from .schema_inference import SchemaInferrer
+from .single_flight import SingleFlight
+from .config_cache import ConfigCache
+from .config_store import ConfigStore, get_config_store
+from .config_resolver import ConfigResolver
+from .extraction_executor import ExtractionExecutor, extraction_executor as shared_extraction_executor
+from ..core.settings import settings
 from ..models.domain_config import DomainConfig, ExtractionRule, MediaExtraction, SelectorType
+from ..utils.domains import registrable_domain
 
 logger = logging.getLogger(__name__)
 
 class SchemaGenerator:
-    def __init__(self, config_dir: str, crawler: Crawler):
+    def __init__(self, config_dir: str, crawler: Crawler,
+                 fetcher: Optional[AsyncFetcher] = None,
+                 inferrer: Optional[SchemaInferrer] = None,
+                 single_flight: Optional[SingleFlight] = None,
+                 store: Optional[ConfigStore] = None,
+                 extraction_executor: Optional[ExtractionExecutor] = None):
         self.config_dir = config_dir
         self.crawler = crawler
-        os.makedirs(config_dir, exist_ok=True)
+        self.fetcher = fetcher or AsyncFetcher()
+        self.inferrer = inferrer or SchemaInferrer()
+        # Inference parses the sample page, so it runs in the extraction process pool
+        self.extraction_executor = extraction_executor or shared_extraction_executor
+        self.single_flight = single_flight or SingleFlight(settings.REDIS_URL, prefix="config-generation")
+        self.store = store or get_config_store(config_dir=config_dir)
+        self.config_cache = ConfigCache(self.store, self._parse_config, redis_url=settings.REDIS_URL)
+        self.resolver = ConfigResolver(self.config_cache, self.extraction_executor)
     
-    def _get_config_path(self, domain: str) -> str:
-        return os.path.join(self.config_dir, f"{domain}.json")
-    
-    def load_config(self, url: str) -> Optional[DomainConfig]:
-        """Load domain configuration if it exists"""
-        domain = urlparse(url).netloc
-        config_path = self._get_config_path(domain)
+    async def load_config(self, url: str) -> Optional[DomainConfig]:
+        """
+        Load the configuration that applies to the URL's host: its own, or
+        the one shared by its registrable domain
+        """
+        host = urlparse(url).netloc
         
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    data = json.load(f)
-                return self._parse_config(data)
-            except Exception as e:
-                logger.error(f"Error loading config for {domain}: {str(e)}")
-                return None
-        return None
+        try:
+            resolved = await self.resolver.resolve(host)
+            return resolved[1] if resolved else None
+        except Exception as e:
+            logger.error(f"Error loading config for {host}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _parse_rule(rule: dict) -> ExtractionRule:
+        return ExtractionRule(
+            selector=rule["selector"],
+            selector_type=SelectorType(rule.get("selector_type", "css")),
+            attribute=rule.get("attribute"),
+            post_process=rule.get("post_process")
+        )
     
     def _parse_config(self, data: dict) -> DomainConfig:
         """Parse JSON config into DomainConfig object"""
         extraction_rules = {
-            field: ExtractionRule(
-                selector=rule["selector"],
-                selector_type=SelectorType(rule["selector_type"]),
-                attribute=rule.get("attribute"),
-                post_process=rule.get("post_process")
-            )
+            field: self._parse_rule(rule)
             for field, rule in data["extraction_rules"].items()
         }
         
         media_rules = MediaExtraction(
-            images=ExtractionRule(**data["media_rules"]["images"]),
-            videos=ExtractionRule(**data["media_rules"]["videos"]),
-            embeds=ExtractionRule(**data["media_rules"]["embeds"])
+            images=self._parse_rule(data["media_rules"]["images"]),
+            videos=self._parse_rule(data["media_rules"]["videos"]),
+            embeds=self._parse_rule(data["media_rules"]["embeds"])
         )
         
         return DomainConfig(
@@ -58,39 +78,80 @@ class SchemaGenerator:
             user_agent=data.get("user_agent"),
             proxy_config=data.get("proxy_config"),
             retry_count=data.get("retry_count", 3),
+            block_resources=data.get("block_resources", []),
+            wait_for=data.get("wait_for"),
+            fetch_mode=data.get("fetch_mode"),
+            required_fields=data.get("required_fields"),
+            max_bytes=data.get("max_bytes"),
+            parser=data.get("parser"),
+            incremental_parse=data.get("incremental_parse"),
+            structured_data=data.get("structured_data"),
+            confidence=data.get("confidence"),
             extraction_rules=extraction_rules,
             media_rules=media_rules
         )
     
-    async def generate_config(self, url: str) -> DomainConfig:
-        """Generate new configuration using Crawl4AI's LLM capabilities"""
-        domain = urlparse(url).netloc
+    async def generate_config(self, url: str, force_refresh: bool = False) -> DomainConfig:
+        """
+        Generate new configuration, inferring it locally when the page
+        follows common patterns and using Crawl4AI's LLM capabilities
+        otherwise. Concurrent calls for a registrable domain, in this
+        process or other workers, share one generation.
+        """
+        host = urlparse(url).netloc
+        
+        async def load() -> Optional[DomainConfig]:
+            return await self.load_config(url)
+        
+        return await self.single_flight.do(
+            registrable_domain(host), lambda: self._generate_config(url, host, force_refresh), load
+        )
+    
+    async def _generate_config(self, url: str, host: str, force_refresh: bool) -> DomainConfig:
+        resolved = await self.resolver.resolve(host)
+        if resolved and not force_refresh:
+            # Generated by another worker while we waited for the lease
+            return resolved[1]
+        
+        # New domains get a config shared by all their subdomains; a host
+        # whose inherited config stopped working gets its own override
+        shared_key = registrable_domain(host)
+        domain = host if resolved else shared_key
         logger.info(f"Generating new config for domain: {domain}")
         
         try:
-            # Use Crawl4AI to analyze the page and generate schema
-            schema = await self.crawler.analyze_page(
-                url,
-                fields=[
-                    "title",
-                    "content",
-                    "author",
-                    "publish_date",
-                    "language",
-                    "categories",
-                    "images",
-                    "videos",
-                    "embeds"
-                ]
-            )
-            
-            # Convert Crawl4AI schema to our config format
-            config = self._convert_schema_to_config(domain, schema)
+            page = await self._fetch_sample(url)
+            config = None
+            if page and domain == shared_key:
+                template = await self.resolver.template_for(page.body, domain, page.encoding)
+                if template:
+                    config = self._parse_config(template)
+            if config is None and page:
+                config = await self._infer_config(page, domain)
+            if config is None:
+                # Use Crawl4AI to analyze the page and generate schema
+                schema = await self.crawler.analyze_page(
+                    url,
+                    fields=[
+                        "title",
+                        "content",
+                        "author",
+                        "publish_date",
+                        "language",
+                        "categories",
+                        "images",
+                        "videos",
+                        "embeds"
+                    ]
+                )
+                
+                # Convert Crawl4AI schema to our config format
+                config = self._convert_schema_to_config(domain, schema)
             
-            # Save the config
-            config_path = self._get_config_path(domain)
-            with open(config_path, 'w') as f:
-                json.dump(config.to_dict(), f, indent=2)
+            # Save the config; the store upserts atomically so waiting workers never read a partial one
+            await asyncio.to_thread(self.store.put, domain, config.to_dict())
+            self.config_cache.invalidate(domain)
+            await self.config_cache.publish(domain)
             
             return config
             
@@ -98,6 +159,34 @@ class SchemaGenerator:
             logger.error(f"Error generating config for {domain}: {str(e)}")
             raise
     
+    async def _fetch_sample(self, url: str) -> Optional[FetchResult]:
+        """The page a config is generated from, or None if it can't be fetched"""
+        try:
+            return await self.fetcher.fetch_response(url)
+        except Exception as e:
+            logger.warning(f"Could not fetch {url} for local config generation: {str(e)}")
+            return None
+    
+    async def _infer_config(self, page: FetchResult, domain: str) -> Optional[DomainConfig]:
+        """
+        Heuristic config for the page, or None when confidence is below
+        INFERENCE_MIN_CONFIDENCE and the LLM should be asked instead
+        """
+        try:
+            inferred = await self.extraction_executor.run(
+                self.inferrer.infer, page.body, domain, page.encoding
+            )
+        except Exception as e:
+            logger.warning(f"Local schema inference failed for {domain}: {str(e)}")
+            return None
+        
+        score = inferred.score()
+        if score < settings.INFERENCE_MIN_CONFIDENCE:
+            logger.info(f"Inferred config for {domain} scored {score:.2f}, falling back to LLM")
+            return None
+        logger.info(f"Inferred config for {domain} locally (confidence {score:.2f})")
+        return inferred.config
+    
     def _convert_schema_to_config(self, domain: str, schema: dict) -> DomainConfig:
         """Convert Crawl4AI schema to DomainConfig"""
         extraction_rules = {}
@@ -0,0 +1,232 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from lxml import etree
+from .html_parser import LxmlDocument, get_parser_backend
+from .structured_data import extract_structured
+from ..core.settings import settings
+from ..models.domain_config import DomainConfig, ExtractionRule, MediaExtraction, SelectorType
+
+logger = logging.getLogger(__name__)
+
+# (selector, attribute, confidence) per field, most specific first
+FIELD_PATTERNS: Dict[str, List[Tuple[str, Optional[str], float]]] = {
+    "title": [
+        ('[itemprop="headline"]', None, 0.9),
+        ("h1.entry-title, h1.post-title, h1.article-title, h1.headline", None, 0.85),
+        ("article h1", None, 0.8),
+        ("h1", None, 0.6),
+    ],
+    "author": [
+        ('[itemprop="author"] [itemprop="name"]', None, 0.85),
+        ('[itemprop="author"]', None, 0.8),
+        ('a[rel="author"]', None, 0.8),
+        (".author-name, .byline-name, .author a, .byline a", None, 0.65),
+        (".author, .byline", None, 0.55),
+        ('meta[name="author"]', "content", 0.6),
+    ],
+    "publish_date": [
+        ('meta[property="article:published_time"]', "content", 0.9),
+        ('[itemprop="datePublished"][content]', "content", 0.9),
+        ('time[itemprop="datePublished"]', "datetime", 0.9),
+        ("article time[datetime]", "datetime", 0.75),
+        ("time[datetime]", "datetime", 0.6),
+    ],
+    "language": [
+        ("html[lang]", "lang", 0.95),
+        ('meta[http-equiv="content-language"]', "content", 0.8),
+    ],
+    "categories": [
+        ('[itemprop="articleSection"]', None, 0.8),
+        ('meta[property="article:section"]', "content", 0.8),
+        ('a[rel="tag"], a[rel="category tag"]', None, 0.75),
+        (".categories a, .category a, .tags a", None, 0.6),
+    ],
+}
+
+DEFAULT_MEDIA_RULES = {
+    "images": ("img", "src"),
+    "videos": ("video source, video", "src"),
+    "embeds": ("iframe", "src"),
+}
+
+# Class/id words that mark (or rule out) the main article container
+_POSITIVE = re.compile(r"article|content|entry|post|story|text|body|main", re.IGNORECASE)
+_NEGATIVE = re.compile(
+    r"comment|sidebar|footer|header|nav|menu|related|share|social|promo|ad-|advert|widget|cookie",
+    re.IGNORECASE
+)
+# Class names that look generated (CSS modules, hashes) do not survive deploys
+_UNSTABLE_CLASS = re.compile(r"\d{3,}|^css-|__[a-z0-9]{5,}$|^[a-z]{1,3}-[a-zA-Z0-9]{5,}$")
+_CONTAINER_TAGS = ("article", "main", "div", "section", "td")
+_MIN_CONTENT_CHARS = 500
+
+@dataclass
+class InferredSchema:
+    """A locally inferred config with a 0-1 confidence per field"""
+    config: DomainConfig
+    confidence: Dict[str, float] = field(default_factory=dict)
+
+    def score(self, required_fields: Optional[List[str]] = None) -> float:
+        """Lowest confidence among the required fields"""
+        required_fields = required_fields or settings.REQUIRED_FIELDS
+        return min((self.confidence.get(name, 0.0) for name in required_fields), default=0.0)
+
+class SchemaInferrer:
+    """
+    Deterministic schema inference from a single page, no LLM involved.
+
+    Titles, authors, dates, languages and categories are found with
+    common CMS class, itemprop and meta patterns. The article body is the
+    container holding most paragraph text, scored by text and link
+    density with a bonus for content-like class names. Every rule is
+    re-checked against the page, and fields also published as structured
+    data count as found. Callers compare ``score()`` with
+    INFERENCE_MIN_CONFIDENCE before trusting the result.
+    """
+
+    def infer(self, markup: Union[str, bytes], domain: str,
+              encoding: Optional[str] = None) -> InferredSchema:
+        document = get_parser_backend("lxml").parse(markup, encoding)
+        extraction_rules: Dict[str, ExtractionRule] = {}
+        confidence: Dict[str, float] = {}
+
+        content = self._infer_content(document)
+        if content:
+            rule, confidence["content"] = content
+            extraction_rules["content"] = rule
+
+        for name, patterns in FIELD_PATTERNS.items():
+            found = self._match_patterns(document, name, patterns)
+            if found:
+                rule, confidence[name] = found
+                extraction_rules[name] = rule
+
+        if settings.STRUCTURED_DATA:
+            # The structured data pass answers these before any selector runs
+            for name in extract_structured(markup, encoding):
+                if name != "media_files":
+                    confidence[name] = max(confidence.get(name, 0.0), 0.9)
+
+        media_rules = MediaExtraction(**{
+            media_type: ExtractionRule(
+                selector=(f"{extraction_rules['content'].selector} {selector}"
+                          if media_type == "images" and "content" in extraction_rules else selector),
+                selector_type=SelectorType.CSS,
+                attribute=attribute
+            )
+            for media_type, (selector, attribute) in DEFAULT_MEDIA_RULES.items()
+        })
+        config = DomainConfig(
+            domain=domain,
+            extraction_rules=extraction_rules,
+            media_rules=media_rules,
+            confidence={name: round(value, 2) for name, value in confidence.items()}
+        )
+        return InferredSchema(config=config, confidence=confidence)
+
+    def _match_patterns(self, document: LxmlDocument, name: str,
+                        patterns: List[Tuple[str, Optional[str], float]]) -> Optional[Tuple[ExtractionRule, float]]:
+        for selector, attribute, score in patterns:
+            elements = document.select(selector)
+            if not elements:
+                continue
+            value = document.attr(elements[0], attribute) if attribute else document.text(elements[0])
+            if not value or (name != "title" and len(value) > 200):
+                continue
+            if name == "title":
+                score = self._title_confidence(document, elements, value, score)
+            rule = ExtractionRule(selector=selector, selector_type=SelectorType.CSS,
+                                  attribute=attribute)
+            return rule, score
+        return None
+
+    @staticmethod
+    def _title_confidence(document: LxmlDocument, elements: List[Any],
+                          value: str, score: float) -> float:
+        """Trust a headline more when it is unique and agrees with <title>/og:title"""
+        if len(elements) == 1:
+            score += 0.1
+        page_titles = [document.text(element) for element in document.select("head title")]
+        page_titles += [document.attr(element, "content")
+                        for element in document.select('meta[property="og:title"]')]
+        needle = value.replace(" ", "").lower()
+        if any(needle and needle in (title or "").replace(" ", "").lower() for title in page_titles):
+            score += 0.15
+        return min(score, 0.95)
+
+    def _infer_content(self, document: LxmlDocument) -> Optional[Tuple[ExtractionRule, float]]:
+        if document.select('[itemprop="articleBody"]'):
+            return ExtractionRule(selector='[itemprop="articleBody"]', selector_type=SelectorType.CSS), 0.9
+
+        # Credit each paragraph's text to its container
+        scores: Dict[Any, float] = {}
+        total = 0
+        for paragraph in document.root.iter("p"):
+            length = len(document.text(paragraph))
+            if length < 25:
+                continue
+            total += length
+            parent = paragraph.getparent()
+            if parent is not None and parent.tag in _CONTAINER_TAGS:
+                scores[parent] = scores.get(parent, 0) + length
+        if not scores:
+            return None
+
+        ranked = []
+        for element, text_chars in scores.items():
+            weight = 1 - self._link_density(document, element)
+            marker = f"{element.get('class', '')} {element.get('id', '')}"
+            if _POSITIVE.search(marker) or element.tag in ("article", "main"):
+                weight *= 1.25
+            if _NEGATIVE.search(marker):
+                weight *= 0.3
+            ranked.append((text_chars * weight, text_chars, element))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        best_score, best_chars, best = ranked[0]
+
+        selector = self._selector_for(document, best)
+        if not selector:
+            return None
+        # Share of the page's paragraph text, less when a rival container is close
+        confidence = best_chars / total
+        if len(ranked) > 1 and ranked[1][0] > best_score * 0.5:
+            confidence *= 0.7
+        if best_chars < _MIN_CONTENT_CHARS:
+            confidence *= 0.5
+        return ExtractionRule(selector=selector, selector_type=SelectorType.CSS), min(confidence, 0.95)
+
+    @staticmethod
+    def _link_density(document: LxmlDocument, element: etree._Element) -> float:
+        text = len(document.text(element))
+        if not text:
+            return 1.0
+        links = sum(len(document.text(link)) for link in element.iter("a"))
+        return min(links / text, 1.0)
+
+    def _selector_for(self, document: LxmlDocument, element: etree._Element) -> Optional[str]:
+        """Shortest stable selector whose first match is the element"""
+        candidates = [self._compound(element)]
+        parent = element.getparent()
+        if parent is not None:
+            candidates.append(f"{self._compound(parent)} > {candidates[0]}")
+        for selector in candidates:
+            try:
+                matches = document.select(selector)
+            except Exception:
+                continue
+            if matches and matches[0] is element:
+                return selector
+        return None
+
+    @staticmethod
+    def _compound(element: etree._Element) -> str:
+        element_id = element.get("id")
+        if element_id and not _UNSTABLE_CLASS.search(element_id) and re.fullmatch(r"[A-Za-z][\w-]*", element_id):
+            return f"#{element_id}"
+        classes = [
+            name for name in (element.get("class") or "").split()
+            if re.fullmatch(r"[A-Za-z_][\w-]*", name) and not _UNSTABLE_CLASS.search(name)
+        ]
+        return element.tag + "".join(f".{name}" for name in classes[:2])
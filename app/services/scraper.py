@@ -1,14 +1,20 @@
 import logging
-from typing import Dict, Optional, Any
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from typing import Dict, Optional, Any, Union
 from datetime import datetime
 from .models.domain_config import DomainConfig, SelectorType
 from .models.scraped_content import ScrapedContent
-import requests
+from .fetcher import AsyncFetcher
+from .browser_pool import BrowserPool
+from .context_renderer import ContextRenderer
+from .wait_conditions import WaitPlan, build_wait_plan
+from .fetch_mode import FetchModeTracker, missing_fields, persist_fetch_mode, resolve_fetch_mode
+from .config_cache import ConfigCache
+from .http_cache import HttpCache, extraction_record, schema_fingerprint
+from .extraction_executor import ExtractionExecutor, extraction_executor as shared_extraction_executor, plan_schema
+from .extraction_plan import ExtractionPlan, extraction_plans
+from .incremental import StreamingExtractor, stream_extract
+from ..core.settings import settings
+from urllib.parse import urlparse
 import json
 import os
 
@@ -20,11 +26,29 @@ class Scraper:
     both API-based and direct HTML scraping methods
     """
     
-    def __init__(self, crawl4ai_client=None):
+    def __init__(self, crawl4ai_client=None, fetcher: Optional[AsyncFetcher] = None,
+                 browser_pool: Optional[BrowserPool] = None,
+                 context_renderer: Optional[ContextRenderer] = None,
+                 fetch_mode_tracker: Optional[FetchModeTracker] = None,
+                 http_cache: Optional[HttpCache] = None,
+                 extraction_executor: Optional[ExtractionExecutor] = None,
+                 config_cache: Optional[ConfigCache] = None):
         """
-        Initialize scraper with optional Crawl4AI client
+        Initialize scraper with optional Crawl4AI client, shared fetcher,
+        headless renderers, fetch mode tracker, HTTP response cache,
+        extraction process pool and the config cache learned fetch modes
+        are persisted through
         """
-        self.session = requests.Session()
+        self.fetcher = fetcher or AsyncFetcher()
+        self.browser_pool = browser_pool or BrowserPool()
+        self.context_renderer = context_renderer or ContextRenderer()
+        self.fetch_mode_tracker = fetch_mode_tracker or FetchModeTracker(
+            on_flip=persist_fetch_mode(config_cache) if config_cache else None
+        )
+        self.http_cache = http_cache
+        if self.http_cache is None and settings.HTTP_CACHE_ENABLED:
+            self.http_cache = HttpCache()
+        self.extraction_executor = extraction_executor or shared_extraction_executor
         self.crawl4ai_client = crawl4ai_client
         self._setup_logging()
     
@@ -59,6 +83,25 @@ class Scraper:
             logger.error(f"Scraping failed for {url}: {str(e)}")
             raise
     
+    async def start(self):
+        """Pre-launch the headless renderer selected by HEADLESS_RENDER_MODE"""
+        try:
+            if settings.HEADLESS_RENDER_MODE == "contexts":
+                await self.context_renderer.start()
+            else:
+                await self.browser_pool.start()
+        except Exception as e:
+            # Renders launch browsers on demand, so a cold start is not fatal
+            logger.error(f"Failed to warm headless renderer: {str(e)}")
+    
+    async def close(self):
+        """Release pooled HTTP connections and browsers"""
+        await self.fetcher.close()
+        await self.browser_pool.close()
+        await self.context_renderer.close()
+        await self.fetch_mode_tracker.close()
+        self.extraction_executor.close()
+    
     async def _scrape_with_crawl4ai(self, url: str, schema: Dict) -> ScrapedContent:
         """
         Scrape using Crawl4AI's advanced capabilities
@@ -92,179 +135,188 @@ class Scraper:
     async def _scrape_direct(self, url: str, schema: Dict, headers: Optional[Dict],
                             timeout: int) -> ScrapedContent:
         """
-        Perform direct scraping using BeautifulSoup or Selenium based on schema requirements
+        Perform direct scraping, choosing between the HTTP fetcher and a
+        headless browser according to the domain's fetch mode
         """
         try:
-            use_headless = schema.get('use_headless', False)
-            html = await self._get_page_content(url, use_headless, headers, timeout)
-            
-            # Parse the HTML
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Extract content based on schema
-            content = self._extract_content(soup, schema)
-            
-            # Extract media files
-            media_files = self._extract_media_files(soup, schema)
-            
-            # Create ScrapedContent object
-            return ScrapedContent(
-                title=content.get('title'),
-                content=content.get('content'),
-                author=content.get('author'),
-                publish_date=content.get('publish_date'),
-                language=content.get('language'),
-                categories=content.get('categories', []),
-                media_files=media_files
-            )
+            mode = resolve_fetch_mode(schema.get('fetch_mode'), schema.get('use_headless', False))
+            if mode == 'auto':
+                return await self._scrape_adaptive(url, schema, headers, timeout)
+            return await self._scrape_page(url, schema, headers, timeout,
+                                           use_headless=(mode == 'headless'))
             
         except Exception as e:
             logger.error(f"Direct scraping failed: {str(e)}")
             raise
     
-    async def _get_page_content(self, url: str, use_headless: bool,
-                              headers: Optional[Dict], timeout: int) -> str:
+    async def _scrape_adaptive(self, url: str, schema: Dict, headers: Optional[Dict],
+                               timeout: int) -> ScrapedContent:
         """
-        Get page content using either requests or Selenium
+        Try the cheap HTTP path first and escalate to headless only when
+        required fields come back empty
         """
-        if use_headless:
-            return await self._get_content_with_selenium(url, timeout)
-        else:
-            return await self._get_content_with_requests(url, headers, timeout)
+        # Learned per host: subdomains sharing a config may render differently
+        host = urlparse(url).netloc
+        required_fields = schema.get('required_fields') or settings.REQUIRED_FIELDS
+        
+        if self.fetch_mode_tracker.should_try_static(host, schema.get('use_headless', False)):
+            try:
+                content = await self._scrape_page(url, schema, headers, timeout, use_headless=False)
+                missing = missing_fields(content, required_fields)
+            except Exception as e:
+                logger.warning(f"Static fetch failed for {url}: {str(e)}")
+                missing = list(required_fields)
+            
+            self.fetch_mode_tracker.record_static(host, not missing)
+            if not missing:
+                return content
+            logger.info(f"Static fetch of {url} missed {missing}, escalating to headless")
+        
+        return await self._scrape_page(url, schema, headers, timeout, use_headless=True)
     
-    async def _get_content_with_selenium(self, url: str, timeout: int) -> str:
+    async def _scrape_page(self, url: str, schema: Dict, headers: Optional[Dict],
+                           timeout: int, use_headless: bool) -> ScrapedContent:
         """
-        Get page content using Selenium for JavaScript-heavy pages
+        Fetch a page on the given path and extract it with the schema rules
         """
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        
-        try:
-            driver = webdriver.Chrome(options=options)
-            driver.set_page_load_timeout(timeout)
-            
-            driver.get(url)
-            WebDriverWait(driver, timeout).until(
-                EC.presence_of_element_located(("tag name", "body"))
+        if not use_headless:
+            # The cache needs whole bodies to store and revalidate, so it
+            # takes precedence over streaming
+            if self.http_cache:
+                return await self._scrape_with_cache(url, schema, headers, timeout)
+            plan = self._incremental_plan(schema)
+            if plan:
+                structured = schema.get('structured_data')
+                return ScrapedContent(**await stream_extract(
+                    self.fetcher, url, plan,
+                    structured=settings.STRUCTURED_DATA if structured is None else structured,
+                    headers=headers, timeout=timeout, max_bytes=schema.get('max_bytes')
+                ))
+            response = await self.fetcher.fetch_response(
+                url, headers=headers, timeout=timeout, max_bytes=schema.get('max_bytes')
             )
-            
-            html = driver.page_source
-            return html
-            
-        finally:
-            if 'driver' in locals():
-                driver.quit()
+            return await self._extract_page(response.body, schema, response.encoding)
+        
+        html = await self._get_page_content(url, schema, headers, timeout, use_headless)
+        return await self._extract_page(html, schema)
     
-    async def _get_content_with_requests(self, url: str, headers: Optional[Dict],
-                                       timeout: int) -> str:
+    def _incremental_plan(self, schema: Dict) -> Optional[ExtractionPlan]:
         """
-        Get page content using requests for simple pages
+        The schema's plan when it should be extracted while streaming
+        (incremental_parse, defaulting to INCREMENTAL_PARSE), or None
         """
-        response = self.session.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        return response.text
+        enabled = schema.get('incremental_parse')
+        if enabled is None:
+            enabled = settings.INCREMENTAL_PARSE
+        if not enabled:
+            return None
+        plan = extraction_plans.for_schema(plan_schema(schema))
+        if not StreamingExtractor.supports(plan):
+            logger.debug(f"Rules for {schema.get('domain')} need the full tree, not streaming")
+            return None
+        return plan
     
-    def _extract_content(self, soup: BeautifulSoup, schema: Dict) -> Dict[str, Any]:
+    async def _scrape_with_cache(self, url: str, schema: Dict, headers: Optional[Dict],
+                                 timeout: int) -> ScrapedContent:
         """
-        Extract content based on schema rules
+        Static fetch through the HTTP cache. Fresh entries and 304 Not Modified
+        answers reuse the cached extraction result without parsing the page.
         """
-        content = {}
-        for field, rules in schema['extraction_rules'].items():
-            if isinstance(rules, dict):
-                content[field] = self._extract_with_rules(soup, rules)
-            else:
-                logger.warning(f"Invalid rules format for field {field}")
+        schema_key = schema_fingerprint(schema)
+        entry = await self.http_cache.get(url, headers)
+        cached_result = entry.extractions.get(schema_key) if entry else None
+        
+        if entry and cached_result and entry.is_fresh():
+            logger.info(f"Serving fresh cached extraction for {url}")
+            return ScrapedContent(**cached_result)
+        
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(entry.conditional_headers())
+        max_bytes = schema.get('max_bytes')
+        response = await self.fetcher.fetch_response(
+            url, headers=request_headers, timeout=timeout, max_bytes=max_bytes
+        )
+        
+        body = None
+        if response.status == 304 and entry:
+            entry = await self.http_cache.revalidated(url, entry, response.headers, headers)
+            if cached_result:
+                logger.info(f"{url} not modified, reusing cached extraction")
+                return ScrapedContent(**cached_result)
+            body = await self.http_cache.read_body(url, headers)
+            encoding = entry.encoding
+        
+        if body is None:
+            if response.status == 304:
+                # Cached body is gone; fetch the page unconditionally
+                response = await self.fetcher.fetch_response(
+                    url, headers=headers, timeout=timeout, max_bytes=max_bytes
+                )
+            body, encoding = response.body, response.encoding
+            entry = await self.http_cache.put(url, body, response.headers, encoding, headers)
+        
+        content = await self._extract_page(body, schema, encoding)
+        if entry:
+            await self.http_cache.store_extraction(
+                url, entry, schema_key, extraction_record(content), headers
+            )
         return content
     
-    def _extract_with_rules(self, soup: BeautifulSoup, rules: Dict) -> Optional[str]:
+    async def _extract_page(self, html: Union[str, bytes], schema: Dict,
+                            encoding: Optional[str] = None) -> ScrapedContent:
         """
-        Extract content using specified rules
+        Parse HTML and extract it with the schema rules in the extraction
+        process pool, keeping the event loop free for I/O. Raw bytes are
+        decoded by the parser using the server's charset.
         """
-        try:
-            selector_type = rules.get('selector_type', 'css')
-            selector = rules.get('selector')
-            attribute = rules.get('attribute')
-            post_process = rules.get('post_process')
-            
-            if selector_type == 'xpath':
-                elements = soup.find_all(xpath=selector)
-            else:  # css
-                elements = soup.select(selector)
-            
-            if not elements:
-                return None
-            
-            # Extract content
-            element = elements[0]
-            content = element.get(attribute) if attribute else element.get_text(strip=True)
-            
-            # Apply post-processing if specified
-            if post_process and content:
-                content = self._apply_post_process(content, post_process)
-            
-            return content
-            
-        except Exception as e:
-            logger.error(f"Extraction failed: {str(e)}")
-            return None
+        return ScrapedContent(**await self.extraction_executor.extract(html, schema, encoding))
     
-    def _extract_media_files(self, soup: BeautifulSoup, schema: Dict) -> Dict[str, list]:
+    async def _get_page_content(self, url: str, schema: Dict, headers: Optional[Dict],
+                              timeout: int, use_headless: bool) -> str:
         """
-        Extract media files based on schema rules
+        Get page content using either the async HTTP fetcher or a headless browser
         """
-        media_files = {
-            'images': [],
-            'videos': [],
-            'embeds': []
-        }
-        
-        for media_type, rules in schema.get('media_rules', {}).items():
-            try:
-                if media_type in media_files:
-                    urls = self._extract_media_urls(soup, rules)
-                    media_files[media_type].extend(urls)
-            except Exception as e:
-                logger.error(f"Media extraction failed for {media_type}: {str(e)}")
-        
-        return media_files
+        if use_headless:
+            block_resources = schema.get('block_resources')
+            wait_plan = build_wait_plan(schema.get('wait_for'), schema.get('extraction_rules'))
+            if settings.HEADLESS_RENDER_MODE == 'contexts':
+                return await self._get_content_with_contexts(
+                    url, headers, timeout, block_resources, wait_plan
+                )
+            return await self._get_content_with_selenium(url, timeout, block_resources, wait_plan)
+        else:
+            return await self._get_content_with_http(url, headers, timeout, schema.get('max_bytes'))
     
-    def _extract_media_urls(self, soup: BeautifulSoup, rules: Dict) -> list:
+    async def _get_content_with_selenium(self, url: str, timeout: int,
+                                         block_resources: Optional[list] = None,
+                                         wait_plan: Optional[WaitPlan] = None) -> str:
         """
-        Extract media URLs using specified rules
+        Get page content using a pooled Selenium browser for JavaScript-heavy pages
         """
-        urls = []
-        try:
-            selector_type = rules.get('selector_type', 'css')
-            selector = rules.get('selector')
-            attribute = rules.get('attribute', 'src')
-            
-            if selector_type == 'xpath':
-                elements = soup.find_all(xpath=selector)
-            else:  # css
-                elements = soup.select(selector)
-            
-            for element in elements:
-                url = element.get(attribute)
-                if url:
-                    urls.append(url)
-            
-            return urls
-            
-        except Exception as e:
-            logger.error(f"Media URL extraction failed: {str(e)}")
-            return []
+        return await self.browser_pool.render(
+            url, timeout, block_resources=block_resources, wait_plan=wait_plan
+        )
     
-    def _apply_post_process(self, content: str, process_type: str) -> str:
+    async def _get_content_with_contexts(self, url: str, headers: Optional[Dict],
+                                         timeout: int,
+                                         block_resources: Optional[list] = None,
+                                         wait_plan: Optional[WaitPlan] = None) -> str:
         """
-        Apply post-processing to extracted content
+        Get page content from an isolated browser context in a shared browser
         """
-        if process_type == 'strip':
-            return content.strip()
-        elif process_type == 'lowercase':
-            return content.lower()
-        elif process_type == 'uppercase':
-            return content.upper()
-        # Add more post-processing types as needed
-        return content
+        user_agent = (headers or {}).get('User-Agent')
+        return await self.context_renderer.render(
+            url,
+            timeout,
+            user_agent=user_agent,
+            block_resources=block_resources,
+            wait_plan=wait_plan
+        )
+    
+    async def _get_content_with_http(self, url: str, headers: Optional[Dict],
+                                   timeout: int, max_bytes: Optional[int] = None) -> str:
+        """
+        Get page content using the pooled async fetcher for simple pages
+        """
+        return await self.fetcher.fetch(url, headers=headers, timeout=timeout, max_bytes=max_bytes)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+import aioredis
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Delete the lease only if we still hold it (it may have expired and been retaken)
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+class SingleFlight:
+    """
+    Runs one call per key at a time, in-process and across workers.
+
+    Concurrent callers in this process share the leader's future. With
+    a Redis URL, the leader also takes a lease (SET NX PX) so that other
+    workers wait instead of repeating the work: they poll until the lease
+    is gone and then ``load`` the result the leader stored. If the
+    leader failed or nothing can be loaded, the waiter takes the lease
+    and runs the call itself. Waiters that give up after
+    ``wait_timeout`` run the call without a lease as a fallback. Leases
+    expire after ``lease_ttl`` seconds so a crashed worker never blocks
+    a key for good.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, lease_ttl: Optional[int] = None,
+                 wait_timeout: Optional[int] = None, poll_interval: float = 0.5,
+                 prefix: str = "singleflight"):
+        self.redis = aioredis.from_url(redis_url, decode_responses=True) if redis_url else None
+        self.lease_ttl = lease_ttl or settings.CONFIG_LEASE_TTL
+        self.wait_timeout = wait_timeout or settings.CONFIG_GENERATION_WAIT
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 load: Optional[Callable[[], Awaitable[Any]]] = None) -> Any:
+        """
+        Result of ``fn`` for the key, joining a call already in flight.
+        ``load`` fetches what another worker's call produced.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._lead(key, fn, load))
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.info(f"Joining in-flight call for {key}")
+        # A cancelled caller must not cancel the call the others wait on
+        return await asyncio.shield(flight)
+
+    def _forget(self, key: str, flight: asyncio.Future):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark a failure as retrieved when nobody was left waiting
+            flight.exception()
+
+    async def _lead(self, key: str, fn: Callable[[], Awaitable[Any]],
+                    load: Optional[Callable[[], Awaitable[Any]]]) -> Any:
+        if self.redis is None:
+            return await fn()
+
+        lease_key = f"{self.prefix}:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+        while True:
+            try:
+                acquired = await self.redis.set(lease_key, token, nx=True, px=self.lease_ttl * 1000)
+            except Exception as e:
+                logger.warning(f"Lease for {key} unavailable, running without it: {str(e)}")
+                return await fn()
+
+            if acquired:
+                try:
+                    return await fn()
+                finally:
+                    await self._release(lease_key, token)
+
+            if not waited:
+                logger.info(f"Another worker holds the lease for {key}, waiting")
+                waited = True
+            if time.monotonic() >= deadline:
+                logger.warning(f"Timed out after {self.wait_timeout}s waiting for {key}, "
+                               "running it here")
+                return await fn()
+
+            await asyncio.sleep(self.poll_interval)
+            if load and not await self.redis.exists(lease_key):
+                # The holder finished (or died); use its result if it stored one
+                result = await load()
+                if result is not None:
+                    return result
+
+    async def _release(self, lease_key: str, token: str):
+        try:
+            await self.redis.eval(_RELEASE_SCRIPT, 1, lease_key, token)
+        except Exception as e:
+            logger.warning(f"Failed to release lease {lease_key}: {str(e)}")
+
+    async def close(self):
+        """Close the Redis connection"""
+        if self.redis:
+            await self.redis.close()
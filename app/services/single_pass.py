@@ -0,0 +1,212 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from cssselect import parse
+from cssselect.parser import Attrib, Class, CombinedSelector, Element, Hash
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+NodeTest = Callable[[etree._Element], bool]
+
+# Attribute operators that are cheap to check in Python
+_ATTRIB_OPERATORS: Dict[str, Callable[[str, str], bool]] = {
+    "exists": lambda actual, expected: True,
+    "=": lambda actual, expected: actual == expected,
+    "~=": lambda actual, expected: expected in actual.split(),
+    "^=": lambda actual, expected: bool(expected) and actual.startswith(expected),
+    "$=": lambda actual, expected: bool(expected) and actual.endswith(expected),
+    "*=": lambda actual, expected: bool(expected) and expected in actual,
+    "|=": lambda actual, expected: actual == expected or actual.startswith(expected + "-"),
+}
+
+def _compound_tag(tree: Any) -> Optional[str]:
+    """Tag name a compound selector requires, or None for any tag"""
+    while not isinstance(tree, Element):
+        tree = tree.selector
+    if tree.element and tree.element != '*':
+        return tree.element.lower()
+    return None
+
+def _simple_checks(tree: Any) -> Optional[List[NodeTest]]:
+    """
+    Python checks for a compound made only of tag, class, id and plain
+    attribute selectors; None if it needs XPath
+    """
+    checks: List[NodeTest] = []
+    while not isinstance(tree, Element):
+        if isinstance(tree, Class):
+            name = tree.class_name
+            checks.append(lambda el, name=name: name in (el.get('class') or '').split())
+        elif isinstance(tree, Hash):
+            value = tree.id
+            checks.append(lambda el, value=value: el.get('id') == value)
+        elif isinstance(tree, Attrib) and not tree.namespace and tree.operator in _ATTRIB_OPERATORS:
+            attrib = tree.attrib.lower()
+            expected = getattr(tree.value, 'value', tree.value) or ''
+            operator = _ATTRIB_OPERATORS[tree.operator]
+            checks.append(
+                lambda el, attrib=attrib, expected=expected, operator=operator:
+                    el.get(attrib) is not None and operator(el.get(attrib), expected)
+            )
+        else:
+            return None
+        tree = tree.selector
+    return checks
+
+def _compound_key(tree: Any) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Cheapest index for a compound: ("tag", name) when it requires a tag,
+    ("attr", name) when it requires an attribute, (None, None) otherwise
+    """
+    tag = _compound_tag(tree)
+    if tag is not None:
+        return "tag", tag
+    while not isinstance(tree, Element):
+        if isinstance(tree, Class):
+            return "attr", "class"
+        if isinstance(tree, Hash):
+            return "attr", "id"
+        if isinstance(tree, Attrib) and not tree.namespace:
+            return "attr", tree.attrib.lower()
+        tree = tree.selector
+    return None, None
+
+def _compound_test(tree: Any) -> NodeTest:
+    """Test one element against a compound selector (no combinators)"""
+    tag = _compound_tag(tree)
+    checks = _simple_checks(tree)
+    if checks is None:
+        raise ValueError(f"{tree!r} needs XPath evaluation")
+    if tag is None:
+        if len(checks) == 1:
+            return checks[0]
+        return lambda el: all(check(el) for check in checks)
+    if not checks:
+        return lambda el: el.tag == tag
+    return lambda el: el.tag == tag and all(check(el) for check in checks)
+
+Chain = List[Tuple[NodeTest, Optional[str]]]
+
+def chain_matches(element: etree._Element, chain: Chain, index: int = 0) -> bool:
+    """
+    Match an element against compounds joined by combinators, right to
+    left, walking up ancestors or back over siblings only as needed
+    """
+    test, combinator = chain[index]
+    if not test(element):
+        return False
+    if combinator is None:
+        return True
+    if combinator == ' ':
+        return any(chain_matches(ancestor, chain, index + 1)
+                   for ancestor in element.iterancestors())
+    if combinator == '>':
+        parent = element.getparent()
+        return parent is not None and chain_matches(parent, chain, index + 1)
+    siblings = element.itersiblings(preceding=True)
+    if combinator == '+':
+        previous = next((s for s in siblings if isinstance(s.tag, str)), None)
+        return previous is not None and chain_matches(previous, chain, index + 1)
+    # '~' general sibling
+    return any(chain_matches(sibling, chain, index + 1)
+               for sibling in siblings if isinstance(sibling.tag, str))
+
+def compile_selector(selector: str) -> List[Tuple[Tuple[Optional[str], Optional[str]], Chain]]:
+    """
+    Split a CSS selector group into per-selector chains of compound tests
+    (rightmost first), each with the index key of its rightmost compound.
+    Raises for selectors the matcher does not support, such as
+    pseudo-classes and pseudo-elements.
+    """
+    compiled = []
+    for parsed in parse(selector):
+        if parsed.pseudo_element:
+            raise ValueError(f"pseudo-element ::{parsed.pseudo_element} is not supported")
+        tree = parsed.parsed_tree
+        rightmost = tree.subselector if isinstance(tree, CombinedSelector) else tree
+        chain: Chain = []
+        while isinstance(tree, CombinedSelector):
+            chain.append((_compound_test(tree.subselector), tree.combinator))
+            tree = tree.selector
+        chain.append((_compound_test(tree), None))
+        compiled.append((_compound_key(rightmost), chain))
+    return compiled
+
+def chain_scope(chain: Chain) -> Optional[NodeTest]:
+    """
+    Test for the container a selector is confined to: its leftmost
+    compound, when every combinator descends (``article img``,
+    ``.post > iframe``). None for single compounds and sibling combinators.
+    """
+    if len(chain) < 2 or any(combinator not in (' ', '>') for _, combinator in chain[:-1]):
+        return None
+    return chain[-1][0]
+
+class SinglePassExtractor:
+    """
+    Matches all CSS rules of a plan against elements as they are parsed,
+    for streaming extraction.
+
+    Each selector is indexed by the tag or attribute its rightmost
+    compound requires, so an element is only tested against selectors
+    that could match it; combinators are checked right to left from
+    there. Field rules stop being tested after their first match
+    (document order, like ``select(...)[0]``). ``media_scopes`` lists the
+    container test (``chain_scope``) of each selector of every media rule.
+    Rules the matcher cannot handle (XPath, pseudo-classes,
+    pseudo-elements) are listed in ``fallback``.
+    """
+
+    def __init__(self, fields: List[Any], media: List[Any]):
+        self.by_tag: Dict[str, List[Tuple[Any, Chain, bool]]] = {}
+        self.by_attr: Dict[str, List[Tuple[Any, Chain, bool]]] = {}
+        self.any_element: List[Tuple[Any, Chain, bool]] = []
+        self.media_scopes: Dict[str, List[Optional[NodeTest]]] = {}
+        self.fallback: List[Any] = []
+
+        for rule, is_field in [(rule, True) for rule in fields] + [(rule, False) for rule in media]:
+            if rule.selector_type != 'css':
+                self.fallback.append(rule)
+                continue
+            try:
+                compiled = compile_selector(rule.selector)
+            except Exception as e:
+                logger.debug(f"Start-tag matcher unavailable for {rule.selector}: {str(e)}")
+                self.fallback.append(rule)
+                continue
+
+            for (kind, key), chain in compiled:
+                if not is_field:
+                    self.media_scopes.setdefault(rule.name, []).append(chain_scope(chain))
+                entry = (rule, chain, is_field)
+                if kind == "tag":
+                    self.by_tag.setdefault(key, []).append(entry)
+                elif kind == "attr":
+                    self.by_attr.setdefault(key, []).append(entry)
+                else:
+                    self.any_element.append(entry)
+
+    def match_element(self, element: etree._Element,
+                      first: Dict[str, Any]) -> Tuple[List[Any], List[Any]]:
+        """
+        Field rules whose first match is this element (recorded in
+        ``first``) and media rules that match it
+        """
+        fields: List[Any] = []
+        media: List[Any] = []
+        candidates = [self.by_tag.get(element.tag) or []]
+        for name, entries in self.by_attr.items():
+            if element.get(name) is not None:
+                candidates.append(entries)
+        candidates.append(self.any_element)
+
+        for entries in candidates:
+            for rule, chain, is_field in entries:
+                if is_field:
+                    if rule.name not in first and chain_matches(element, chain):
+                        first[rule.name] = element
+                        fields.append(rule)
+                # Several selectors of a group can match the same element
+                elif all(seen is not rule for seen in media) and chain_matches(element, chain):
+                    media.append(rule)
+        return fields, media
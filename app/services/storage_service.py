@@ -1,10 +1,11 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 import aioredis
 import logging
 from datetime import datetime, timedelta
+from enum import Enum
 from pathlib import Path
-from ..models.task import TaskInfo, TaskStatus
+from ..models.task import TaskInfo, TaskStatus, BatchInfo
 from ..core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -14,6 +15,8 @@ class StorageService:
         self.storage_type = storage_type
         self.redis_url = redis_url
         self.memory_storage: Dict[str, Dict] = {}
+        self.memory_batches: Dict[str, Dict] = {}
+        self.memory_batch_tasks: Dict[str, List[str]] = {}
         self.redis = None
         
         if storage_type == "redis" and redis_url:
@@ -39,6 +42,33 @@ class StorageService:
             logger.error(f"Error saving task {task_id}: {str(e)}")
             raise
     
+    async def save_tasks(self, tasks: List[TaskInfo], batch_id: Optional[str] = None,
+                         batch_task_ids: Optional[List[str]] = None):
+        """
+        Save many tasks in one pipelined round trip. With ``batch_id``,
+        ``batch_task_ids`` (the saved tasks by default) are recorded as
+        members of the batch in the same round trip.
+        """
+        if batch_id and batch_task_ids is None:
+            batch_task_ids = [task.task_id for task in tasks]
+        try:
+            if self.storage_type == "redis" and self.redis:
+                pipe = self.redis.pipeline(transaction=False)
+                for task in tasks:
+                    pipe.hset(f"task:{task.task_id}", mapping=self._serialize_task(task))
+                if batch_id and batch_task_ids:
+                    pipe.rpush(f"batch:{batch_id}:tasks", *batch_task_ids)
+                await pipe.execute()
+            else:
+                for task in tasks:
+                    self.memory_storage[task.task_id] = task.dict()
+                if batch_id and batch_task_ids:
+                    self.memory_batch_tasks.setdefault(batch_id, []).extend(batch_task_ids)
+                
+        except Exception as e:
+            logger.error(f"Error saving {len(tasks)} tasks: {str(e)}")
+            raise
+    
     async def get_task(self, task_id: str) -> Optional[TaskInfo]:
         """Get task information"""
         try:
@@ -57,6 +87,63 @@ class StorageService:
             logger.error(f"Error getting task {task_id}: {str(e)}")
             return None
     
+    async def save_batch(self, batch: BatchInfo):
+        """Save batch information"""
+        try:
+            if self.storage_type == "redis" and self.redis:
+                await self.redis.set(f"batch:{batch.batch_id}", batch.json())
+            else:
+                self.memory_batches[batch.batch_id] = batch.dict()
+                
+        except Exception as e:
+            logger.error(f"Error saving batch {batch.batch_id}: {str(e)}")
+            raise
+    
+    async def get_batch(self, batch_id: str) -> Optional[BatchInfo]:
+        """Get batch information"""
+        try:
+            if self.storage_type == "redis" and self.redis:
+                data = await self.redis.get(f"batch:{batch_id}")
+                return BatchInfo.parse_raw(data) if data else None
+            data = self.memory_batches.get(batch_id)
+            return BatchInfo(**data) if data else None
+                
+        except Exception as e:
+            logger.error(f"Error getting batch {batch_id}: {str(e)}")
+            return None
+    
+    async def batch_progress(self, batch_id: str, chunk_size: int = 1000) -> Dict[str, int]:
+        """Number of a batch's tasks in each status"""
+        counts = {status.value: 0 for status in TaskStatus}
+        try:
+            if self.storage_type == "redis" and self.redis:
+                key = f"batch:{batch_id}:tasks"
+                start = 0
+                while True:
+                    task_ids = await self.redis.lrange(key, start, start + chunk_size - 1)
+                    if not task_ids:
+                        break
+                    pipe = self.redis.pipeline(transaction=False)
+                    for task_id in task_ids:
+                        task_id = task_id.decode('utf-8') if isinstance(task_id, bytes) else task_id
+                        pipe.hget(f"task:{task_id}", "status")
+                    for status in await pipe.execute():
+                        if status is not None:
+                            status = status.decode('utf-8') if isinstance(status, bytes) else status
+                            status = self._status_value(status)
+                            counts[status] = counts.get(status, 0) + 1
+                    start += chunk_size
+            else:
+                for task_id in self.memory_batch_tasks.get(batch_id, []):
+                    task = self.memory_storage.get(task_id)
+                    if task:
+                        status = TaskStatus(task["status"]).value
+                        counts[status] += 1
+                
+        except Exception as e:
+            logger.error(f"Error counting tasks of batch {batch_id}: {str(e)}")
+        return counts
+    
     async def cleanup_tasks(self, max_age_hours: int = 24):
         """Clean up old completed tasks"""
         try:
@@ -96,7 +183,8 @@ class StorageService:
         """Serialize task for Redis storage"""
         task_dict = task.dict()
         return {
-            key: json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+            key: json.dumps(value) if isinstance(value, (dict, list))
+            else value.value if isinstance(value, Enum) else str(value)
             for key, value in task_dict.items()
         }
     
@@ -107,9 +195,26 @@ class StorageService:
             key = key.decode('utf-8')
             value = value.decode('utf-8')
             
+            if value == "None":
+                # Unset optional fields are written as str(None)
+                decoded_data[key] = None
+                continue
             try:
                 decoded_data[key] = json.loads(value)
             except json.JSONDecodeError:
                 decoded_data[key] = value
         
-        return TaskInfo(**decoded_data)
\ No newline at end of file
+        if isinstance(decoded_data.get('status'), str):
+            decoded_data['status'] = self._status_value(decoded_data['status'])
+        return TaskInfo(**decoded_data)
+    
+    @staticmethod
+    def _status_value(value: str) -> str:
+        """
+        Stored task status as a TaskStatus value. Statuses are written by
+        value ("completed"); records written before that hold the enum's
+        str() ("TaskStatus.COMPLETED") and are read as the same status.
+        """
+        if value.startswith("TaskStatus."):
+            return TaskStatus[value.split(".", 1)[1]].value
+        return value
\ No newline at end of file
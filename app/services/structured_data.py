@@ -0,0 +1,165 @@
+import json
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Union
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+# schema.org types whose properties map onto ScrapedContent
+ARTICLE_TYPES = {
+    "Article", "NewsArticle", "ReportageNewsArticle", "AnalysisNewsArticle",
+    "OpinionNewsArticle", "BlogPosting", "LiveBlogPosting", "TechArticle",
+    "ScholarlyArticle", "Report",
+}
+
+_HEAD_END = re.compile(rb"</head\s*>", re.IGNORECASE)
+_HEAD_END_TEXT = re.compile(r"</head\s*>", re.IGNORECASE)
+
+_JSON_LD = etree.XPath("//script[@type='application/ld+json']/text()")
+_META = etree.XPath("//meta[@property or @name][@content]")
+
+def _head(markup: Union[str, bytes]) -> Union[str, bytes]:
+    """Markup up to the end of <head>, or all of it when there is no </head>"""
+    pattern = _HEAD_END if isinstance(markup, bytes) else _HEAD_END_TEXT
+    match = pattern.search(markup)
+    return markup[:match.end()] if match else markup
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def _names(value: Any) -> List[str]:
+    """Person/Organization names from a string, object or list of them"""
+    names = []
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get("name")
+        if isinstance(item, str) and item.strip():
+            names.append(item.strip())
+    return names
+
+def _urls(value: Any) -> List[str]:
+    """URLs from a string, ImageObject/VideoObject or list of them"""
+    urls = []
+    for item in _as_list(value):
+        if isinstance(item, dict):
+            item = item.get("url") or item.get("contentUrl")
+        if isinstance(item, str) and item.strip():
+            urls.append(item.strip())
+    return urls
+
+def _keywords(value: Any) -> List[str]:
+    keywords = []
+    for item in _as_list(value):
+        if isinstance(item, str):
+            keywords.extend(part.strip() for part in item.split(",") if part.strip())
+    return keywords
+
+def _json_ld_objects(scripts: Iterable[str]) -> List[Dict[str, Any]]:
+    """Every top-level and @graph object from the page's JSON-LD blocks"""
+    objects = []
+    for script in scripts:
+        try:
+            data = json.loads(script)
+        except ValueError as e:
+            logger.debug(f"Skipping invalid JSON-LD: {str(e)}")
+            continue
+        for item in _as_list(data):
+            if not isinstance(item, dict):
+                continue
+            objects.append(item)
+            objects.extend(node for node in _as_list(item.get("@graph")) if isinstance(node, dict))
+    return objects
+
+def _is_article(item: Dict[str, Any]) -> bool:
+    return any(kind in ARTICLE_TYPES for kind in _as_list(item.get("@type")))
+
+def _dedupe(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+def extract_structured(markup: Union[str, bytes],
+                       encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    ScrapedContent fields found in a page's structured data.
+
+    Only the <head> is parsed. NewsArticle-style JSON-LD wins over
+    OpenGraph, article:* and plain <meta> tags and <html lang>. Fields
+    that are not published are left out, and ``media_files`` only holds
+    the media types that were found.
+    """
+    head = _head(markup)
+    if not head:
+        return {}
+    try:
+        parser = etree.HTMLParser(encoding=encoding if isinstance(head, bytes) else None)
+        root = etree.fromstring(head, parser)
+    except (etree.XMLSyntaxError, ValueError) as e:
+        logger.debug(f"Cannot parse head for structured data: {str(e)}")
+        return {}
+    if root is None:
+        return {}
+
+    meta: Dict[str, List[str]] = {}
+    for element in _META(root):
+        key = (element.get("property") or element.get("name")).strip().lower()
+        meta.setdefault(key, []).append(element.get("content").strip())
+
+    def first_meta(*keys: str) -> Optional[str]:
+        for key in keys:
+            for value in meta.get(key, []):
+                if value:
+                    return value
+        return None
+
+    article = next((item for item in _json_ld_objects(_JSON_LD(root)) if _is_article(item)), {})
+
+    fields: Dict[str, Any] = {}
+    title = article.get("headline") or article.get("name") or first_meta("og:title", "twitter:title")
+    if isinstance(title, str) and title.strip():
+        fields["title"] = title.strip()
+
+    body = article.get("articleBody")
+    if isinstance(body, str) and body.strip():
+        fields["content"] = body.strip()
+
+    # article:author is often a profile URL rather than a name
+    authors = _names(article.get("author")) or [
+        author for author in meta.get("article:author", []) + meta.get("author", [])
+        if author and not author.startswith(("http://", "https://"))
+    ]
+    if authors:
+        fields["author"] = ", ".join(_dedupe(authors))
+
+    published = article.get("datePublished") or first_meta(
+        "article:published_time", "og:published_time", "date", "pubdate"
+    )
+    if isinstance(published, str) and published.strip():
+        fields["publish_date"] = published.strip()
+
+    language = article.get("inLanguage")
+    if isinstance(language, dict):
+        language = language.get("name")
+    language = language or root.get("lang") or first_meta("og:locale", "language")
+    if isinstance(language, str) and language.strip():
+        fields["language"] = language.strip().replace("_", "-")
+
+    categories = (
+        [section for section in _as_list(article.get("articleSection")) if isinstance(section, str)]
+        + _keywords(article.get("keywords"))
+        + meta.get("article:section", []) + meta.get("article:tag", [])
+    )
+    if categories:
+        fields["categories"] = _dedupe(category for category in categories if category)
+
+    media_files = {}
+    images = _urls(article.get("image")) + meta.get("og:image", []) + meta.get("twitter:image", [])
+    if images:
+        media_files["images"] = _dedupe(images)
+    videos = _urls(article.get("video")) + meta.get("og:video", []) + meta.get("og:video:url", [])
+    if videos:
+        media_files["videos"] = _dedupe(videos)
+    if media_files:
+        fields["media_files"] = media_files
+    return fields
@@ -0,0 +1,124 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .html_parser import rule_selector
+
+logger = logging.getLogger(__name__)
+
+WAIT_STRATEGIES = ("load", "selector", "network_idle", "dom_quiet", "extraction_rules")
+
+# Fields waited for by the extraction_rules strategy unless overridden
+DEFAULT_WAIT_FIELDS = ["title", "content"]
+
+INSTALL_MUTATION_OBSERVER_JS = """
+if (!window.__scraperLastMutation) {
+    window.__scraperLastMutation = performance.now();
+    new MutationObserver(() => { window.__scraperLastMutation = performance.now(); })
+        .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+}
+"""
+
+@dataclass
+class WaitPlan:
+    """
+    Resolved form of DomainConfig.wait_for.
+
+    ``wait_for`` is a dict such as ``{"strategy": "selector", "selector":
+    "article h1"}``, ``{"strategy": "network_idle", "idle_ms": 500}``,
+    ``{"strategy": "dom_quiet", "quiet_ms": 500}`` or
+    ``{"strategy": "extraction_rules", "fields": ["title", "content"]}``.
+    Without one the renderers wait for the page load event as before.
+    """
+    strategy: str = "load"
+    selectors: List[Tuple[str, str]] = field(default_factory=list)
+    idle_ms: int = 500
+    poll_ms: int = 100
+    timeout: Optional[int] = None
+
+    def ready_script(self) -> str:
+        """JS expression that is true once the page can be snapshotted"""
+        if self.strategy in ("selector", "extraction_rules"):
+            return _selectors_ready_js(self.selectors)
+        if self.strategy == "network_idle":
+            return _network_idle_js(self.idle_ms)
+        if self.strategy == "dom_quiet":
+            return _dom_quiet_js(self.idle_ms)
+        return "document.readyState === 'complete'"
+
+def build_wait_plan(wait_for: Optional[Dict], extraction_rules: Optional[Dict] = None) -> WaitPlan:
+    """Build a WaitPlan from a domain's wait_for setting"""
+    if not wait_for:
+        return WaitPlan()
+
+    strategy = wait_for.get("strategy", "load")
+    if strategy not in WAIT_STRATEGIES:
+        logger.warning(f"Unknown wait strategy {strategy}, waiting for page load")
+        return WaitPlan()
+
+    plan = WaitPlan(
+        strategy=strategy,
+        idle_ms=wait_for.get("idle_ms", wait_for.get("quiet_ms", 500)),
+        poll_ms=wait_for.get("poll_ms", 100),
+        timeout=wait_for.get("timeout")
+    )
+
+    if strategy == "selector":
+        selectors = wait_for.get("selectors") or [wait_for.get("selector")]
+        plan.selectors = [
+            (wait_for.get("selector_type", "css"), selector)
+            for selector in selectors if selector
+        ]
+    elif strategy == "extraction_rules":
+        fields = wait_for.get("fields", DEFAULT_WAIT_FIELDS)
+        for name in fields:
+            rule = (extraction_rules or {}).get(name)
+            resolved = rule_selector(rule) if rule is not None else None
+            if resolved:
+                plan.selectors.append(resolved)
+
+    if strategy in ("selector", "extraction_rules") and not plan.selectors:
+        logger.warning(f"No selectors to wait for with strategy {strategy}, waiting for page load")
+        return WaitPlan()
+
+    return plan
+
+def _selectors_ready_js(selectors: List[Tuple[str, str]]) -> str:
+    return """
+(() => {
+    const selectors = %s;
+    return selectors.every(([type, selector]) => {
+        try {
+            if (type === 'xpath') {
+                return document.evaluate(selector, document, null,
+                    XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue !== null;
+            }
+            return document.querySelector(selector) !== null;
+        } catch (e) {
+            return true;  // an invalid selector must not stall the render
+        }
+    });
+})()
+""" % json.dumps(selectors)
+
+def _network_idle_js(idle_ms: int) -> str:
+    return """
+(() => {
+    const count = performance.getEntriesByType('resource').length;
+    const now = performance.now();
+    if (window.__scraperResourceCount !== count) {
+        window.__scraperResourceCount = count;
+        window.__scraperIdleSince = now;
+        return false;
+    }
+    return document.readyState === 'complete' && now - window.__scraperIdleSince >= %d;
+})()
+""" % idle_ms
+
+def _dom_quiet_js(quiet_ms: int) -> str:
+    return """
+(() => {
+    %s
+    return performance.now() - window.__scraperLastMutation >= %d;
+})()
+""" % (INSTALL_MUTATION_OBSERVER_JS.strip(), quiet_ms)
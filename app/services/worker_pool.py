@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+from urllib.parse import urlparse
+from ..core.exceptions import QueueFullError
+from ..core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class Job:
+    """One queued unit of work"""
+    task_id: str
+    url: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    domain: str = ""
+    attempt: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self):
+        if not self.domain:
+            self.domain = urlparse(self.url).netloc
+
+class WorkerPool:
+    """
+    Fixed set of worker coroutines draining a bounded job queue.
+
+    ``submit`` rejects with QueueFullError once ``max_queue`` jobs are
+    waiting, so a burst cannot grow memory or open unbounded scrapes.
+    At most ``workers`` jobs run at once and at most
+    ``per_domain`` per domain: a job whose domain is at its limit is set
+    aside (without holding a worker) and started when one of that
+    domain's jobs finishes. ``metrics()`` reports depth, in-flight work
+    and queue wait/run latency over a recent window.
+    """
+
+    def __init__(self, handler: Callable[[Job], Awaitable[Any]], workers: Optional[int] = None,
+                 max_queue: Optional[int] = None, per_domain: Optional[int] = None,
+                 window: int = 1000):
+        self.handler = handler
+        self.workers = workers or settings.MAX_CONCURRENT_TASKS
+        self.max_queue = max_queue or settings.QUEUE_MAX_SIZE
+        self.per_domain = per_domain or settings.DOMAIN_MAX_CONCURRENCY
+        self._queue: "asyncio.Queue[Job]" = asyncio.Queue()
+        self._deferred: Dict[str, Deque[Job]] = defaultdict(deque)
+        self._deferred_count = 0
+        self._active: Dict[str, int] = defaultdict(int)
+        self._workers: List[asyncio.Task] = []
+        self._wait_times: Deque[float] = deque(maxlen=window)
+        self._run_times: Deque[float] = deque(maxlen=window)
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs accepted but not started"""
+        return self._queue.qsize() + self._deferred_count
+
+    def submit(self, job: Job, bounded: bool = True):
+        """
+        Queue a job, or raise QueueFullError when the queue is full.
+        Unbounded submits are for work already accepted once, such as retries.
+        """
+        if bounded and self.pending >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"Task queue is full ({self.max_queue} pending)")
+        self._start()
+        self._queue.put_nowait(job)
+        self.submitted += 1
+
+    def _start(self):
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"queue-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} queue workers")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if self._active[job.domain] >= self.per_domain:
+                    self._deferred[job.domain].append(job)
+                    self._deferred_count += 1
+                    continue
+                # Keep the domain's slot and drain its deferred jobs on this worker
+                while job is not None:
+                    await self._run(job)
+                    job = self._next_deferred(job.domain)
+            finally:
+                self._queue.task_done()
+
+    def _next_deferred(self, domain: str) -> Optional[Job]:
+        deferred = self._deferred.get(domain)
+        if not deferred:
+            self._deferred.pop(domain, None)
+            return None
+        self._deferred_count -= 1
+        return deferred.popleft()
+
+    async def _run(self, job: Job):
+        started = time.monotonic()
+        self._wait_times.append(started - job.enqueued_at)
+        self._active[job.domain] += 1
+        try:
+            await self.handler(job)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Job {job.task_id} for {job.url} failed: {str(e)}")
+        finally:
+            self._active[job.domain] -= 1
+            if not self._active[job.domain]:
+                del self._active[job.domain]
+            self._run_times.append(time.monotonic() - started)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight jobs and latency over the recent window"""
+        def stats(values: Deque[float]) -> Dict[str, Optional[float]]:
+            ordered = sorted(values)
+            if not ordered:
+                return {"avg": None, "p95": None}
+            return {
+                "avg": sum(ordered) / len(ordered),
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            }
+
+        busiest = sorted(self._active.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize(),
+            "deferred": self._deferred_count,
+            "in_flight": sum(self._active.values()),
+            "busiest_domains": dict(busiest),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_wait": stats(self._wait_times),
+            "run_time": stats(self._run_times),
+        }
+
+    async def close(self):
+        """Stop the workers; queued jobs are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
@@ -0,0 +1,42 @@
+import ipaddress
+
+try:
+    import tldextract
+    # Use the bundled public suffix list; never fetch it at runtime
+    _extract = tldextract.TLDExtract(suffix_list_urls=())
+except ImportError:  # tldextract is optional
+    _extract = None
+
+# Multi-label public suffixes common enough to matter without tldextract
+_COMMON_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.nz",
+    "co.jp", "ne.jp", "or.jp", "com.br", "com.mx", "com.ar", "co.in", "co.za",
+    "com.cn", "com.tr", "com.sg", "com.hk", "co.kr", "com.tw",
+}
+
+def registrable_domain(host: str) -> str:
+    """
+    eTLD+1 of a host (``news.example.co.uk`` -> ``example.co.uk``), using
+    tldextract when installed and a short list of multi-label suffixes
+    otherwise. Ports are dropped; IPs and single labels are returned as is.
+    """
+    host = host.lower().rsplit("@", 1)[-1]
+    if not host.startswith("["):
+        host = host.split(":", 1)[0]
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+        return host
+    except ValueError:
+        pass
+
+    if _extract is not None:
+        parts = _extract(host)
+        if parts.domain and parts.suffix:
+            return f"{parts.domain}.{parts.suffix}"
+        return host
+
+    labels = host.split(".")
+    if len(labels) <= 2:
+        return host
+    suffix_labels = 2 if ".".join(labels[-2:]) in _COMMON_SUFFIXES else 1
+    return ".".join(labels[-(suffix_labels + 1):])
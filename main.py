@@ -29,6 +29,7 @@ async def lifespan(app: FastAPI):
     
     # Initialize config service
     app.state.config_service = ConfigService()
+    await app.state.config_service.start()
     
     # Start background task cleanup
     if settings.TASK_CLEANUP_HOURS > 0:
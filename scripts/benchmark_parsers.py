@@ -0,0 +1,113 @@
+"""
+Benchmark the HTML parser backends on a saved corpus of pages.
+
+    python scripts/benchmark_parsers.py path/to/corpus [--rules rules.json] [--rounds 3]
+
+The corpus is a directory of ``*.html`` files. Rules are a domain config
+JSON with ``extraction_rules`` and ``media_rules``; without one a generic
+article rule set is used. Each backend runs in its own process so peak
+memory is measured without interference from the others.
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.html_parser import PARSER_BACKENDS, get_parser_backend
+
+DEFAULT_RULES = {
+    "extraction_rules": {
+        "title": {"selector": "h1", "selector_type": "css"},
+        "content": {"selector": "article, main", "selector_type": "css"},
+        "author": {"selector": "[rel=author], .author", "selector_type": "css"},
+        "publish_date": {"selector": "time", "selector_type": "css", "attribute": "datetime"},
+        "language": {"selector": "html", "selector_type": "css", "attribute": "lang"},
+        "categories": {"selector": "[rel=tag], .category", "selector_type": "css"},
+    },
+    "media_rules": {
+        "images": {"selector": "img", "selector_type": "css", "attribute": "src"},
+        "videos": {"selector": "video source, video", "selector_type": "css", "attribute": "src"},
+        "embeds": {"selector": "iframe", "selector_type": "css", "attribute": "src"},
+    },
+}
+
+def extract(document, rules):
+    """Same work the scrapers do per page: first match per field, all media"""
+    result = {}
+    for field, rule in rules["extraction_rules"].items():
+        elements = document.select(rule["selector"], rule.get("selector_type", "css"))
+        if elements:
+            attribute = rule.get("attribute")
+            result[field] = (
+                document.attr(elements[0], attribute) if attribute else document.text(elements[0])
+            )
+    for media_type, rule in rules.get("media_rules", {}).items():
+        elements = document.select(rule["selector"], rule.get("selector_type", "css"))
+        result[media_type] = [
+            document.attr(element, rule.get("attribute", "src")) for element in elements
+        ]
+    return result
+
+def run_backend(name, pages, rules, rounds, results):
+    backend = get_parser_backend(name)
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for page in pages:
+            extract(backend.parse(page), rules)
+    elapsed = time.perf_counter() - start
+
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results[name] = {
+        "backend": backend.name,
+        "pages_per_sec": len(pages) * rounds / elapsed,
+        "python_peak_kb": python_peak / 1024,
+        "rss_growth_kb": peak_rss - baseline_rss,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("corpus", type=Path, help="directory of saved .html pages")
+    parser.add_argument("--rules", type=Path, help="domain config JSON with extraction rules")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--backends", nargs="+", default=list(PARSER_BACKENDS))
+    args = parser.parse_args()
+
+    pages = [path.read_bytes() for path in sorted(args.corpus.glob("*.html"))]
+    if not pages:
+        sys.exit(f"No .html files found in {args.corpus}")
+    rules = json.loads(args.rules.read_text()) if args.rules else DEFAULT_RULES
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / 1024:.0f} KB, {args.rounds} rounds")
+    print(f"{'backend':<12}{'pages/sec':>12}{'py peak KB':>14}{'rss growth KB':>16}")
+
+    with multiprocessing.Manager() as manager:
+        results = manager.dict()
+        for name in args.backends:
+            process = multiprocessing.Process(
+                target=run_backend, args=(name, pages, rules, args.rounds, results)
+            )
+            process.start()
+            process.join()
+            if name not in results:
+                print(f"{name:<12}{'failed':>12}")
+                continue
+            stats = results[name]
+            label = name if stats["backend"] == name else f"{name}->{stats['backend']}"
+            print(
+                f"{label:<12}{stats['pages_per_sec']:>12.1f}"
+                f"{stats['python_peak_kb']:>14.0f}{stats['rss_growth_kb']:>16}"
+            )
+
+if __name__ == "__main__":
+    main()
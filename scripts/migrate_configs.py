@@ -0,0 +1,59 @@
+"""
+Import per-domain JSON config files into a consolidated config store.
+
+    python scripts/migrate_configs.py configs/ --to sqlite [--db configs/configs.sqlite3]
+    python scripts/migrate_configs.py configs/rules --to redis [--redis-url redis://...]
+
+Every ``{domain}.json`` in the directory is validated and upserted under
+its file name; re-running the import bumps versions but is otherwise
+harmless. The JSON files are left in place.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.config_store import CONFIG_STORES, RedisConfigStore, SQLiteConfigStore
+
+def read_configs(source: Path):
+    """(domain, data) for every readable config file, reporting the rest"""
+    for path in sorted(source.glob("*.json")):
+        try:
+            data = json.loads(path.read_text())
+        except ValueError as e:
+            print(f"skipping {path.name}: invalid JSON ({e})", file=sys.stderr)
+            continue
+        if not isinstance(data, dict) or "extraction_rules" not in data:
+            print(f"skipping {path.name}: not a domain config", file=sys.stderr)
+            continue
+        yield path.stem, data
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", type=Path, help="directory of {domain}.json files")
+    parser.add_argument("--to", choices=[store for store in CONFIG_STORES if store != "file"],
+                        required=True)
+    parser.add_argument("--db", type=Path, help="SQLite database (default: SOURCE/configs.sqlite3)")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--dry-run", action="store_true", help="validate files without writing")
+    args = parser.parse_args()
+
+    if not args.source.is_dir():
+        sys.exit(f"{args.source} is not a directory")
+
+    configs = list(read_configs(args.source))
+    if args.dry_run:
+        print(f"{len(configs)} configs would be imported")
+        return
+
+    if args.to == "sqlite":
+        store = SQLiteConfigStore(args.db or args.source / "configs.sqlite3")
+    else:
+        store = RedisConfigStore(args.redis_url)
+    count = store.put_many(configs)
+    print(f"Imported {count} configs into {args.to}; store now holds {len(store.list_domains())}")
+
+if __name__ == "__main__":
+    main()
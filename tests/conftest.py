@@ -0,0 +1,22 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Settings requires an API key; tests never call Crawl4AI
+os.environ.setdefault("CRAWL4AI_API_KEY", "test")
+
+@pytest.fixture(scope="session")
+def domain_models():
+    """
+    The pydantic models in app/models/domain.py, loaded by path: the
+    app/models.py module shadows the app/models/ directory
+    """
+    path = Path(__file__).resolve().parent.parent / "app" / "models" / "domain.py"
+    spec = importlib.util.spec_from_file_location("domain_models", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,112 @@
+import asyncio
+import importlib
+import sys
+import types
+from pathlib import Path
+import pytest
+from app.core.settings import settings
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+@pytest.fixture
+def batch(monkeypatch):
+    """
+    app.services.batch_service with app/models/ importable as a package
+    (app/models.py shadows it) and the queue and storage modules it only
+    names replaced, since those need Redis and Crawl4AI
+    """
+    models = types.ModuleType("app.models")
+    models.__path__ = [str(APP_DIR / "models")]
+    monkeypatch.setitem(sys.modules, "app.models", models)
+    for name, cls in (("queue", "QueueManager"), ("storage_service", "StorageService")):
+        module = types.ModuleType(f"app.services.{name}")
+        setattr(module, cls, object)
+        monkeypatch.setitem(sys.modules, f"app.services.{name}", module)
+    for name in ("app.models.requests", "app.models.task", "app.services.batch_service"):
+        monkeypatch.delitem(sys.modules, name, raising=False)
+    return importlib.import_module("app.services.batch_service")
+
+class FakeFetcher:
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.probes = []
+
+    async def probe(self, url):
+        self.probes.append(url)
+        await asyncio.sleep(0.01)
+        status = self.statuses.get(url.split("/")[2], 200)
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+class FakeQueueManager:
+    def __init__(self):
+        self.requests = []
+
+    async def create_tasks(self, requests, batch_id=None):
+        self.requests.extend(requests)
+        return [f"task-{len(self.requests) - len(requests) + i}" for i in range(len(requests))]
+
+class FakeStorage:
+    async def save_batch(self, batch):
+        self.batch = batch
+
+async def chunks(*parts):
+    for part in parts:
+        yield part
+
+async def collect(items):
+    return [item async for item in items]
+
+def test_ndjson_lines_split_across_chunks(batch):
+    items = asyncio.run(collect(batch.ndjson_items(chunks(
+        b'{"url": "https://a.com/1"}\n"https://a.c', b'om/2"\n\n{"url": ', b'"https://b.com/"}\nnot json\n"https://c.com/"'
+    ))))
+    assert [position for position, _ in items] == [1, 2, 4, 5, 6]
+    assert items[0][1] == {"url": "https://a.com/1"}
+    assert items[1][1] == "https://a.com/2"
+    assert items[2][1] == {"url": "https://b.com/"}
+    assert isinstance(items[3][1], ValueError)
+    assert items[4][1] == "https://c.com/"
+
+def test_batch_size_limit_rejects_the_overflow(batch, monkeypatch):
+    monkeypatch.setattr(settings, "BATCH_MAX_SIZE", 3)
+    monkeypatch.setattr(settings, "BATCH_CHUNK_SIZE", 2)
+    queue_manager = FakeQueueManager()
+    service = batch.BatchService(FakeStorage(), queue_manager, batch.DomainValidator(FakeFetcher({})))
+    items = batch.json_items([f"https://example.com/{i}" for i in range(5)] + [{"nope": 1}])
+
+    info = asyncio.run(service.create_batch(items))
+    assert (info.total, info.rejected) == (3, 3)
+    assert [url for url, _, _ in queue_manager.requests] == [f"https://example.com/{i}" for i in range(3)]
+    assert [error["item"] for error in info.errors] == [4, 5, 6]
+    assert "limited to 3" in info.errors[0]["error"]
+
+def test_urls_of_a_domain_share_one_probe(batch):
+    fetcher = FakeFetcher({"down.com": 503, "gone.com": OSError("refused"), "ok.com": 404})
+    validator = batch.DomainValidator(fetcher, ttl=60)
+    urls = [f"https://{domain}/{i}" for domain in ("down.com", "gone.com", "ok.com") for i in range(3)]
+
+    async def main():
+        return await asyncio.gather(*(validator.check(url) for url in urls))
+
+    errors = asyncio.run(main())
+    assert len(fetcher.probes) == 3
+    assert errors[:3] == ["down.com answered with status 503"] * 3
+    assert all(error.startswith("Failed to connect to gone.com") for error in errors[3:6])
+    assert errors[6:] == [None] * 3
+    assert asyncio.run(validator.check("https://ok.com/again")) is None
+    assert len(fetcher.probes) == 3
+
+def test_probe_results_expire_and_are_bounded(batch):
+    fetcher = FakeFetcher({})
+    validator = batch.DomainValidator(fetcher, ttl=0)
+    asyncio.run(validator.check("https://a.com/"))
+    asyncio.run(validator.check("https://a.com/"))
+    assert len(fetcher.probes) == 2
+    assert len(validator._results) == 0
+
+    validator = batch.DomainValidator(fetcher, ttl=60, max_entries=2)
+    for domain in ("a.com", "b.com", "c.com"):
+        asyncio.run(validator.check(f"https://{domain}/"))
+    assert list(validator._results) == ["b.com", "c.com"]
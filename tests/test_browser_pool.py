@@ -0,0 +1,109 @@
+import asyncio
+import pytest
+from app.services import browser_pool
+from app.services.browser_pool import BrowserPool
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser is gone")
+        return 1
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_calls += 1
+
+class FakeChrome:
+    """Driver factory that can be told to fail its next launches"""
+
+    def __init__(self):
+        self.drivers = []
+        self.failures = 0
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("chrome failed to start")
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+@pytest.fixture
+def chrome(monkeypatch):
+    factory = FakeChrome()
+    monkeypatch.setattr(browser_pool, "create_chrome_driver", factory)
+    return factory
+
+def test_start_prelaunches_the_pool(chrome):
+    async def main():
+        pool = BrowserPool(size=3, max_pages=10, acquire_timeout=1)
+        await pool.start()
+        async with pool.acquire() as driver:
+            pass
+        await pool.close()
+        return driver
+
+    driver = asyncio.run(main())
+    assert len(chrome.drivers) == 3
+    assert driver in chrome.drivers
+    assert all(d.quit_calls == 1 for d in chrome.drivers)
+
+def test_browsers_are_reused_then_recycled_after_max_pages(chrome):
+    async def main():
+        pool = BrowserPool(size=1, max_pages=2, acquire_timeout=1)
+        used = []
+        for _ in range(3):
+            async with pool.acquire() as driver:
+                used.append(driver)
+        await asyncio.gather(*pool._background)
+        await pool.close()
+        return used
+
+    first, second, third = asyncio.run(main())
+    assert first is second
+    assert third is not first
+    assert first.quit_calls == 1
+
+def test_unresponsive_idle_browser_is_replaced(chrome):
+    async def main():
+        pool = BrowserPool(size=1, max_pages=10, acquire_timeout=1)
+        async with pool.acquire() as first:
+            pass
+        first.alive = False
+        async with pool.acquire() as second:
+            pass
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert second is not first
+    assert first.quit_calls == 1
+
+def test_waiter_retries_after_replacement_launch_fails(chrome):
+    async def main():
+        pool = BrowserPool(size=1, max_pages=1, acquire_timeout=5)
+        loop = asyncio.get_running_loop()
+        async with pool.acquire():
+            waiter = asyncio.create_task(pool._checkout())
+            await asyncio.sleep(0)
+            # The recycled browser's background replacement fails to launch
+            chrome.failures = 1
+        started = loop.time()
+        browser = await waiter
+        waited = loop.time() - started
+        await pool._checkin(browser)
+        await pool.close()
+        return waited
+
+    # The waiter launches the browser itself instead of sleeping out acquire_timeout
+    assert asyncio.run(main()) < 1
+    assert len(chrome.drivers) == 2
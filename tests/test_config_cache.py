@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from app.services.config_cache import ConfigCache
+from app.services.config_store import SQLiteConfigStore
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data):
+        self.calls += 1
+        return dict(data)
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteConfigStore(tmp_path / "configs.sqlite3")
+
+def get(cache, domain):
+    return asyncio.run(cache.get(domain))
+
+def test_hits_do_not_reparse(store):
+    store.put("example.com", {"timeout": 30})
+    parse = CountingParser()
+    cache = ConfigCache(store, parse, check_interval=0)
+    assert get(cache, "example.com") == {"timeout": 30}
+    assert get(cache, "example.com") == {"timeout": 30}
+    assert parse.calls == 1
+    assert cache.version("example.com") == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_store_writes_are_picked_up_after_check_interval(store):
+    store.put("example.com", {"timeout": 30})
+    cache = ConfigCache(store, CountingParser(), check_interval=0)
+    get(cache, "example.com")
+    store.put("example.com", {"timeout": 60})
+    assert get(cache, "example.com") == {"timeout": 60}
+    assert cache.version("example.com") == 2
+
+def test_invalidate_drops_entry_before_check_interval(store):
+    store.put("example.com", {"timeout": 30})
+    cache = ConfigCache(store, CountingParser(), check_interval=3600)
+    get(cache, "example.com")
+    store.put("example.com", {"timeout": 60})
+    assert get(cache, "example.com") == {"timeout": 30}
+    cache.invalidate("example.com")
+    assert cache.version("example.com") is None
+    assert get(cache, "example.com") == {"timeout": 60}
+
+def test_missing_configs_are_cached_too(store):
+    parse = CountingParser()
+    cache = ConfigCache(store, parse, check_interval=3600)
+    assert get(cache, "example.com") is None
+    store.put("example.com", {"timeout": 30})
+    assert get(cache, "example.com") is None
+    cache.invalidate("example.com")
+    assert get(cache, "example.com") == {"timeout": 30}
+
+def test_deleted_configs_disappear(store):
+    store.put("example.com", {"timeout": 30})
+    cache = ConfigCache(store, CountingParser(), check_interval=0)
+    get(cache, "example.com")
+    store.delete("example.com")
+    assert get(cache, "example.com") is None
+
+def test_lru_bound(store):
+    for name in "abc":
+        store.put(f"{name}.example", {"name": name})
+    cache = ConfigCache(store, CountingParser(), max_entries=2, check_interval=3600)
+    for name in "abc":
+        get(cache, f"{name}.example")
+    assert cache.version("a.example") is None
+    assert cache.version("c.example") == 1
+
+def test_preload(store):
+    for name in "ab":
+        store.put(f"{name}.example", {"name": name})
+    parse = CountingParser()
+    cache = ConfigCache(store, parse, check_interval=3600)
+    assert asyncio.run(cache.preload()) == 2
+    assert get(cache, "b.example") == {"name": "b"}
+    assert parse.calls == 2
+
+def test_preload_keeps_entries_loaded_meanwhile(store):
+    store.put("a.example", {"name": "a"})
+    cache = ConfigCache(store, CountingParser(), check_interval=3600)
+    get(cache, "a.example")
+    store.put("b.example", {"name": "b"})
+    assert asyncio.run(cache.preload()) == 1
+    assert cache.version("a.example") == 1
@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from app.services.config_cache import ConfigCache
+from app.services.config_resolver import ConfigResolver, config_keys, detect_cms
+from app.services.config_store import SQLiteConfigStore
+from app.services.extraction_executor import ExtractionExecutor
+from app.services.fetch_mode import persist_fetch_mode
+from app.utils.domains import registrable_domain
+
+WORDPRESS_PAGE = b"""<html lang="en"><head><meta name="generator" content="WordPress 6.5"></head>
+<body><article><h1 class="entry-title">Hello</h1>
+<div class="entry-content"><p>Post body</p><img src="/a.jpg"></div></article></body></html>"""
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteConfigStore(tmp_path / "configs.sqlite3")
+
+@pytest.fixture
+def cache(store):
+    return ConfigCache(store, dict, check_interval=0)
+
+def test_registrable_domain_and_config_keys():
+    assert registrable_domain("news.example.co.uk") == "example.co.uk"
+    assert registrable_domain("Blog.Example.com:8080") == "example.com"
+    assert registrable_domain("127.0.0.1:8000") == "127.0.0.1"
+    assert config_keys("news.example.com") == ["news.example.com", "example.com"]
+    assert config_keys("example.com") == ["example.com"]
+
+def test_subdomains_inherit_the_shared_config_unless_overridden(store, cache):
+    store.put("example.com", {"domain": "example.com", "timeout": 30})
+    store.put("shop.example.com", {"domain": "shop.example.com", "timeout": 60})
+    resolver = ConfigResolver(cache)
+
+    async def main():
+        return [await resolver.resolve(host) for host in
+                ("news.example.com", "shop.example.com", "example.com", "other.org")]
+
+    news, shop, apex, other = asyncio.run(main())
+    assert news == ("example.com", {"domain": "example.com", "timeout": 30})
+    assert shop[0] == "shop.example.com" and shop[1]["timeout"] == 60
+    assert apex[0] == "example.com"
+    assert other is None
+    assert asyncio.run(resolver.version("news.example.com")) == ("example.com", 1)
+
+def test_cms_template_is_used_only_when_it_validates(store, cache):
+    resolver = ConfigResolver(cache, ExtractionExecutor(workers=0))
+    assert detect_cms(WORDPRESS_PAGE) == "wordpress"
+    template = asyncio.run(resolver.template_for(WORDPRESS_PAGE, "blog.com", "utf-8"))
+    assert template["domain"] == "blog.com"
+    assert template["extraction_rules"]["title"]["selector"].startswith("h1.entry-title")
+
+    store.put("cms:wordpress", {"extraction_rules": {
+        "title": {"selector": "h2.missing", "selector_type": "css"},
+        "content": {"selector": ".entry-content", "selector_type": "css"},
+    }, "media_rules": {}})
+    assert asyncio.run(resolver.template_for(WORDPRESS_PAGE, "blog.com", "utf-8")) is None
+
+def test_template_validation_runs_in_the_extraction_pool(cache):
+    executor = ExtractionExecutor(workers=1)
+    resolver = ConfigResolver(cache, executor)
+    try:
+        template = asyncio.run(resolver.template_for(WORDPRESS_PAGE, "blog.com"))
+        assert executor._pool is not None
+    finally:
+        executor.close()
+    assert template is not None
+
+def test_learned_fetch_mode_is_saved_as_a_per_host_override(store, cache):
+    store.put("example.com", {"domain": "example.com", "timeout": 30})
+    on_flip = persist_fetch_mode(cache)
+    asyncio.run(on_flip("spa.example.com", True))
+
+    assert store.get("example.com").data == {"domain": "example.com", "timeout": 30}
+    assert store.get("spa.example.com").data == {
+        "domain": "spa.example.com", "timeout": 30, "use_headless": True
+    }
+    resolver = ConfigResolver(cache)
+    assert asyncio.run(resolver.resolve("news.example.com"))[0] == "example.com"
+
+    # Later flips update the override in place
+    asyncio.run(on_flip("spa.example.com", False))
+    assert store.get("spa.example.com").data["use_headless"] is False
+    assert store.get("spa.example.com").version == 2
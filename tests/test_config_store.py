@@ -0,0 +1,50 @@
+import time
+import pytest
+from app.services.config_store import FileConfigStore, SQLiteConfigStore
+
+@pytest.fixture(params=["file", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "file":
+        return FileConfigStore(tmp_path / "configs")
+    return SQLiteConfigStore(tmp_path / "configs.sqlite3")
+
+def test_missing_domain(store):
+    assert store.get("example.com") is None
+    assert store.version("example.com") is None
+    assert store.delete("example.com") is False
+
+def test_upsert_bumps_version(store):
+    first = store.put("example.com", {"domain": "example.com", "timeout": 30})
+    assert store.version("example.com") == first
+    # The file store's version is the mtime; make sure it can tick
+    time.sleep(0.01)
+    second = store.put("example.com", {"domain": "example.com", "timeout": 60})
+    assert second > first
+    stored = store.get("example.com")
+    assert stored.data == {"domain": "example.com", "timeout": 60}
+    assert stored.version == second
+
+def test_versions_are_per_domain(store):
+    store.put("a.example", {"domain": "a.example"})
+    version = store.version("a.example")
+    time.sleep(0.01)
+    store.put("b.example", {"domain": "b.example"})
+    assert store.version("a.example") == version
+
+def test_put_many_and_listing(store):
+    assert store.put_many((f"{name}.example", {"domain": f"{name}.example"}) for name in "abc") == 3
+    assert sorted(store.list_domains()) == ["a.example", "b.example", "c.example"]
+    assert set(store.load_all()) == {"a.example", "b.example", "c.example"}
+
+def test_delete(store):
+    store.put("example.com", {"domain": "example.com"})
+    assert store.delete("example.com") is True
+    assert store.get("example.com") is None
+    assert store.list_domains() == []
+
+def test_sqlite_versions_count_writes(tmp_path):
+    store = SQLiteConfigStore(tmp_path / "configs.sqlite3")
+    assert [store.put("example.com", {"n": n}) for n in range(3)] == [1, 2, 3]
+    store.put_many([("example.com", {"n": 3}), ("other.example", {"n": 0})])
+    assert store.version("example.com") == 4
+    assert store.version("other.example") == 1
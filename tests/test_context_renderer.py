@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from app.services import context_renderer
+from app.services.context_renderer import ContextRenderer
+
+class FakePage:
+    def on(self, event, handler):
+        pass
+
+    async def goto(self, url, **kwargs):
+        await asyncio.sleep(0.01)
+
+    async def wait_for_selector(self, selector, **kwargs):
+        pass
+
+    async def content(self):
+        return "<html><body></body></html>"
+
+class FakeContext:
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        pass
+
+class FakeBrowser:
+    def __init__(self, chromium):
+        self.chromium = chromium
+        self.connected = True
+        self.closed = False
+        self.open_contexts = 0
+        self.max_open_contexts = 0
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    async def new_context(self, **kwargs):
+        self.open_contexts += 1
+        self.max_open_contexts = max(self.max_open_contexts, self.open_contexts)
+        browser = self
+
+        class Context(FakeContext):
+            async def close(self):
+                browser.open_contexts -= 1
+        return Context()
+
+    async def close(self):
+        self.closed = True
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers = []
+        self.fail_at = None
+        self.launch_delay = 0
+
+    async def launch(self, **kwargs):
+        await asyncio.sleep(self.launch_delay)
+        if self.fail_at == len(self.browsers):
+            self.fail_at = None
+            raise RuntimeError("chromium failed to start")
+        browser = FakeBrowser(self)
+        self.browsers.append(browser)
+        return browser
+
+class FakePlaywright:
+    def __init__(self, chromium):
+        self.chromium = chromium
+        self.stopped = False
+
+    async def stop(self):
+        self.stopped = True
+
+@pytest.fixture
+def chromium(monkeypatch):
+    chromium = FakeChromium()
+    instances = []
+
+    class Starter:
+        async def start(self):
+            instances.append(FakePlaywright(chromium))
+            return instances[-1]
+
+    monkeypatch.setattr(context_renderer, "async_playwright", Starter)
+    chromium.playwrights = instances
+    return chromium
+
+def test_failed_start_cleans_up_and_next_render_retries(chromium):
+    renderer = ContextRenderer(browsers=2, max_tabs_per_browser=2)
+    chromium.fail_at = 1
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await renderer.render("http://example.com/")
+        assert renderer._playwright is None and renderer._slots is None
+        return await renderer.render("http://example.com/")
+
+    assert "<body>" in asyncio.run(main())
+    first_try = chromium.playwrights[0]
+    assert first_try.stopped
+    assert chromium.browsers[0].closed
+    assert len(chromium.browsers) == 3
+
+def test_close_resets_state_and_renderer_restarts(chromium):
+    renderer = ContextRenderer(browsers=1, max_tabs_per_browser=2)
+
+    async def main():
+        await renderer.render("http://example.com/")
+        await renderer.close()
+        state = (renderer._playwright, renderer._slots, renderer._tabs, renderer._browsers)
+        await renderer.render("http://example.com/")
+        await renderer.close()
+        return state
+
+    assert asyncio.run(main()) == (None, None, [], [])
+    assert chromium.playwrights[0].stopped and chromium.browsers[0].closed
+    assert len(chromium.playwrights) == 2
+
+def test_tab_cap_holds_while_a_browser_relaunches(chromium):
+    renderer = ContextRenderer(browsers=2, max_tabs_per_browser=2)
+
+    async def main():
+        await renderer.start()
+        chromium.browsers[0].connected = False
+        chromium.launch_delay = 0.05
+        await asyncio.gather(*(renderer.render(f"http://example.com/{i}") for i in range(4)))
+        await renderer.close()
+
+    asyncio.run(main())
+    assert all(b.max_open_contexts <= 2 for b in chromium.browsers)
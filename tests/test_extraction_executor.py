@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+from app.services.extraction_executor import ExtractionExecutor
+from app.services.structured_data import extract_structured
+
+PAGE = "<html><body><h1>Title</h1><article>Body</article><img src='/a.jpg'></body></html>"
+
+SCHEMA = {
+    "domain": "example.com",
+    "structured_data": False,
+    "extraction_rules": {
+        "title": {"selector": "h1", "selector_type": "css"},
+        "content": {"selector": "article", "selector_type": "css"},
+    },
+    "media_rules": {"images": {"selector": "img", "selector_type": "css", "attribute": "src"}},
+}
+
+EXPECTED = {
+    "title": "Title",
+    "content": "Body",
+    "author": None,
+    "publish_date": None,
+    "language": None,
+    "categories": [],
+    "media_files": {"images": ["/a.jpg"], "videos": [], "embeds": []},
+}
+
+def test_inline_extraction_without_workers():
+    executor = ExtractionExecutor(workers=0)
+    assert asyncio.run(executor.extract(PAGE.encode(), SCHEMA, "utf-8")) == EXPECTED
+    assert executor._pool is None
+    assert executor.metrics()["completed"] == 1
+
+def test_process_pool_matches_inline_and_records_metrics():
+    executor = ExtractionExecutor(workers=2)
+
+    async def main():
+        return await asyncio.gather(*(executor.extract(PAGE, SCHEMA) for _ in range(4)))
+
+    try:
+        assert asyncio.run(main()) == [EXPECTED] * 4
+        metrics = executor.metrics()
+    finally:
+        executor.close()
+    assert (metrics["completed"], metrics["failed"], metrics["in_flight"]) == (4, 0, 0)
+    assert metrics["cpu_time_avg"] is not None
+
+def test_broken_pool_is_replaced_on_next_extract():
+    executor = ExtractionExecutor(workers=1)
+
+    async def main():
+        await executor.extract(PAGE, SCHEMA)
+        broken = executor._pool
+        for process in broken._processes.values():
+            process.kill()
+        with pytest.raises(BrokenProcessPool):
+            await executor.extract(PAGE, SCHEMA)
+        assert executor._pool is None
+        result = await executor.extract(PAGE, SCHEMA)
+        return broken, result
+
+    try:
+        broken, result = asyncio.run(main())
+        assert executor._pool is not broken
+    finally:
+        executor.close()
+    assert result == EXPECTED
+    assert executor.metrics()["failed"] == 1
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_run_offloads_other_parsing_work(workers):
+    executor = ExtractionExecutor(workers=workers)
+    head = b'<html lang="en"><head><meta property="og:title" content="OG"></head></html>'
+    try:
+        result = asyncio.run(executor.run(extract_structured, head, "utf-8"))
+    finally:
+        executor.close()
+    assert result == {"title": "OG", "language": "en"}
+    assert executor.metrics()["completed"] == 0
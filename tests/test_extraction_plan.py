@@ -0,0 +1,49 @@
+from app.services.extraction_plan import ExtractionPlanCache
+
+def css(selector, attribute=None):
+    return {"selector": selector, "selector_type": "css", "attribute": attribute}
+
+def schema(domain, title="h1"):
+    return {
+        "domain": domain,
+        "extraction_rules": {"title": css(title), "content": css("article")},
+        "media_rules": {"images": css("img", "src")},
+    }
+
+def test_plans_are_reused_until_the_rules_change():
+    plans = ExtractionPlanCache()
+    first = plans.for_schema(schema("example.com"))
+    assert plans.for_schema(schema("example.com")) is first
+    changed = plans.for_schema(schema("example.com", title="h2"))
+    assert changed is not first
+    assert [rule.selector for rule in changed.fields] == ["h2", "article"]
+
+def test_invalidate_and_lru_bound():
+    plans = ExtractionPlanCache(max_domains=2)
+    a = plans.for_schema(schema("a.com"))
+    plans.invalidate("a.com")
+    assert plans.for_schema(schema("a.com")) is not a
+    b = plans.for_schema(schema("b.com"))
+    plans.for_schema(schema("c.com"))
+    assert plans.for_schema(schema("b.com")) is b
+    assert len(plans._plans) == 2 and "a.com" not in plans._plans
+
+def test_config_models_and_dicts_share_one_plan(domain_models):
+    rules = schema("example.com")
+    media = {"images": css("img", "src"), "videos": css("video", "src"), "embeds": css("iframe", "src")}
+    config = domain_models.DomainConfig(
+        domain="example.com", extraction_rules=rules["extraction_rules"], media_rules=media
+    )
+    plans = ExtractionPlanCache()
+    plan = plans.for_config(config)
+    assert plans.for_config(config) is plan
+    assert plans.for_schema(dict(rules, media_rules=media)) is plan
+    assert [rule.name for rule in plan.media] == ["images", "videos", "embeds"]
+
+def test_broken_selectors_are_dropped_when_the_plan_is_built():
+    plan = ExtractionPlanCache().for_schema({
+        "domain": "example.com",
+        "extraction_rules": {"title": css("h1["), "content": css("article")},
+        "media_rules": {},
+    })
+    assert [rule.name for rule in plan.fields] == ["content"]
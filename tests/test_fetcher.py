@@ -0,0 +1,117 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.core.exceptions import ContentRejectedError
+from app.services.fetcher import AsyncFetcher
+
+PAGE = b"<html><body><h1>Hello</h1></body></html>"
+
+async def page(request):
+    return web.Response(body=PAGE, content_type="text/html", charset="utf-8")
+
+async def large(request):
+    return web.Response(body=b"x" * 4096, content_type="text/html")
+
+async def chunked(request):
+    response = web.StreamResponse(headers={"Content-Type": "text/html"})
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    for _ in range(8):
+        await response.write(b"x" * 1024)
+    return response
+
+async def json_body(request):
+    return web.json_response({"a": 1})
+
+async def missing(request):
+    return web.Response(status=404)
+
+async def no_head(request):
+    if request.method == "HEAD":
+        return web.Response(status=405)
+    return web.Response(body=PAGE, content_type="text/html")
+
+async def slow(request):
+    await asyncio.sleep(0.2)
+    return web.Response(body=PAGE, content_type="text/html")
+
+def make_app():
+    app = web.Application()
+    app.router.add_get("/page", page)
+    app.router.add_get("/large", large)
+    app.router.add_get("/chunked", chunked)
+    app.router.add_get("/json", json_body)
+    app.router.add_get("/missing", missing)
+    app.router.add_route("*", "/no-head", no_head)
+    app.router.add_get("/slow", slow)
+    return app
+
+def serve(test):
+    """Run ``test(fetcher, url)`` against a local server"""
+    async def main():
+        server = TestServer(make_app())
+        await server.start_server()
+        fetcher = AsyncFetcher(concurrency=2)
+        try:
+            return await test(fetcher, lambda path: str(server.make_url(path)))
+        finally:
+            await fetcher.close()
+            await server.close()
+    return asyncio.run(main())
+
+def test_fetch_response_returns_body_and_encoding():
+    async def test(fetcher, url):
+        return await fetcher.fetch_response(url("/page"))
+
+    result = serve(test)
+    assert result.status == 200
+    assert result.body == PAGE
+    assert result.encoding == "utf-8"
+    assert "Hello" in result.text
+
+def test_error_status_raises():
+    async def test(fetcher, url):
+        await fetcher.fetch(url("/missing"))
+
+    with pytest.raises(Exception) as error:
+        serve(test)
+    assert getattr(error.value, "status", None) == 404
+
+def test_non_html_content_type_is_rejected():
+    async def test(fetcher, url):
+        await fetcher.fetch(url("/json"))
+
+    with pytest.raises(ContentRejectedError, match="content type"):
+        serve(test)
+
+def test_content_length_over_cap_is_rejected_before_reading():
+    async def test(fetcher, url):
+        await fetcher.fetch(url("/large"), max_bytes=1024)
+
+    with pytest.raises(ContentRejectedError, match="over the 1024 byte limit"):
+        serve(test)
+
+def test_chunked_body_over_cap_is_rejected_while_reading():
+    async def test(fetcher, url):
+        await fetcher.fetch(url("/chunked"), max_bytes=2048)
+
+    with pytest.raises(ContentRejectedError, match="exceeded the 2048 byte limit"):
+        serve(test)
+
+def test_probe_falls_back_to_get_when_head_is_refused():
+    async def test(fetcher, url):
+        return await fetcher.probe(url("/no-head")), await fetcher.probe(url("/missing"))
+
+    assert serve(test) == (200, 404)
+
+def test_in_flight_counts_held_slots():
+    async def test(fetcher, url):
+        tasks = [asyncio.create_task(fetcher.fetch(url("/slow"))) for _ in range(3)]
+        await asyncio.sleep(0.1)
+        during = fetcher.in_flight
+        await asyncio.gather(*tasks)
+        return during, fetcher.in_flight
+
+    # Three fetches, but only two concurrency slots
+    assert serve(test) == (2, 0)
@@ -0,0 +1,56 @@
+import pytest
+from app.services.html_parser import PARSER_BACKENDS, get_parser_backend
+
+PAGE = """<html lang="de"><head><title>Page</title><script>var x = 1;</script></head>
+<body>
+  <article>
+    <h1 class="headline"> Grüße aus Köln </h1>
+    <div class="body"><p>First</p><style>p {}</style><p>Second</p></div>
+    <a class="author" href="/authors/anna">Anna</a>
+    <img src="/a.jpg"><img src="/b.jpg">
+  </article>
+</body></html>"""
+
+@pytest.fixture(params=PARSER_BACKENDS)
+def backend(request):
+    return get_parser_backend(request.param)
+
+def first_text(document, matcher):
+    elements = document.match(matcher)
+    return document.text(elements[0]) if elements else None
+
+def test_backends_agree_on_css_rules(backend):
+    document = backend.parse(PAGE)
+    assert first_text(document, backend.compile("h1.headline")) == "Grüße aus Köln"
+    assert first_text(document, backend.compile("div.body")) == "FirstSecond"
+    author = document.match(backend.compile("a.author"))[0]
+    assert document.attr(author, "href") == "/authors/anna"
+    images = document.match(backend.compile("article img"))
+    assert [document.attr(img, "src") for img in images] == ["/a.jpg", "/b.jpg"]
+    assert document.match(backend.compile("nav")) == []
+
+def test_backends_decode_bytes_with_the_given_encoding(backend):
+    markup = PAGE.replace('<html lang="de">', '<html lang="de"><meta charset="iso-8859-1">')
+    document = backend.parse(markup.encode("iso-8859-1"), "iso-8859-1")
+    assert first_text(document, backend.compile("h1")) == "Grüße aus Köln"
+
+def test_incremental_parse_matches_a_full_parse(backend):
+    parse = backend.incremental("utf-8")
+    data = PAGE.encode("utf-8")
+    for start in range(0, len(data), 7):
+        parse.feed(data[start:start + 7])
+    document = parse.close()
+    assert first_text(document, backend.compile("h1")) == "Grüße aus Köln"
+
+def test_only_lxml_compiles_xpath():
+    with pytest.raises(ValueError):
+        get_parser_backend("bs4").compile("//h1", "xpath")
+    with pytest.raises(ValueError):
+        get_parser_backend("selectolax").compile("//h1", "xpath")
+    assert get_parser_backend("lxml").compile("//h1", "xpath") is not None
+
+def test_backend_selection_falls_back_to_lxml():
+    assert get_parser_backend("bs4").name == "bs4"
+    assert get_parser_backend("bs4", needs_xpath=True).name == "lxml"
+    assert get_parser_backend("html5lib").name == "lxml"
+    assert get_parser_backend("selectolax") is get_parser_backend("selectolax")
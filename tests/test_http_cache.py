@@ -0,0 +1,88 @@
+import asyncio
+from app.services.http_cache import MAX_EXTRACTIONS_PER_ENTRY, HttpCache
+
+CACHEABLE = {"ETag": '"v1"', "Cache-Control": "max-age=60"}
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_put_then_get_returns_fresh_entry_and_body(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=10_000)
+        await cache.put("https://example.com/a", b"<html>a</html>", CACHEABLE, "utf-8")
+        fresh = HttpCache(tmp_path, max_bytes=10_000)
+        return await fresh.get("https://example.com/a"), await fresh.read_body("https://example.com/a")
+
+    entry, body = run(main())
+    assert entry.is_fresh() and entry.etag == '"v1"' and entry.encoding == "utf-8"
+    assert entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert body == b"<html>a</html>"
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=10_000)
+        stored = [
+            await cache.put("https://example.com/1", b"x", {"Cache-Control": "no-store", "ETag": '"a"'}),
+            await cache.put("https://example.com/2", b"x", {}),
+            await cache.put("https://example.com/3", b"x", dict(CACHEABLE, Vary="*")),
+        ]
+        return stored, list(tmp_path.iterdir())
+
+    assert run(main()) == ([None, None, None], [])
+
+def test_uncacheable_refetch_drops_the_stale_entry(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=10_000)
+        await cache.put("https://example.com/a", b"old", CACHEABLE)
+        await cache.put("https://example.com/a", b"new", {"Cache-Control": "no-store"})
+        return await cache.get("https://example.com/a"), list(tmp_path.iterdir())
+
+    assert run(main()) == (None, [])
+
+def test_request_headers_select_separate_entries(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=10_000)
+        mobile = {"User-Agent": "mobile"}
+        await cache.put("https://example.com/a", b"desktop", CACHEABLE)
+        await cache.put("https://example.com/a", b"mobile", dict(CACHEABLE, Vary="User-Agent"),
+                        request_headers=mobile)
+        return (
+            await cache.read_body("https://example.com/a"),
+            await cache.read_body("https://example.com/a", mobile),
+            await cache.get("https://example.com/a", {"User-Agent": "other"}),
+        )
+
+    assert run(main()) == (b"desktop", b"mobile", None)
+
+def test_extractions_are_bounded_per_entry(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=100_000)
+        entry = await cache.put("https://example.com/a", b"<html></html>", CACHEABLE)
+        for i in range(MAX_EXTRACTIONS_PER_ENTRY + 2):
+            await cache.store_extraction("https://example.com/a", entry, f"schema-{i}", {"title": str(i)})
+        return await HttpCache(tmp_path, max_bytes=100_000).get("https://example.com/a")
+
+    entry = run(main())
+    assert list(entry.extractions) == [f"schema-{i}" for i in range(2, MAX_EXTRACTIONS_PER_ENTRY + 2)]
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=1500)
+        await cache.put("https://example.com/a", b"a" * 400, CACHEABLE)
+        await cache.put("https://example.com/b", b"b" * 400, CACHEABLE)
+        await cache.get("https://example.com/a")
+        await cache.put("https://example.com/c", b"c" * 400, CACHEABLE)
+        return [await cache.get(f"https://example.com/{name}") is not None for name in "abc"]
+
+    assert run(main()) == [True, False, True]
+
+def test_concurrent_writes_of_one_entry_do_not_collide(tmp_path):
+    async def main():
+        cache = HttpCache(tmp_path, max_bytes=1_000_000)
+        await asyncio.gather(*(
+            cache.put("https://example.com/a", b"x" * 10_000, CACHEABLE) for _ in range(20)
+        ))
+        return await cache.read_body("https://example.com/a")
+
+    assert run(main()) == b"x" * 10_000
+    assert not list(tmp_path.glob("*.tmp"))
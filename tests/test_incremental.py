@@ -0,0 +1,148 @@
+import asyncio
+from contextlib import asynccontextmanager
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services.extraction_executor import extract_page, scraped_fields
+from app.services.extraction_plan import ExtractionPlan, ExtractionPlanCache
+from app.services.fetcher import AsyncFetcher
+from app.services.incremental import StreamingExtractor, stream_extract
+
+PAGE = b"""<html lang="en"><head><title>Page</title>
+<meta property="og:title" content="OG title">
+<meta property="og:image" content="/og.png">
+</head><body>
+<header><a class="author" rel="author" href="/a">Jane Doe</a></header>
+<article>
+  <h1 class="headline">Hello <em>world</em></h1>
+  <time datetime="2024-05-01">May 1</time>
+  <div class="body"><p>First</p><p>Second</p></div>
+  <img src="/a.png"><figure><img src="/b.png"></figure>
+  <iframe src="https://video.example/embed/1"></iframe>
+</article>
+""" + b"<p>filler</p>" * 500 + b"""
+<footer><img src="/footer.png"><a rel="tag" href="/t">news</a></footer>
+</body></html>"""
+
+FIELD_RULES = {
+    "title": {"selector": "article h1.headline", "selector_type": "css"},
+    "content": {"selector": "div.body", "selector_type": "css"},
+    "author": {"selector": "[rel=author]", "selector_type": "css"},
+    "publish_date": {"selector": "time", "selector_type": "css", "attribute": "datetime"},
+    "language": {"selector": "html", "selector_type": "css", "attribute": "lang"},
+}
+
+MEDIA_RULES = {
+    "images": {"selector": "img", "selector_type": "css", "attribute": "src"},
+    "embeds": {"selector": "article > iframe", "selector_type": "css", "attribute": "src"},
+}
+
+SCOPED_MEDIA_RULES = {
+    "images": {"selector": "article img", "selector_type": "css", "attribute": "src"},
+    "videos": {"selector": "article video", "selector_type": "css", "attribute": "src"},
+    "embeds": {"selector": "article > iframe", "selector_type": "css", "attribute": "src"},
+}
+
+def stream(plan, chunk_size=64, structured=False):
+    extractor = StreamingExtractor(plan, structured=structured)
+    consumed = 0
+    for start in range(0, len(PAGE), chunk_size):
+        consumed = start + chunk_size
+        if extractor.feed(PAGE[start:consumed]):
+            break
+    return extractor, min(consumed, len(PAGE))
+
+def per_rule(plan):
+    return scraped_fields(*plan.extract(plan.backend.parse(PAGE)))
+
+@pytest.mark.parametrize("media_rules", [{}, MEDIA_RULES])
+def test_streaming_matches_per_rule_extraction(media_rules):
+    plan = ExtractionPlan.build(FIELD_RULES, media_rules, "lxml")
+    assert StreamingExtractor.supports(plan)
+    extractor, _ = stream(plan)
+    assert extractor.result() == per_rule(plan)
+
+def test_stops_once_fields_are_found_without_media_rules():
+    plan = ExtractionPlan.build(FIELD_RULES, {}, "lxml")
+    extractor, consumed = stream(plan)
+    assert extractor.complete
+    assert consumed < len(PAGE) // 2
+    assert extractor.result() == per_rule(plan)
+
+def test_unscoped_media_rules_read_up_to_the_end_of_body():
+    plan = ExtractionPlan.build(FIELD_RULES, MEDIA_RULES, "lxml")
+    extractor, consumed = stream(plan)
+    assert extractor.complete
+    assert consumed > len(PAGE) - 64
+    assert extractor.result()["media_files"]["images"] == ["/a.png", "/b.png", "/footer.png"]
+
+def test_domain_config_with_scoped_media_stops_after_the_container(domain_models):
+    config = domain_models.DomainConfig(
+        domain="example.com", extraction_rules=FIELD_RULES, media_rules=SCOPED_MEDIA_RULES
+    )
+    plan = ExtractionPlanCache().for_config(config)
+    assert StreamingExtractor.supports(plan)
+    extractor, consumed = stream(plan)
+    assert extractor.complete
+    assert consumed < len(PAGE) // 2
+    assert extractor.result() == per_rule(plan)
+    assert extractor.result()["media_files"] == {
+        "images": ["/a.png", "/b.png"], "videos": [], "embeds": ["https://video.example/embed/1"]
+    }
+
+def test_structured_data_wins_like_in_extract_page():
+    schema = {"domain": "example.com", "structured_data": True,
+              "extraction_rules": FIELD_RULES, "media_rules": SCOPED_MEDIA_RULES}
+    plan = ExtractionPlan.build(FIELD_RULES, SCOPED_MEDIA_RULES, "lxml")
+    extractor, consumed = stream(plan, structured=True)
+    expected, _ = extract_page(PAGE, None, schema)
+    assert extractor.result() == expected
+    assert expected["title"] == "OG title"
+    assert expected["media_files"]["images"] == ["/a.png", "/b.png", "/og.png"]
+    assert consumed < len(PAGE) // 2
+
+class RecordingFetcher(AsyncFetcher):
+    @asynccontextmanager
+    async def stream(self, *args, **kwargs):
+        async with super().stream(*args, **kwargs) as response:
+            self.last = response
+            yield response
+
+def test_stream_extract_cancels_the_download():
+    plan = ExtractionPlan.build(FIELD_RULES, SCOPED_MEDIA_RULES, "lxml")
+    body = PAGE.replace(b"<p>filler</p>" * 500, b"<p>filler</p>" * 50_000)
+
+    async def page(request):
+        return web.Response(body=body, content_type="text/html")
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/", page)
+        server = TestServer(app)
+        await server.start_server()
+        fetcher = RecordingFetcher()
+        try:
+            result = await stream_extract(fetcher, str(server.make_url("/")), plan)
+        finally:
+            await fetcher.close()
+            await server.close()
+        return result, fetcher.last.bytes_read
+
+    result, bytes_read = asyncio.run(main())
+    assert result == per_rule(plan)
+    assert bytes_read < len(body) // 2
+
+def test_missing_field_reads_whole_page():
+    plan = ExtractionPlan.build(dict(FIELD_RULES, categories={"selector": ".missing", "selector_type": "css"}),
+                                {}, "lxml")
+    extractor, consumed = stream(plan)
+    assert consumed == len(PAGE)
+    assert extractor.result()["categories"] is None
+
+@pytest.mark.parametrize("rule", [
+    {"selector": "//h1", "selector_type": "xpath"},
+    {"selector": "p:first-child", "selector_type": "css"},
+])
+def test_rules_that_need_the_full_tree_are_not_streamed(rule):
+    plan = ExtractionPlan.build(dict(FIELD_RULES, title=rule), {}, "lxml")
+    assert not StreamingExtractor.supports(plan)
@@ -0,0 +1,75 @@
+import json
+import logging
+import re
+from app.services import resource_blocking
+from app.services.resource_blocking import (
+    ResourceStats, apply_selenium_blocking, blocked_url_patterns, request_category,
+    resolve_block_categories, selenium_report
+)
+from app.utils.domains import registrable_domain
+
+class FakeDriver:
+    def __init__(self, events=()):
+        self.commands = []
+        self.log = [{"message": json.dumps({"message": event})} for event in events]
+
+    def get_log(self, name):
+        log, self.log = self.log, []
+        return log
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+def test_registrable_domain():
+    assert registrable_domain("news.example.com") == "example.com"
+    assert registrable_domain("news.example.co.uk") == "example.co.uk"
+    assert registrable_domain("Example.com:8080") == "example.com"
+    assert registrable_domain("127.0.0.1") == "127.0.0.1"
+
+def test_profiles_expand_and_unknown_entries_are_ignored():
+    assert resolve_block_categories(["media", "script", "bogus"]) == {"image", "media", "font", "script"}
+
+def chrome_match(url, pattern):
+    """Network.setBlockedURLs matching, where only * is a wildcard"""
+    return re.fullmatch(re.escape(pattern).replace(r"\*", ".*"), url) is not None
+
+def test_extension_patterns_match_exact_extensions_only():
+    patterns = blocked_url_patterns({"script"})
+    matches = lambda url: any(chrome_match(url, p) for p in patterns)
+    assert matches("https://cdn.example.com/app.js")
+    assert matches("https://cdn.example.com/app.js?v=3")
+    assert not matches("https://example.com/app.json")
+    assert not matches("https://example.com/page.jsp")
+
+def test_third_party_compares_registrable_domains():
+    assert "third_party" not in request_category("script", "https://static.bbc.co.uk/a.js", "www.bbc.co.uk")
+    assert "third_party" in request_category("script", "https://cdn.other.co.uk/a.js", "www.bbc.co.uk")
+    assert request_category("script", "https://www.google-analytics.com/ga.js", "example.com") == {
+        "script", "tracking", "third_party"
+    }
+
+def test_selenium_blocking_sets_url_patterns_and_warns_about_third_party(caplog, monkeypatch):
+    monkeypatch.setattr(resource_blocking, "_unenforced_warned", set())
+    driver = FakeDriver()
+    with caplog.at_level(logging.WARNING):
+        apply_selenium_blocking(driver, {"font", "third_party"}, "https://example.com/a")
+        apply_selenium_blocking(driver, {"font", "third_party"}, "https://www.example.com/b")
+    assert driver.commands[-1] == ("Network.setBlockedURLs", {"urls": blocked_url_patterns({"font"})})
+    warnings = [r for r in caplog.records if "third_party" in r.getMessage()]
+    assert len(warnings) == 1
+
+def test_selenium_report_counts_loaded_and_blocked_requests():
+    stats = ResourceStats()
+    stats.record("image", 1000)
+    driver = FakeDriver([
+        {"method": "Network.responseReceived", "params": {"requestId": "1", "type": "Document"}},
+        {"method": "Network.loadingFinished", "params": {"requestId": "1", "encodedDataLength": 5000}},
+        {"method": "Network.loadingFailed", "params": {"requestId": "2", "type": "Image",
+                                                       "blockedReason": "inspector"}},
+        {"method": "Network.loadingFailed", "params": {"requestId": "3", "type": "Script",
+                                                       "errorText": "net::ERR_FAILED"}},
+    ])
+    report = selenium_report(driver, "https://example.com/", 0.0, stats)
+    assert (report.loaded_requests, report.bytes_loaded) == (1, 5000)
+    assert report.blocked_by_type == {"image": 1}
+    assert report.estimated_bytes_saved == 1000
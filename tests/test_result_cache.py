@@ -0,0 +1,65 @@
+import pytest
+from app.services import result_cache
+from app.services.result_cache import ResultCache, canonical_url, request_key
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://Example.COM", "https://example.com/"),
+    ("https://example.com:443/a", "https://example.com/a"),
+    ("http://example.com:8080/a", "http://example.com:8080/a"),
+    ("https://example.com./a#section", "https://example.com/a"),
+    ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?utm_source=x&id=3&fbclid=y&UTM_Medium=z", "https://example.com/a?id=3"),
+    ("https://example.com/a?flag=", "https://example.com/a?flag="),
+    ("https://[::1]:8443/a", "https://[::1]:8443/a"),
+])
+def test_canonical_url(url, expected):
+    assert canonical_url(url) == expected
+
+def test_path_case_is_kept():
+    assert canonical_url("https://example.com/Article") != canonical_url("https://example.com/article")
+
+def test_request_key_includes_headers():
+    url = "https://example.com/a?utm_campaign=x"
+    assert request_key(url) == "https://example.com/a"
+    assert request_key(url, {"A": "1", "B": "2"}) == request_key(url, {"B": "2", "A": "1"})
+    assert request_key(url, {"A": "1"}) != request_key(url, {"A": "2"})
+    assert request_key(url, {"A": "1"}).startswith("https://example.com/a#")
+
+def test_request_key_includes_options():
+    url = "https://example.com/a"
+    assert request_key(url, None, {"timeout": 30}) == request_key(url, {}, {"timeout": 30})
+    assert request_key(url, None, {"use_javascript": True}) != request_key(url, None, {"use_javascript": False})
+    assert request_key(url, {"A": "1"}, {"timeout": 30}) != request_key(url, {"A": "1"})
+
+def test_entries_are_keyed_by_config_version():
+    cache = ResultCache(ttl=60, max_entries=10)
+    cache.put("key", ("example.com", 1), {"title": "old"})
+    assert cache.get("key", ("example.com", 1)) == {"title": "old"}
+    assert cache.get("key", ("example.com", 2)) is None
+    assert cache.metrics() == {"entries": 1, "hits": 1, "misses": 1}
+
+def test_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(ttl=30, max_entries=10)
+    cache.put("key", None, {"title": "t"})
+    now[0] += 29
+    assert cache.get("key", None) is not None
+    now[0] += 2
+    assert cache.get("key", None) is None
+    assert cache.metrics()["entries"] == 0
+
+def test_least_recently_used_entries_are_dropped():
+    cache = ResultCache(ttl=60, max_entries=2)
+    cache.put("a", None, {})
+    cache.put("b", None, {})
+    cache.get("a", None)
+    cache.put("c", None, {})
+    assert cache.get("b", None) is None
+    assert cache.get("a", None) is not None
+    assert cache.get("c", None) is not None
+
+def test_zero_ttl_disables_the_cache():
+    cache = ResultCache(ttl=0, max_entries=10)
+    cache.put("key", None, {})
+    assert cache.get("key", None) is None
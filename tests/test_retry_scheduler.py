@@ -0,0 +1,59 @@
+import aiohttp
+import pytest
+from app.core.exceptions import ContentRejectedError
+from app.services import retry_scheduler
+from app.services.retry_scheduler import backoff_delay, is_retryable, retry_after
+
+class StatusError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"status {status}")
+        self.status = status
+        self.headers = headers or {}
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+
+class ResponseError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.response = Response(status_code)
+
+@pytest.mark.parametrize("error, retryable", [
+    (StatusError(500), True),
+    (StatusError(503), True),
+    (StatusError(408), True),
+    (StatusError(429), True),
+    (StatusError(400), False),
+    (StatusError(404), False),
+    (ResponseError(403), False),
+    (ResponseError(502), True),
+    (ContentRejectedError("too large"), False),
+    (aiohttp.ClientConnectionError("refused"), True),
+    (TimeoutError(), True),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+def test_retry_after_seconds():
+    assert retry_after(StatusError(429, {"Retry-After": "120"})) == 120.0
+    assert retry_after(StatusError(503, {"Retry-After": "-5"})) == 0.0
+    assert retry_after(StatusError(503, {"Retry-After": "soon"})) is None
+    assert retry_after(StatusError(503)) is None
+
+def test_retry_after_http_date():
+    assert retry_after(StatusError(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+
+@pytest.mark.parametrize("attempt", range(8))
+def test_backoff_delay_is_within_jitter_bounds(attempt):
+    delay = min(60.0, 1.0 * 2 ** attempt)
+    for _ in range(50):
+        assert delay / 2 <= backoff_delay(attempt, base=1.0, cap=60.0) <= delay
+
+def test_backoff_delay_extremes(monkeypatch):
+    monkeypatch.setattr(retry_scheduler.random, "uniform", lambda low, high: low)
+    assert backoff_delay(3, base=2.0, cap=100.0) == 8.0
+    monkeypatch.setattr(retry_scheduler.random, "uniform", lambda low, high: high)
+    assert backoff_delay(3, base=2.0, cap=100.0) == 16.0
+    assert backoff_delay(20, base=2.0, cap=100.0) == 100.0
@@ -0,0 +1,103 @@
+import asyncio
+from app.services.single_flight import SingleFlight
+
+class FakeRedis:
+    """The few lease commands SingleFlight uses, shared between "workers\""""
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+def worker(redis=None):
+    flight = SingleFlight(lease_ttl=30, wait_timeout=5, poll_interval=0.01)
+    flight.redis = redis
+    return flight
+
+def test_concurrent_calls_share_one_run():
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "config"
+
+    async def main():
+        flight = worker()
+        return await asyncio.gather(*(flight.do("example.com", generate) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["config"] * 5
+    assert len(calls) == 1
+
+def test_failure_reaches_every_caller_and_the_next_call_retries():
+    attempts = []
+
+    async def generate():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("LLM unavailable")
+        return "config"
+
+    async def main():
+        flight = worker()
+        first = await asyncio.gather(
+            *(flight.do("example.com", generate) for _ in range(3)), return_exceptions=True
+        )
+        return first, await flight.do("example.com", generate)
+
+    first, retried = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert retried == "config"
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def generate():
+        await asyncio.sleep(0.05)
+        return "config"
+
+    async def main():
+        flight = worker()
+        impatient = asyncio.create_task(flight.do("example.com", generate))
+        patient = asyncio.create_task(flight.do("example.com", generate))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    assert asyncio.run(main()) == "config"
+
+def test_other_worker_waits_for_the_lease_and_loads_the_result():
+    redis = FakeRedis()
+    stored = {}
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        stored["example.com"] = "config"
+        return "config"
+
+    async def load():
+        return stored.get("example.com")
+
+    async def main():
+        first, second = worker(redis), worker(redis)
+        leader = asyncio.create_task(first.do("example.com", generate, load))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(leader, second.do("example.com", generate, load))
+
+    assert asyncio.run(main()) == ["config", "config"]
+    assert len(calls) == 1
+    assert redis.data == {}
@@ -0,0 +1,52 @@
+from app.services.structured_data import extract_structured
+
+JSON_LD = b"""<html lang="en_GB"><head>
+<meta property="og:title" content="OG title">
+<meta property="og:image" content="https://cdn.example/og.jpg">
+<meta property="article:tag" content="politics">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@graph": [
+  {"@type": "WebPage", "name": "Page name"},
+  {"@type": "NewsArticle", "headline": " Headline ", "datePublished": "2024-05-01T10:00:00Z",
+   "author": [{"@type": "Person", "name": "Jane Doe"}, "John Roe"],
+   "articleSection": "World", "keywords": "economy, trade",
+   "image": ["https://cdn.example/lead.jpg", {"url": "https://cdn.example/og.jpg"}]}
+]}
+</script>
+</head><body><h1>Body title</h1></body></html>"""
+
+def test_json_ld_article_wins_over_meta_tags():
+    fields = extract_structured(JSON_LD)
+    assert fields["title"] == "Headline"
+    assert fields["author"] == "Jane Doe, John Roe"
+    assert fields["publish_date"] == "2024-05-01T10:00:00Z"
+    assert fields["language"] == "en-GB"
+    assert fields["categories"] == ["World", "economy", "trade", "politics"]
+    assert fields["media_files"] == {
+        "images": ["https://cdn.example/lead.jpg", "https://cdn.example/og.jpg"]
+    }
+
+def test_meta_tags_without_json_ld():
+    markup = """<html><head>
+    <meta property="og:title" content="OG title">
+    <meta property="article:author" content="https://example.com/jane">
+    <meta name="author" content="Jane Doe">
+    <meta property="article:published_time" content="2024-01-02">
+    </head><body></body></html>"""
+    fields = extract_structured(markup)
+    assert fields == {"title": "OG title", "author": "Jane Doe", "publish_date": "2024-01-02"}
+
+def test_webpage_is_not_an_article():
+    markup = b"""<html><head><script type="application/ld+json">
+    {"@type": "WebPage", "name": "Site home", "image": "https://cdn.example/logo.png"}
+    </script></head></html>"""
+    assert extract_structured(markup) == {}
+
+def test_body_is_not_parsed():
+    markup = b"<html><head></head><body><meta property='og:title' content='late'></body></html>"
+    assert "title" not in extract_structured(markup)
+
+def test_invalid_json_ld_is_ignored():
+    markup = b"""<html><head><script type="application/ld+json">{not json</script>
+    <meta property="og:title" content="Fallback"></head></html>"""
+    assert extract_structured(markup)["title"] == "Fallback"
@@ -0,0 +1,97 @@
+import asyncio
+from collections import defaultdict
+import pytest
+from app.core.exceptions import QueueFullError
+from app.services.worker_pool import Job, WorkerPool
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+async def drain(pool, count, timeout=5):
+    async def finished():
+        while pool.completed + pool.failed < count:
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(finished(), timeout)
+
+def test_per_domain_limit():
+    active = defaultdict(int)
+    peak = defaultdict(int)
+    total_peak = [0]
+
+    async def handler(job):
+        active[job.domain] += 1
+        peak[job.domain] = max(peak[job.domain], active[job.domain])
+        total_peak[0] = max(total_peak[0], sum(active.values()))
+        await asyncio.sleep(0.01)
+        active[job.domain] -= 1
+
+    async def scenario():
+        pool = WorkerPool(handler, workers=4, max_queue=100, per_domain=2)
+        for i in range(8):
+            pool.submit(Job(f"a{i}", f"https://a.example/{i}"))
+            pool.submit(Job(f"b{i}", f"https://b.example/{i}"))
+        await drain(pool, 16)
+        await pool.close()
+        return pool
+
+    pool = run(scenario())
+    assert pool.completed == 16
+    assert peak["a.example"] == 2
+    assert peak["b.example"] == 2
+    assert total_peak[0] == 4
+
+def test_one_slow_domain_does_not_hold_workers():
+    async def handler(job):
+        await asyncio.sleep(0.2 if job.domain == "slow.example" else 0)
+
+    async def scenario():
+        pool = WorkerPool(handler, workers=2, max_queue=100, per_domain=1)
+        for i in range(5):
+            pool.submit(Job(f"s{i}", f"https://slow.example/{i}"))
+        for i in range(20):
+            pool.submit(Job(f"f{i}", f"https://fast.example/{i}"))
+        # Deferred slow jobs wait without blocking the second worker
+        await asyncio.sleep(0.1)
+        fast_done = pool.completed
+        metrics = pool.metrics()
+        await pool.close()
+        return fast_done, metrics
+
+    fast_done, metrics = run(scenario())
+    assert fast_done == 20
+    assert metrics["deferred"] == 4
+    assert metrics["busiest_domains"] == {"slow.example": 1}
+
+def test_submit_rejects_when_full():
+    async def handler(job):
+        await asyncio.sleep(0)
+
+    async def scenario():
+        pool = WorkerPool(handler, workers=1, max_queue=2, per_domain=1)
+        pool.submit(Job("1", "https://a.example/1"))
+        pool.submit(Job("2", "https://a.example/2"))
+        with pytest.raises(QueueFullError):
+            pool.submit(Job("3", "https://a.example/3"))
+        pool.submit(Job("4", "https://a.example/4"), bounded=False)
+        await drain(pool, 3)
+        await pool.close()
+        return pool
+
+    pool = run(scenario())
+    assert pool.rejected == 1
+    assert pool.completed == 3
+
+def test_failed_jobs_are_counted():
+    async def handler(job):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        pool = WorkerPool(handler, workers=1, max_queue=10, per_domain=1)
+        pool.submit(Job("1", "https://a.example/1"))
+        await drain(pool, 1)
+        await pool.close()
+        return pool
+
+    pool = run(scenario())
+    assert pool.failed == 1
+    assert pool.metrics()["in_flight"] == 0
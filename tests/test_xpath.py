@@ -0,0 +1,59 @@
+from app.services.extraction_plan import ExtractionPlan
+
+PAGE = """<html><head><meta property="article:author" content="Anna"></head>
+<body><article>
+  <h1> Headline </h1>
+  <div id="body"><p>One</p><p>Two</p></div>
+  <time datetime="2024-05-01">May 1</time>
+  <img src="/a.jpg"><img src="/b.jpg">
+</article></body></html>"""
+
+def xpath(selector, attribute=None, post_process=None):
+    return {"selector": selector, "selector_type": "xpath",
+            "attribute": attribute, "post_process": post_process}
+
+def extract(extraction_rules, media_rules=None, parser=None):
+    plan = ExtractionPlan.build(extraction_rules, media_rules or {}, parser)
+    return plan, plan.extract(plan.backend.parse(PAGE))
+
+def test_xpath_rules_select_elements_attributes_and_text():
+    _, (content, _) = extract({
+        "title": xpath("//article/h1"),
+        "content": xpath("//div[@id='body']"),
+        "author": xpath("//meta[@property='article:author']/@content"),
+        "publish_date": xpath("//time", attribute="datetime"),
+        "language": xpath("//h1/text()", post_process="lowercase"),
+    })
+    assert content == {
+        "title": "Headline",
+        "content": "OneTwo",
+        "author": "Anna",
+        "publish_date": "2024-05-01",
+        "language": "headline",
+    }
+
+def test_scalar_xpath_results_become_a_single_value():
+    _, (content, _) = extract({
+        "title": xpath("string(//article/h1)"),
+        "content": xpath("count(//p)"),
+        "author": xpath("string(//nav)"),
+    })
+    assert content == {"title": "Headline", "content": "2.0", "author": None}
+
+def test_xpath_media_rules_collect_every_url():
+    _, (_, media) = extract({}, {"images": xpath("//article//img/@src"),
+                                 "videos": xpath("//video", attribute="src")})
+    assert media == {"images": ["/a.jpg", "/b.jpg"], "videos": [], "embeds": []}
+
+def test_xpath_configs_are_parsed_with_lxml_whatever_the_parser_setting():
+    plan, (content, _) = extract(
+        {"title": xpath("//h1"), "content": {"selector": "#body", "selector_type": "css"}},
+        parser="selectolax"
+    )
+    assert plan.backend.name == "lxml"
+    assert content == {"title": "Headline", "content": "OneTwo"}
+
+def test_invalid_xpath_rule_is_skipped_at_compile_time():
+    plan, (content, _) = extract({"title": xpath("//h1["), "content": xpath("//p")})
+    assert [rule.name for rule in plan.fields] == ["content"]
+    assert content == {"content": "One"}